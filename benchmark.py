@@ -0,0 +1,1102 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for NovelReader CLI
+Runs offline against a local stand-in for Google TTS - no network access
+or audio playback required. Results can be saved as JSON and compared:
+
+    python benchmark.py --json before.json
+    python benchmark.py --json after.json --compare before.json
+"""
+
+import argparse
+import base64
+import contextlib
+import http.server
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import requests
+from pydub import AudioSegment
+
+from novelreader import (
+    NovelReader, EffectsProcessor, FakeTTSBackend, GoogleTTSBackend, Mp3Decoder, NameLexicon,
+    ReaderDaemon, RunHistory, SegmentStore, SpeakerAttributor, build_parser, run_in_daemon,
+    DEFAULT_NAME_CATEGORIES, DEFAULT_VOICE_EFFECTS, EXPORT_FRAME_RATE, join_mp3_files, mp3_audio_span,
+)
+
+FAKE_VOICES = [
+    {'lang': 'en', 'tld': tld, 'slow': False}
+    for tld in ('com', 'co.uk', 'com.au', 'ca', 'co.in', 'ie', 'co.za', 'com.ng')
+]
+
+NARRATIVE_WORDS = (
+    "the old library rain window door shelves dust light corridor shadow "
+    "quietly slowly across beneath against before after through silence "
+    "heavy ancient forgotten weathered endless narrow distant familiar "
+    "walked waited listened turned opened closed watched remembered "
+    "letter lantern staircase garden harbour station village morning evening"
+).split()
+
+SPEECH_VERBS = ('said', 'asked', 'replied', 'whispered', 'muttered', 'called out', 'shouted', 'admitted')
+
+
+def synthetic_clips(count=8, seconds=6.0):
+    """A few gTTS-shaped clips (24 kHz mono) to cycle through as segments"""
+    backend = FakeTTSBackend()
+    clips = []
+    for i in range(count):
+        duration_ms = seconds * 1000 * (0.5 + (i % 4) / 4.0)
+        text = 'x' * int(duration_ms / backend.ms_per_char)
+        clips.append(backend.synthesize(text, FAKE_VOICES[i % len(FAKE_VOICES)]))
+    return clips
+
+
+def synthetic_names(count):
+    """Distinct pronounceable names: 'bakora', 'dimelu', ..."""
+    syllables = [c + v for c in 'bdfgklmnprstvz' for v in 'aeiou']
+    names = []
+    i = 0
+    while len(names) < count:
+        n = i
+        name = ''
+        for _ in range(3):
+            name += syllables[n % len(syllables)]
+            n //= len(syllables)
+        names.append(name)
+        i += 7919  # stride through the space so names vary early
+    return names
+
+
+def synthetic_paragraphs(seed=1, count=2000):
+    """A deterministic pool of narrative and dialogue paragraphs"""
+    rng = random.Random(seed)
+    cast = [name.capitalize() for names in DEFAULT_NAME_CATEGORIES.values() for name in names]
+    cast += [name.capitalize() for name in synthetic_names(60)]
+
+    def sentence():
+        words = [rng.choice(NARRATIVE_WORDS) for _ in range(rng.randint(6, 18))]
+        return ' '.join(words).capitalize() + rng.choice('.!?')
+
+    paragraphs = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.45:
+            paragraphs.append(' '.join(sentence() for _ in range(rng.randint(2, 6))))
+        else:
+            line = ' '.join(sentence() for _ in range(rng.randint(1, 3)))
+            name = rng.choice(cast)
+            verb = rng.choice(SPEECH_VERBS)
+            if kind < 0.75:
+                paragraphs.append(f'"{line[:-1]}," {name} {verb}.')
+            else:
+                paragraphs.append(f'{name} {verb}, "{line}"')
+    return paragraphs
+
+
+def write_synthetic_novel(path, size_bytes, seed=1):
+    """Write roughly size_bytes (10 KB to 100 MB+) of chaptered manuscript"""
+    rng = random.Random(seed)
+    pool = synthetic_paragraphs(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        written = 0
+        chapter = 1
+        while written < size_bytes:
+            block = f"Chapter {chapter}\n\n" + '\n\n'.join(
+                rng.choice(pool) for _ in range(rng.randint(40, 120))
+            ) + '\n\n'
+            f.write(block)
+            written += len(block.encode('utf-8'))
+            chapter += 1
+
+
+def measure(func, *args):
+    """Run func and return (seconds, peak traced Python memory in bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def timed(func, *args):
+    """Run func and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def have_ffmpeg():
+    return shutil.which(AudioSegment.converter) is not None
+
+
+def default_export_format():
+    """MP3 when an encoder is installed, otherwise WAV"""
+    return 'mp3' if have_ffmpeg() else 'wav'
+
+
+def per_call(func, *args, repeat=20):
+    """Average wall time of func(*args) in milliseconds"""
+    func(*args)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return 1000.0 * (time.perf_counter() - start) / repeat
+
+
+def size_label(size_mb):
+    return f"{size_mb * 1024:.0f}KB" if size_mb < 1 else f"{size_mb:g}MB"
+
+
+def offline_reader(**options):
+    """A NovelReader wired to the fake backend, with no cache"""
+    return NovelReader(use_google_tts=True, cache=None, tts_backend=FakeTTSBackend(), **options)
+
+
+def bench_pipeline(args):
+    """Per-stage timings on synthetic novels with the fake TTS backend"""
+    fmt = args.format or default_export_format()
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    print(f"\nPipeline benchmark (fake TTS, first {args.synth_segments} segments synthesized, {fmt} export)")
+    print(f"{'size':>8} {'stage':>10} {'items':>9} {'seconds':>9} {'items/s':>11}")
+    try:
+        for size_mb in args.sizes:
+            label = size_label(size_mb)
+            path = os.path.join(workdir, f"novel-{label}.txt")
+            write_synthetic_novel(path, int(size_mb * 1024 ** 2))
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+
+            reader = offline_reader()
+            segments, parse_time = timed(reader.parse_text, text)
+            del text
+
+            def assign_all():
+                for segment in segments:
+                    reader.assign_google_voice(segment['speaker'])
+            _, voices_time = timed(assign_all)
+
+            sample = segments[:args.synth_segments]
+            jobs = [(s['text'], reader.assign_google_voice(s['speaker']), s['speaker']) for s in sample]
+
+            def synthesize_all():
+                return [reader.tts_backend.synthesize(text, voice) for text, voice, _ in jobs]
+            raw_audio, synth_time = timed(synthesize_all)
+
+            def effects_all():
+                return [reader.apply_character_effects(audio, job[2]) for audio, job in zip(raw_audio, jobs)]
+            audio, effects_time = timed(effects_all)
+
+            export_path = os.path.join(workdir, f"novel-{label}.{fmt}")
+            _, export_time = timed(reader.export_streaming, iter(audio), export_path, fmt)
+
+            stages = {
+                'parse': (len(segments), parse_time),
+                'voices': (len(segments), voices_time),
+                'synthesize': (len(sample), synth_time),
+                'effects': (len(sample), effects_time),
+                'export': (len(sample), export_time),
+            }
+            results[label] = {}
+            for stage, (items, seconds) in stages.items():
+                rate = items / seconds if seconds else 0.0
+                results[label][stage] = {'items': items, 'seconds': seconds, 'items_per_s': rate}
+                print(f"{label:>8} {stage:>10} {items:>9} {seconds:>9.3f} {rate:>11.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_export(args):
+    """Buffered sum() export against the streaming encoder on a long book"""
+    fmt = args.format or default_export_format()
+    clips = synthetic_clips()
+    reader = offline_reader()
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    def book(segments):
+        for i in range(segments):
+            yield clips[i % len(clips)]
+
+    print(f"\nExport benchmark ({fmt}, ~{args.segments * 4.5 / 60:.0f} min of audio)")
+    print(f"{'segments':>10} {'mode':>10} {'seconds':>10} {'peak MB':>10}")
+    try:
+        for segments in sorted({max(1, args.segments // 4), max(1, args.segments // 2), args.segments}):
+            for mode in ('buffered', 'stream'):
+                path = os.path.join(workdir, f"book-{mode}.{fmt}")
+                export = reader.export_buffered if mode == 'buffered' else reader.export_streaming
+                elapsed, peak = measure(export, book(segments), path, fmt)
+                results[f"{segments}/{mode}"] = {'seconds': elapsed, 'peak_mb': peak / 1024 ** 2}
+                print(f"{segments:>10} {mode:>10} {elapsed:>10.2f} {peak / 1024 ** 2:>10.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# (format, bitrate) pairs for the codecs benchmark; None keeps the encoder's default
+CODEC_SETTINGS = (('mp3', None), ('mp3', '64k'), ('opus', '32k'), ('ogg', None),
+                  ('flac', None), ('wav', None), ('pcm', None))
+
+
+def bench_codecs(args):
+    """Streaming encode cost and output size for each --format"""
+    clips = synthetic_clips()
+    audio_minutes = sum(len(clips[i % len(clips)]) for i in range(args.segments)) / 60000
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    def book():
+        for i in range(args.segments):
+            yield clips[i % len(clips)]
+
+    print(f"\nCodecs benchmark ({args.segments} segments, ~{audio_minutes:.0f} min of audio)")
+    print(f"{'format':>12} {'seconds':>10} {'x realtime':>11} {'KB/min':>10}")
+    try:
+        for fmt, bitrate in CODEC_SETTINGS:
+            if fmt not in ('wav', 'pcm') and not have_ffmpeg():
+                continue
+            label = f"{fmt}@{bitrate}" if bitrate else fmt
+            reader = offline_reader(encoding={'format': fmt, 'bitrate': bitrate})
+            path = os.path.join(workdir, f"book.{fmt}")
+            _, elapsed = timed(reader.export_streaming, book(), path)
+            size_kb = os.path.getsize(path) / 1024
+            results[label] = {'seconds': elapsed, 'kb_per_minute': size_kb / audio_minutes}
+            print(f"{label:>12} {elapsed:>10.2f} {audio_minutes * 60 / elapsed:>10.0f}x "
+                  f"{size_kb / audio_minutes:>10.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_estimate(args):
+    """--estimate run time on large manuscripts, and its accuracy after one calibrating render"""
+    fmt = args.format or default_export_format()
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+    try:
+        # Calibrate on one render of a short book, then predict a second render
+        history = RunHistory(os.path.join(workdir, 'runs.jsonl'))
+        reader = offline_reader(history=history, encoding={'format': fmt})
+        for name, size_kb in (('calibrate', 10), ('predict', 20)):
+            path = os.path.join(workdir, f"{name}.txt")
+            write_synthetic_novel(path, size_kb * 1024, seed=size_kb)
+        with contextlib.redirect_stdout(io.StringIO()):
+            reader.process_file(os.path.join(workdir, 'calibrate.txt'), os.path.join(workdir, f"calibrate.{fmt}"))
+            reader.estimate_file(os.path.join(workdir, 'predict.txt'))
+            predicted = reader.last_estimate
+            reader.process_file(os.path.join(workdir, 'predict.txt'), os.path.join(workdir, f"predict.{fmt}"))
+        actual = history.load()[-1]
+        results['accuracy'] = {'requests': actual['requests'], 'predicted_requests': predicted['requests'],
+                               'speech_ms': actual['speech_ms'], 'predicted_speech_ms': predicted['speech_ms']}
+
+        print("\nEstimate benchmark (fake TTS, calibrated by one earlier render)")
+        print(f"{'':>10} {'predicted':>12} {'actual':>12}")
+        print(f"{'requests':>10} {predicted['requests']:>12} {actual['requests']:>12}")
+        print(f"{'speech s':>10} {predicted['speech_ms'] / 1000:>12.1f} {actual['speech_ms'] / 1000:>12.1f}")
+
+        print(f"\n{'size':>8} {'segments':>9} {'estimate ms':>12}")
+        for size_mb in args.sizes:
+            path = os.path.join(workdir, f"novel-{size_mb}.txt")
+            write_synthetic_novel(path, int(size_mb * 1024 * 1024))
+            reader = offline_reader()
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, seconds = timed(reader.estimate_file, path)
+            segments = reader.last_stats['total']
+            results[size_label(size_mb)] = {'segments': segments, 'estimate_ms': seconds * 1000}
+            print(f"{size_label(size_mb):>8} {segments:>9} {seconds * 1000:>12.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_stream_parse(args):
+    """Time to first segment and peak memory: read() + parse_text vs lazy parser"""
+    reader = offline_reader()
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    def eager(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return reader.parse_text(f.read())[0]
+
+    def lazy(path):
+        return next(reader.iter_file_segments(path))
+
+    def lazy_full(path):
+        for _ in reader.iter_file_segments(path):
+            pass
+
+    print("\nStreaming parse benchmark")
+    print(f"{'size':>8} {'path':>14} {'first seg ms':>13} {'peak MB':>10}")
+    try:
+        for size_mb in args.sizes:
+            label = size_label(size_mb)
+            path = os.path.join(workdir, f"novel-{label}.txt")
+            write_synthetic_novel(path, int(size_mb * 1024 ** 2))
+            for name, func in (('read+parse', eager), ('lazy', lazy), ('lazy (all)', lazy_full)):
+                elapsed, peak = measure(func, path)
+                results[f"{label}/{name}"] = {'seconds': elapsed, 'peak_mb': peak / 1024 ** 2}
+                print(f"{label:>8} {name:>14} {elapsed * 1000:>13.1f} {peak / 1024 ** 2:>10.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def legacy_parse_text(reader, text):
+    """The old parse_text: a dict per paragraph with its own text and speaker strings"""
+    segments = []
+    for para in text.replace('\r\n', '\n').replace('\r', '\n').split('\n\n'):
+        para = para.strip()
+        if not para:
+            continue
+        if reader.is_dialogue(para):
+            segments.append({'type': 'dialogue', 'speaker': reader.extract_speaker(para),
+                             'text': reader.extract_dialogue_text(para), 'original': para})
+        else:
+            segments.append({'type': 'narrative', 'speaker': 'narrator', 'text': para, 'original': para})
+    return segments
+
+
+def retained(func, *args):
+    """Run func and return (result, bytes of traced memory still held afterwards)"""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current
+
+
+def bench_segments(args):
+    """Memory held per parsed segment: per-paragraph dicts vs the compact SegmentStore"""
+    reader = offline_reader()
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    def from_file(path):
+        store = SegmentStore()
+        for _ in reader.iter_file_segments(path, store):
+            pass
+        return store
+
+    print("\nSegment memory benchmark (memory held after parsing, including the text)")
+    print(f"{'size':>8} {'layout':>12} {'segments':>9} {'bytes/seg':>10} {'x source':>9}")
+    try:
+        for size_mb in args.sizes:
+            label = size_label(size_mb)
+            path = os.path.join(workdir, f"novel-{label}.txt")
+            write_synthetic_novel(path, int(size_mb * 1024 ** 2))
+            source_bytes = os.path.getsize(path)
+
+            def legacy(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return legacy_parse_text(reader, f.read())
+
+            def compact(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return reader.parse_text(f.read())
+
+            for name, func in (('dicts', legacy), ('store', compact), ('store (lazy)', from_file)):
+                segments, held = retained(func, path)
+                per_segment = held / max(1, len(segments))
+                results[f"{label}/{name}"] = {'segments': len(segments), 'bytes_per_segment': per_segment,
+                                              'source_multiple': held / source_bytes}
+                print(f"{label:>8} {name:>12} {len(segments):>9} {per_segment:>10.0f} "
+                      f"{held / source_bytes:>9.2f}")
+                del segments
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+LEGACY_SPEAKER_PATTERNS = [
+    r'"[^"]*,"\s*(\w+)\s+said',
+    r'(\w+)\s+said,?\s*"',
+    r'"[^"]*"\s*(\w+)\s+replied',
+    r'(\w+)\s+replied,?\s*"',
+    r'"[^"]*,"\s*(\w+)\s+asked',
+    r'(\w+)\s+asked,?\s*"',
+    r'"[^"]*,"\s*(\w+)\s+whispered',
+    r'(\w+)\s+whispered,?\s*"',
+]
+
+
+def legacy_extract_speaker(text):
+    """The original eight-regex, four-verb speaker lookup"""
+    for pattern in LEGACY_SPEAKER_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).lower()
+    return 'unknown'
+
+
+def bench_attribution(args):
+    """Speaker attribution throughput in dialogue paragraphs per second"""
+    reader = offline_reader()
+    paragraphs = [p for p in synthetic_paragraphs(count=20000) if reader.is_dialogue(p)]
+
+    engines = [
+        ('legacy (4 verbs)', legacy_extract_speaker),
+        (f"engine ({len(reader.speaker_attributor.verbs)} verbs)", reader.extract_speaker),
+        ('engine (4 verbs)', SpeakerAttributor(['said', 'replied', 'asked', 'whispered']).extract),
+    ]
+    results = {}
+    print(f"\nSpeaker attribution benchmark ({len(paragraphs)} dialogue paragraphs)")
+    print(f"{'engine':>22} {'paragraphs/s':>14}")
+    for name, extract in engines:
+        start = time.perf_counter()
+        for paragraph in paragraphs:
+            extract(paragraph)
+        rate = len(paragraphs) / (time.perf_counter() - start)
+        results[name] = {'paragraphs_per_s': rate}
+        print(f"{name:>22} {rate:>14.0f}")
+    return results
+
+
+def bench_voices(args):
+    """Per-character voice assignment cost with a large name lexicon"""
+    names = synthetic_names(args.lexicon_size)
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    try:
+        path = os.path.join(workdir, 'names.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, name in enumerate(names):
+                f.write(f"{name},{'female' if i % 2 else 'male'}\n")
+
+        lexicon = NameLexicon(path)
+        _, load_time = timed(lexicon.ensure_loaded)
+        cast = [f"{name} {i}" for i, name in enumerate(names[::max(1, len(names) // args.cast_size)])]
+
+        reader = offline_reader(name_lexicon=lexicon)
+        start = time.perf_counter()
+        for character in cast:
+            reader.assign_google_voice(character)
+        indexed = (time.perf_counter() - start) / len(cast)
+
+        # The old approach: substring scan over every known name
+        female = names[1::2]
+        male = names[::2]
+        sample = cast[:200]
+        start = time.perf_counter()
+        for character in sample:
+            char_lower = character.lower()
+            if not any(name in char_lower for name in female):
+                any(name in char_lower for name in male)
+        scanned = (time.perf_counter() - start) / len(sample)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nVoice assignment benchmark ({len(names)} names, cast of {len(cast)})")
+    print(f"  lexicon load:     {load_time * 1000:.1f} ms (once per process)")
+    print(f"  indexed lookup:   {indexed * 1e6:.2f} us/character")
+    print(f"  substring scan:   {scanned * 1e6:.2f} us/character")
+    return {'load_ms': load_time * 1000, 'indexed_us': indexed * 1e6, 'substring_us': scanned * 1e6}
+
+
+def decode_via_tempfile(mp3_data):
+    """The original path: temp file on disk plus a fresh ffmpeg per segment"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
+        temp_file.write(mp3_data)
+    try:
+        return AudioSegment.from_mp3(temp_file.name)
+    finally:
+        os.unlink(temp_file.name)
+
+
+def sample_mp3(args):
+    """MP3 bytes from --mp3, or a tone encoded with ffmpeg; None if neither"""
+    if args.mp3:
+        with open(args.mp3, 'rb') as f:
+            return f.read()
+    if have_ffmpeg():
+        buffer = io.BytesIO()
+        synthetic_clips(count=1, seconds=4.0)[0].export(buffer, format='mp3')
+        return buffer.getvalue()
+    return None
+
+
+class MockTTSServer(http.server.ThreadingHTTPServer):
+    """Local stand-in for the Google TTS endpoint, answering every request with one MP3"""
+
+    daemon_threads = True
+
+    def __init__(self, mp3_data=b'mp3 bytes', delay=0.0, certfile=None, statuses=()):
+        payload = base64.b64encode(mp3_data).decode('ascii')
+        self.body = (')]}\'\n\n[["wrb.fr","jQ1olc","[\\"' + payload +
+                     '\\"]",null,null,null,"generic"]]\n').encode('utf-8')
+        self.delay = delay
+        # HTTP statuses to answer the first requests with, before 200s
+        self.statuses = list(statuses)
+        self.connections = 0
+        self.requests = 0
+        self.bodies = []
+        super().__init__(('127.0.0.1', 0), MockTTSHandler)
+        self.scheme = 'http'
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            self.scheme = 'https'
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"{self.scheme}://127.0.0.1:{self.server_address[1]}"
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+
+class MockTTSHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def do_POST(self):
+        self.server.bodies.append(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = self.server.body if status == 200 else b'error'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnpooledTTSBackend(GoogleTTSBackend):
+    """A fresh session, and so a fresh connection, for every segment, as plain gTTS does"""
+
+    def session(self):
+        return requests.Session()
+
+
+def self_signed_cert(workdir):
+    """Certificate + key for 127.0.0.1 made with the openssl CLI, or None"""
+    if not shutil.which('openssl'):
+        return None
+    path = os.path.join(workdir, 'mock.pem')
+    result = subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+         '-keyout', path, '-out', path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return path if result.returncode == 0 else None
+
+
+def bench_http(args):
+    """Per-request latency against a mock endpoint: fresh connections vs the shared pool"""
+    mp3_data = sample_mp3(args) or os.urandom(6 * 1024)
+    voice = {'lang': 'en', 'tld': 'com', 'slow': False}
+    text = "The rain had not stopped for three days, and the river was rising."
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    # A local mock over plain HTTP and, where openssl can make a certificate,
+    # HTTPS too, since the TLS handshake is most of what pooling saves
+    endpoints = []
+    if args.endpoint:
+        endpoints.append(('custom', args.endpoint, None))
+    else:
+        endpoints.append(('http', None, None))
+        certfile = self_signed_cert(workdir)
+        if certfile:
+            endpoints.append(('https', None, certfile))
+
+    print(f"\nHTTP benchmark ({args.repeat} requests per client)")
+    print(f"{'endpoint':>9} {'client':>8} {'ms/request':>11} {'connections':>12}")
+    saved_bundle = os.environ.get('REQUESTS_CA_BUNDLE')
+    try:
+        for label, endpoint, certfile in endpoints:
+            server = None
+            if endpoint is None:
+                server = MockTTSServer(mp3_data, certfile=certfile)
+                endpoint = server.url
+                if certfile:
+                    os.environ['REQUESTS_CA_BUNDLE'] = certfile
+            try:
+                for name, backend_class in (('fresh', UnpooledTTSBackend), ('pooled', GoogleTTSBackend)):
+                    backend = backend_class(endpoint=endpoint)
+                    before = server.connections if server else 0
+                    ms = per_call(lambda: b''.join(backend.fetch(text, voice)), repeat=args.repeat)
+                    connections = (server.connections - before) if server else None
+                    results[f"{label}/{name}"] = {'ms': ms, 'connections': connections}
+                    shown = connections if connections is not None else '-'
+                    print(f"{label:>9} {name:>8} {ms:>11.2f} {shown:>12}")
+            finally:
+                if server is not None:
+                    server.shutdown()
+                    server.server_close()
+    finally:
+        if saved_bundle is None:
+            os.environ.pop('REQUESTS_CA_BUNDLE', None)
+        else:
+            os.environ['REQUESTS_CA_BUNDLE'] = saved_bundle
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_effects(args):
+    """Character effects on a book's worth of segments: pydub against NumPy"""
+    clips = synthetic_clips()
+    # Mostly narration, as in a typical novel, plus a richer custom profile
+    profiles = [DEFAULT_VOICE_EFFECTS['narrator']] * 6 + [
+        {}, DEFAULT_VOICE_EFFECTS['elderly'], DEFAULT_VOICE_EFFECTS['child'],
+    ]
+    custom = {'pitch': 2, 'treble_db': 3, 'gain_db': -1}
+    have_numpy = EffectsProcessor().backend == 'numpy'
+    backends = ['pydub'] + (['numpy'] if have_numpy else [])
+    results = {}
+
+    def run(processor, effects_list):
+        # Include the conversion to the export layout: pydub's speed effect
+        # only relabels the sample rate and leaves the resampling to the encoder
+        for i in range(args.segments):
+            audio = processor.apply(clips[i % len(clips)], effects_list[i % len(effects_list)])
+            if audio.frame_rate != EXPORT_FRAME_RATE:
+                audio.set_frame_rate(EXPORT_FRAME_RATE)
+
+    print(f"\nEffects benchmark ({args.segments} segments)")
+    print(f"{'profiles':>10} {'backend':>8} {'seconds':>9} {'segments/s':>11}")
+    for name, effects_list in (('default', profiles), ('custom', [custom])):
+        for backend in backends:
+            if name == 'custom' and backend == 'pydub':
+                continue  # pydub has no pitch or EQ
+            processor = EffectsProcessor()
+            processor.backend = backend
+            _, seconds = timed(run, processor, effects_list)
+            rate = args.segments / seconds if seconds else 0.0
+            results[f"{name}/{backend}"] = {'seconds': seconds, 'segments_per_s': rate}
+            print(f"{name:>10} {backend:>8} {seconds:>9.3f} {rate:>11.0f}")
+    if not have_numpy:
+        print("(install numpy to compare the NumPy effects engine)")
+    return results
+
+
+def bench_coalesce(args):
+    """TTS requests per book with and without request coalescing"""
+    from gtts import gTTS
+
+    tokenizer = gTTS('x')
+    text = '\n\n'.join(synthetic_paragraphs(seed=3, count=args.synth_segments))
+    results = {}
+
+    print(f"\nCoalescing benchmark ({args.synth_segments} paragraphs)")
+    print(f"{'mode':>6} {'segments':>9} {'requests':>9} {'chars/req':>10} {'plan ms':>9}")
+    for mode in ('off', 'on'):
+        reader = offline_reader(coalesce=(mode == 'on'))
+        segments = reader.parse_text(text)
+        requests, seconds = timed(lambda: list(reader.plan_requests(segments)))
+        if mode == 'off':
+            # gTTS splits each uncoalesced segment itself, at every sentence
+            # and comma, and sends one HTTP request per piece
+            pieces = [piece for request in requests for piece in tokenizer._tokenize(request['text'])
+                      if request['text']]
+        else:
+            pieces = [request['text'] for request in requests if request['text']]
+        chars = sum(len(piece) for piece in pieces) / max(1, len(pieces))
+        results[mode] = {'segments': len(segments), 'requests': len(pieces),
+                         'chars_per_request': chars, 'plan_ms': seconds * 1000}
+        print(f"{mode:>6} {len(segments):>9} {len(pieces):>9} {chars:>10.1f} {seconds * 1000:>9.1f}")
+    return results
+
+
+def bench_decode(args):
+    """Per-segment MP3 decode overhead: tempfile + ffmpeg vs in-memory decoder"""
+    mp3_data = sample_mp3(args)
+    if mp3_data is None:
+        print("\nDecode benchmark skipped: needs ffmpeg or --mp3 SAMPLE.mp3")
+        return None
+
+    decoder = Mp3Decoder()
+    results = {}
+    print(f"\nDecode benchmark ({len(mp3_data) / 1024:.0f} KB MP3, {args.repeat} runs)")
+    print(f"{'path':>24} {'ms/segment':>12}")
+    if have_ffmpeg():
+        results['tempfile'] = {'ms': per_call(decode_via_tempfile, mp3_data, repeat=args.repeat)}
+        print(f"{'tempfile + from_mp3':>24} {results['tempfile']['ms']:>12.2f}")
+    results['in-memory'] = {'ms': per_call(decoder.decode, mp3_data, repeat=args.repeat),
+                            'backend': decoder.backend}
+    print(f"{'in-memory (' + decoder.backend + ')':>24} {results['in-memory']['ms']:>12.2f}")
+    return results
+
+
+def bench_join(args):
+    """Frame-level assembly time for a long book split into chapter parts"""
+    mp3_data = sample_mp3(args)
+    if mp3_data is None:
+        print("\nJoin benchmark skipped: needs ffmpeg or --mp3 SAMPLE.mp3")
+        return None
+
+    seconds = Mp3Decoder().decode(mp3_data).duration_seconds
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    try:
+        sample_path = os.path.join(workdir, 'sample.mp3')
+        with open(sample_path, 'wb') as f:
+            f.write(mp3_data)
+        with open(sample_path, 'rb') as f:
+            start, end = mp3_audio_span(f)
+        frames = mp3_data[start:end]
+
+        # Build chapter parts by repeating the sample's audio frames
+        chapters = 24
+        repeats = max(1, int(args.hours * 3600 / chapters / seconds))
+        part_paths = []
+        for number in range(chapters):
+            part_path = os.path.join(workdir, f"chapter-{number:03d}.mp3")
+            with open(part_path, 'wb') as f:
+                f.write(frames * repeats)
+            part_paths.append(part_path)
+
+        output_path = os.path.join(workdir, 'book.mp3')
+        _, elapsed = timed(join_mp3_files, part_paths, output_path)
+        size = os.path.getsize(output_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    hours = chapters * repeats * seconds / 3600
+    print(f"\nJoin benchmark ({chapters} chapters, {hours:.1f} h of audio)")
+    print(f"  joined {size / 1024 ** 2:.0f} MB in {elapsed:.2f}s")
+    return {'hours': hours, 'mb': size / 1024 ** 2, 'seconds': elapsed}
+
+
+def bench_watch(args):
+    """Save-to-updated-output time for a one-paragraph edit, against chapter size"""
+    if not have_ffmpeg():
+        print("\nWatch benchmark skipped: patching MP3 output needs ffmpeg")
+        return None
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    print("\nWatch benchmark (fake TTS with 50 ms request latency, one paragraph edited)")
+    print(f"{'chapter':>8} {'segments':>9} {'full export s':>14} {'watch start s':>14} {'edit s':>8}")
+    try:
+        for size_kb in (10, 40, 80):
+            path = os.path.join(workdir, f"chapter-{size_kb}.txt")
+            output = os.path.join(workdir, f"chapter-{size_kb}.mp3")
+            write_synthetic_novel(path, size_kb * 1024)
+            # The latency stands in for the network round trip of each request
+            reader = NovelReader(use_google_tts=True, cache=None, tts_backend=FakeTTSBackend(latency=0.05))
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, full = timed(reader.process_file, path, os.path.join(workdir, 'full.mp3'))
+                keys, start = timed(reader.apply_edit, path, None, output)
+                with open(path, 'r', encoding='utf-8') as f:
+                    paragraphs = f.read().split('\n\n')
+                middle = len(paragraphs) // 2
+                paragraphs[middle] = 'Somewhere a door closed, and the house fell quiet again.'
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write('\n\n'.join(paragraphs))
+                _, edit = timed(reader.apply_edit, path, keys, output)
+
+            results[f"{size_kb}KB"] = {'segments': len(keys), 'full_seconds': full,
+                                       'start_seconds': start, 'edit_seconds': edit}
+            print(f"{size_kb:>6}KB {len(keys):>9} {full:>14.2f} {start:>14.2f} {edit:>8.3f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def parse_to_chapter(reader, path, chapter):
+    """First segment of a chapter found by parsing every segment before it"""
+    headings = 0
+    for segment in reader.iter_file_segments(path):
+        if segment['type'] == 'narrative' and segment['text'].startswith('Chapter '):
+            headings += 1
+            if headings == chapter:
+                return segment
+
+
+def seek_to_chapter(reader, path, chapter):
+    """First segment of a chapter found the way --start-at does"""
+    offset, _, _ = reader.find_start(path, f"chapter {chapter}")
+    return next(iter(reader.iter_file_segments(path, start=offset)))
+
+
+def bench_seek(args):
+    """Time to the first segment of the last chapter, --start-at scan vs a full parse"""
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    results = {}
+
+    print("\nSeek benchmark (--start-at the last chapter, voices assigned on the way)")
+    print(f"{'size':>8} {'chapters':>9} {'parse ms':>10} {'seek ms':>10} {'speedup':>8}")
+    try:
+        for size_mb in args.sizes:
+            path = os.path.join(workdir, f"novel-{size_mb}.txt")
+            write_synthetic_novel(path, int(size_mb * 1024 * 1024))
+            with open(path, 'r', encoding='utf-8') as f:
+                chapters = sum(line.startswith('Chapter ') for line in f)
+
+            timings = []
+            for locate in (parse_to_chapter, seek_to_chapter):
+                # A fresh reader each time, so both meet every speaker
+                reader = offline_reader()
+                segment, seconds = timed(locate, reader, path, chapters)
+                assert segment['text'] == f"Chapter {chapters}"
+                timings.append(seconds * 1000)
+
+            parse_ms, seek_ms = timings
+            results[size_label(size_mb)] = {'chapters': chapters, 'parse_ms': parse_ms, 'seek_ms': seek_ms}
+            print(f"{size_label(size_mb):>8} {chapters:>9} {parse_ms:>10.1f} {seek_ms:>10.1f} "
+                  f"{parse_ms / seek_ms:>7.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# What every command imported before the audio stack was loaded lazily
+EAGER_IMPORTS = ('pyttsx3', 'gtts', 'pydub', 'pydub.playback', 'requests', 'numpy', 'miniaudio')
+
+# --preview and --list-voices should spend at most this fraction of the
+# eager-import startup cost beyond the bare interpreter
+STARTUP_TARGET = 1 / 3
+
+
+def run_command(command, cwd=None):
+    """Wall time of a subprocess in milliseconds, output discarded"""
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return 1000.0 * (time.perf_counter() - start)
+
+
+def median_ms(command, repeat, cwd=None):
+    run_command(command, cwd)  # warm up, which also writes the bytecode cache
+    times = sorted(run_command(command, cwd) for _ in range(repeat))
+    return times[len(times) // 2]
+
+
+def heavy_imports(command, cwd=None):
+    """The EAGER_IMPORTS modules a command actually loads, via -X importtime"""
+    result = subprocess.run([command[0], '-X', 'importtime'] + command[1:], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    loaded = {line.rsplit('|', 1)[-1].strip() for line in result.stderr.splitlines()}
+    return [name for name in EAGER_IMPORTS if name in loaded]
+
+
+def cli_command(argv, preload=()):
+    """Run main() as the installed console script does, from cached bytecode,
+    optionally importing preload modules first"""
+    imports = ', '.join(('sys', 'novelreader') + tuple(preload))
+    return [sys.executable, '-c', f"import {imports}; sys.exit(novelreader.main())"] + argv
+
+
+def bench_startup(args):
+    """CLI startup for --preview and --list-voices, lazy imports vs the old eager ones"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    path = os.path.join(workdir, 'novel.txt')
+    write_synthetic_novel(path, 10 * 1024)
+    installed = [name for name in EAGER_IMPORTS if importlib.util.find_spec(name.split('.')[0])]
+    repeat = max(3, args.repeat // 2)
+    results = {}
+
+    print(f"\nStartup benchmark (median of {repeat} runs, target <= {STARTUP_TARGET:.2f}x "
+          f"eager time beyond the interpreter)")
+    print(f"{'command':>14} {'eager ms':>9} {'lazy ms':>8} {'ratio':>6} {'target':>7}  heavy imports")
+    try:
+        interpreter = median_ms([sys.executable, '-c', 'pass'], repeat)
+        results['interpreter'] = {'ms': interpreter}
+        print(f"{'(interpreter)':>14} {'':>9} {interpreter:>8.1f}")
+        for name, argv in (('--list-voices', ['--list-voices']),
+                           ('--preview', ['--file', path, '--preview'])):
+            # The eager variant first does the old top-level imports
+            eager_ms = median_ms(cli_command(argv, installed), repeat, here)
+            lazy_ms = median_ms(cli_command(argv), repeat, here)
+            ratio = (lazy_ms - interpreter) / max(1e-9, eager_ms - interpreter)
+            loaded = heavy_imports(cli_command(argv), here)
+            results[name.lstrip('-')] = {'eager_ms': eager_ms, 'lazy_ms': lazy_ms, 'ratio': ratio}
+            status = 'met' if ratio <= STARTUP_TARGET else 'missed'
+            print(f"{name:>14} {eager_ms:>9.1f} {lazy_ms:>8.1f} {ratio:>6.2f} {status:>7}  "
+                  f"{', '.join(loaded) or 'none'}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_daemon(args):
+    """Repeat runs on a chapter: cold CLI runs vs the same commands sent to a warm daemon"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix='novelreader-bench-')
+    path = os.path.join(workdir, 'chapter.txt')
+    socket_path = os.path.join(workdir, 'daemon.sock')
+    write_synthetic_novel(path, 20 * 1024)
+    repeat = max(3, args.repeat // 2)
+    argv = ['--file', path, '--preview', '--tts-backend', 'fake', '--socket', socket_path]
+    jobs = [('preview', argv)]
+    # CLI exports are MP3, which needs ffmpeg
+    if have_ffmpeg():
+        jobs.append(('render', argv[:2] + ['--output', os.path.join(workdir, 'chapter.mp3')] + argv[3:]))
+    results = {}
+
+    parser = build_parser()
+    daemon = ReaderDaemon(parser, socket_path)
+    daemon.reader_for(parser.parse_args(argv))
+    daemon.listen()
+    server = threading.Thread(target=daemon.server.serve_forever, daemon=True)
+    server.start()
+
+    def in_process(job_argv):
+        with daemon.stdout.redirect(io.StringIO()), daemon.stderr.redirect(io.StringIO()):
+            return run_in_daemon(socket_path, job_argv)
+
+    # The console script starts in the thin client, which reaches the
+    # daemon without importing novelreader at all
+    def client_command(job_argv):
+        return [sys.executable, '-c', "import sys, novelreader_client; sys.exit(novelreader_client.main())"] + job_argv
+
+    print(f"\nDaemon benchmark (20 KB chapter, median of {repeat} runs)")
+    print(f"{'job':>8} {'path':>18} {'ms':>8}")
+    try:
+        for job, job_argv in jobs:
+            rows = (
+                ('cold CLI', lambda: median_ms(cli_command(job_argv + ['--no-daemon']), repeat, here)),
+                ('CLI via daemon', lambda: median_ms(client_command(job_argv), repeat, here)),
+                ('daemon round trip', lambda: per_call(in_process, job_argv, repeat=repeat)),
+            )
+            for name, run in rows:
+                ms = run()
+                results[f"{job}/{name.replace(' ', '_')}"] = {'ms': ms}
+                print(f"{job:>8} {name:>18} {ms:>8.1f}")
+        if len(jobs) == 1:
+            print("(install ffmpeg to also compare MP3 renders)")
+    finally:
+        daemon.server.shutdown()
+        daemon.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+BENCHMARKS = {
+    'attribution': bench_attribution,
+    'coalesce': bench_coalesce,
+    'codecs': bench_codecs,
+    'daemon': bench_daemon,
+    'decode': bench_decode,
+    'effects': bench_effects,
+    'estimate': bench_estimate,
+    'export': bench_export,
+    'http': bench_http,
+    'join': bench_join,
+    'pipeline': bench_pipeline,
+    'seek': bench_seek,
+    'segments': bench_segments,
+    'startup': bench_startup,
+    'stream-parse': bench_stream_parse,
+    'voices': bench_voices,
+    'watch': bench_watch,
+}
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1.0}} -> {'a/b': 1.0}, numeric leaves only"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(results, baseline_path):
+    """Print every metric next to its value in an earlier results file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = flatten(json.load(f).get('results', {}))
+    current = flatten(results)
+
+    print(f"\nComparison with {baseline_path}")
+    print(f"{'metric':<48} {'before':>12} {'after':>12} {'change':>8}")
+    for metric in sorted(current):
+        if metric not in baseline:
+            continue
+        before, after = baseline[metric], current[metric]
+        change = f"{100.0 * (after - before) / before:+.0f}%" if before else 'n/a'
+        print(f"{metric:<48} {before:>12.4g} {after:>12.4g} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NovelReader CLI benchmarks")
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"Benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    parser.add_argument('--sizes', type=float, nargs='+', default=[0.01, 1, 8],
+                        help='Synthetic manuscript sizes in MB, 0.01 (10 KB) to 100 (default: 0.01 1 8)')
+    parser.add_argument('--synth-segments', type=int, default=200,
+                        help='Segments synthesized per size in the pipeline benchmark (default: 200)')
+    parser.add_argument('--segments', type=int, default=400,
+                        help='Segments in the synthetic book for the export benchmark (default: 400)')
+    parser.add_argument('--lexicon-size', type=int, default=50000,
+                        help='Names in the synthetic lexicon for the voices benchmark (default: 50000)')
+    parser.add_argument('--cast-size', type=int, default=5000,
+                        help='Characters to assign voices to in the voices benchmark (default: 5000)')
+    parser.add_argument('--mp3',
+                        help='Sample MP3 (e.g. a saved gTTS response) for the decode and join benchmarks')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Iterations for per-call benchmarks (default: 20)')
+    parser.add_argument('--hours', type=float, default=12,
+                        help='Audiobook length for the join benchmark (default: 12)')
+    parser.add_argument('--endpoint',
+                        help='TTS endpoint for the http benchmark (default: a local mock server)')
+    parser.add_argument('--format',
+                        help='Export format (default: mp3 if ffmpeg is installed, else wav)')
+    parser.add_argument('--json',
+                        help='Save results to this JSON file')
+    parser.add_argument('--compare',
+                        help='Earlier --json results to compare against')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    results = {}
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        result = BENCHMARKS[name](args)
+        if result is not None:
+            results[name] = result
+
+    if args.json:
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'argv': sys.argv[1:],
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to: {args.json}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
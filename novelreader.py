@@ -5,30 +5,2056 @@ with Google TTS Integration
 """
 
 import argparse
+import array
+import base64
+import bisect
+import codecs
+import contextlib
+import contextvars
+import copy
+import difflib
+import functools
+import glob
+import importlib.util
+import mmap
 import re
-import pyttsx3
 import os
 import json
 import time
-import tempfile
 import io
+import hashlib
+import math
+import zlib
+import queue
+import random
+import shutil
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Mapping, Sequence
 from pathlib import Path
-from gtts import gTTS
-from pydub import AudioSegment
-from pydub.playback import play
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+from novelreader_client import STDOUT_PATH, default_cache_dir, default_socket_path, run_in_daemon
+
+# The audio and network stack (pydub, gTTS, requests, pyttsx3, miniaudio and
+# the optional numpy) is imported by the code that uses it, so
+# --preview and --list-voices start without loading any of it
+
+
+def have_module(name):
+    """Whether an optional dependency is installed, without importing it"""
+    return importlib.util.find_spec(name) is not None
+
+
+# The two used all over the module load through these on first use
+def _pydub():
+    """The pydub module, for AudioSegment"""
+    import pydub
+    return pydub
+
+
+def _play(audio):
+    """Play audio through pydub's default player"""
+    from pydub.playback import play
+    play(audio)
+
+
+def _numpy():
+    """The numpy module, for the vectorized character effects"""
+    import numpy
+    return numpy
+
+
+# Silence inserted between consecutive segments in exported audio
+SEGMENT_PAUSE_MS = 800
+
+# Segments --preview shows before it stops reading
+PREVIEW_SEGMENTS = 3
+
+# Pause between segments during live playback, in seconds
+PLAYBACK_PAUSE = 0.3
+
+# How often --watch checks the manuscript for changes, and how long a
+# change must hold still before it counts as saved, in seconds
+WATCH_INTERVAL = 0.5
+WATCH_SETTLE = 0.1
+
+# Manuscripts at least this large are memory-mapped rather than read
+MMAP_THRESHOLD = 8 * 1024 ** 2
+PARSE_CHUNK_SIZE = 1024 ** 2
+
+# gTTS sends text up to this long as a single request and splits anything
+# longer, so coalesced requests are packed up to this size
+GTTS_MAX_CHARS = 100
+
+# Sentence boundaries used when packing text into requests, and clause
+# boundaries for sentences too long for one request
+SENTENCE_BREAK = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\')\]]))\s+')
+CLAUSE_BREAK = re.compile(r'(?<=[,;:—])\s+')
+
+# Text ending on a full sentence, the only place a coalesced request
+# moves on to the next segment
+SENTENCE_END = re.compile(r'[.!?…]["\')\]]?$')
+
+# Quiet stretches used to split coalesced audio back into segments. The
+# pauses taken for the request's sentence breaks must each last this much
+# longer than any other pause, or the audio is not cut at all
+PAUSE_FRAME_MS = 10
+PAUSE_MIN_MS = 30
+PAUSE_MARGIN = 1.5
+
+# Paragraphs that open a new chapter: a numbered chapter, part or book
+# ("Chapter 12", "Part IV: The Storm", "Book One") or a prologue, epilogue
+# and the like standing alone or with a short title. Headings are short, so
+# a longer paragraph that happens to open with "Part 2" does not count
+CHAPTER_NUMBER = (r'(?:\d+|m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})(?<!\s)'
+                  r'|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen'
+                  r'|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty)')
+CHAPTER_HEADING = re.compile(
+    rf'^(?:(?:chapter|part|book)\s+{CHAPTER_NUMBER}\b'
+    r'|(?:prologue|epilogue|interlude|foreword|afterword)\s*(?:[:.\-–—]\s*\S.{0,78})?$)',
+    re.IGNORECASE
+)
+CHAPTER_HEADING_MAX_CHARS = 120
+# The words a heading can open with, to pass over raw paragraphs without decoding them
+CHAPTER_HEADING_START = re.compile(rb'(?:chapter|part|book|prologue|epilogue|interlude|foreword|afterword)\b',
+                                   re.IGNORECASE)
+
+# gTTS returns 24 kHz mono MP3s, so stream exports at that PCM layout
+EXPORT_FRAME_RATE = 24000
+EXPORT_CHANNELS = 1
+EXPORT_SAMPLE_WIDTH = 2
+
+# Output codecs for --format: the ffmpeg muxer and encoder, and whether
+# --bitrate applies. Batch outputs are named with the format as extension
+OUTPUT_FORMATS = {
+    'mp3': {'muxer': 'mp3', 'codec': 'libmp3lame', 'lossy': True},
+    'opus': {'muxer': 'opus', 'codec': 'libopus', 'lossy': True},    # Opus in an Ogg container
+    'ogg': {'muxer': 'ogg', 'codec': 'libvorbis', 'lossy': True},
+    'flac': {'muxer': 'flac', 'codec': 'flac', 'lossy': False},
+    'wav': {'muxer': 'wav', 'codec': 'pcm_s16le', 'lossy': False},
+    'pcm': {'muxer': 's16le', 'codec': 'pcm_s16le', 'lossy': False},  # Headerless 16-bit samples
+}
+
+# Codec settings; None keeps ffmpeg's default bitrate and the PCM layout above
+DEFAULT_ENCODING = {'format': 'mp3', 'bitrate': None, 'sample_rate': None, 'channels': None}
+
+# --estimate figures used until past renders calibrate them: speech per
+# character (about 14 characters a second) and wall time per TTS request
+# or, for system TTS, per second of speech, for one worker
+ESTIMATE_MS_PER_CHAR = 65
+ESTIMATE_REQUEST_SECONDS = 0.5
+ESTIMATE_RENDER_RATIO = 0.2
+# Roughly how much longer gTTS's slow voices take over the same text
+GTTS_SLOW_FACTOR = 1.25
+# The synthesis cache rereads its directory after writing this fraction of
+# its cap, to see what other processes sharing it have added
+CACHE_RESCAN_FRACTION = 16
+
+# Past renders kept in <cache dir>/runs.jsonl, and how many calibrate an estimate
+HISTORY_RUNS = 50
+ESTIMATE_RUNS = 10
+
+
+class Profiler:
+    """Per-stage wall-clock timings, summarized or exported as a Chrome trace"""
+
+    # Disabled profilers hand out this one reusable no-op context
+    NULL_STAGE = contextlib.nullcontext()
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.samples = defaultdict(list)
+        self.events = []
+
+    def stage(self, name):
+        """Context manager timing one occurrence of a stage"""
+        if not self.enabled:
+            return self.NULL_STAGE
+        return ProfiledStage(self, name)
+
+    def record(self, name, start, end):
+        with self.lock:
+            self.samples[name].append(end - start)
+            self.events.append({
+                'name': name,
+                'cat': 'novelreader',
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+
+    @staticmethod
+    def percentile(values, fraction):
+        """Nearest-rank percentile of an already sorted list"""
+        index = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+        return values[index]
+
+    def print_summary(self):
+        """Print total, p50 and p95 per stage, slowest total first"""
+        if not self.samples:
+            return
+        print("\nProfile (per-segment stage timings):")
+        print(f"  {'stage':<12} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        rows = sorted(self.samples.items(), key=lambda item: sum(item[1]), reverse=True)
+        for name, durations in rows:
+            ordered = sorted(durations)
+            print(f"  {name:<12} {len(ordered):>7} {sum(ordered):>9.2f} "
+                  f"{self.percentile(ordered, 0.5) * 1000:>9.1f} {self.percentile(ordered, 0.95) * 1000:>9.1f}")
+
+    def write_trace(self, path):
+        """Write a Chrome trace-event file (chrome://tracing, Perfetto)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+class ProfiledStage:
+    """Times a with-block and records it on its Profiler"""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path across processes, where the platform has flock"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a+b') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SynthesisCache:
+    """On-disk LRU cache of decoded, effect-processed segment audio"""
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir or default_cache_dir())
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries, self.total_bytes = self.scan()
+        # Bytes this process has written since it last looked at the directory
+        self.unscanned_bytes = 0
+
+    def scan(self):
+        """Entries on disk, least recently used first, and their total size"""
+        # mtime doubles as the access time
+        entries = []
+        for path in self.cache_dir.glob('*.wav'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        entries = OrderedDict((key, size) for _, key, size in entries)
+        return entries, sum(entries.values())
+
+    @staticmethod
+    def make_key(text, voice_config, effects, source=None):
+        """Content address for a segment: text + resolved voice + effects (+ where it was synthesized)"""
+        fields = {
+            'text': text,
+            'lang': voice_config['lang'],
+            'tld': voice_config['tld'],
+            'slow': voice_config['slow'],
+            'effects': effects,
+        }
+        # Google at its usual endpoint has no source, so existing entries stay valid
+        if source is not None:
+            fields['source'] = source
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.wav"
+
+    def __contains__(self, key):
+        """Whether key is cached, by this process or another sharing the directory"""
+        with self.lock:
+            if key in self.entries:
+                return True
+        return self._path(key).exists()
+
+    def get(self, key):
+        """Return the cached AudioSegment for key, or None on a miss"""
+        path = self._path(key)
+        with self.lock:
+            # Another process sharing the directory may have added it since the last scan
+            if key not in self.entries and not path.exists():
+                self.misses += 1
+                return None
+
+        try:
+            audio = _pydub().AudioSegment.from_wav(str(path))
+            os.utime(path)
+            size = path.stat().st_size
+        except (OSError, EOFError, ValueError):
+            # Entry vanished or is corrupt - forget it and resynthesize
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.hits += 1
+        return audio
+
+    def put(self, key, audio):
+        """Store audio under key, evicting least recently used entries"""
+        path = self._path(key)
+        temp_path = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            audio.export(str(temp_path), format="wav")
+            os.replace(temp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            print(f"Cache write failed: {e}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return
+
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.unscanned_bytes += size
+            # Other processes, e.g. batch workers, fill the same directory, so
+            # this process's running total undercounts; reread the directory
+            # before evicting and every so often on the way to the cap
+            if self.total_bytes > self.max_bytes or self.unscanned_bytes * CACHE_RESCAN_FRACTION > self.max_bytes:
+                with file_lock(self.cache_dir / '.lock'):
+                    self.entries, self.total_bytes = self.scan()
+                    self.unscanned_bytes = 0
+                    self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its cap"""
+        # Callers hold self.lock and the directory's file lock
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def summary(self):
+        """One-line hit/miss report"""
+        lookups = self.hits + self.misses
+        rate = (100.0 * self.hits / lookups) if lookups else 0.0
+        return (f"Cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+                f"{len(self.entries)} entries, {self.total_bytes / 1024 ** 2:.1f} MB")
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at most `rate` per second"""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def acquire(self):
+        """Block until the caller may issue its next request"""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def file_stamp(path):
+    """(mtime, size) of path, or None while it is missing, e.g. mid-save"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def normalize_newlines(text):
+    """Convert Windows (CRLF) and old Mac (CR) line endings to LF"""
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def iter_text_chunks(f, chunk_size=PARSE_CHUNK_SIZE):
+    """Yield decoded text from a binary file from its current position, memory-mapping large inputs"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    size = os.fstat(f.fileno()).st_size
+    if size >= MMAP_THRESHOLD:
+        # Slicing the map only copies one chunk at a time into the heap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(f.tell(), size, chunk_size):
+                yield decoder.decode(mapped[offset:offset + chunk_size])
+    else:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_paragraphs(file_path, chunk_size=PARSE_CHUNK_SIZE, start=0):
+    """Lazily yield the blank-line separated paragraphs of a text file, from byte offset start"""
+    # Open eagerly so a missing or unreadable file fails at the call site
+    f = open(file_path, 'rb')
+    f.seek(start)
+
+    def paragraphs():
+        with f:
+            pending = ''
+            for chunk in iter_text_chunks(f, chunk_size):
+                # Hold back a trailing \r in case its \n starts the next chunk
+                chunk = pending + chunk
+                if chunk.endswith('\r'):
+                    chunk, carry = chunk[:-1], '\r'
+                else:
+                    carry = ''
+                pending = normalize_newlines(chunk)
+
+                # Everything before the last paragraph break is complete
+                parts = pending.split('\n\n')
+                pending = parts.pop()
+                yield from parts
+                pending += carry
+            if pending:
+                yield normalize_newlines(pending)
+
+    return paragraphs()
+
+
+# A paragraph break in raw bytes: two line endings of any style in a row,
+# matching what normalize_newlines and a split on blank lines would find
+PARAGRAPH_BREAK = re.compile(rb'(?:\r\n?|\n)(?:\r\n?|\n)')
+# Without carriage returns a literal does the same, and is found far faster
+LF_PARAGRAPH_BREAK = re.compile(rb'\n\n')
+DIALOGUE_QUOTE = re.compile(rb'"[^"]*"')
+# The first quoted passage of a paragraph, which makes it dialogue
+DIALOGUE = re.compile(r'"([^"]*)"')
+
+
+def parse_start_at(spec):
+    """('segment', n), ('chapter', n) or ('text', words) for a --start-at value"""
+    spec = spec.strip()
+    if spec.isdigit():
+        return 'segment', int(spec)
+    match = re.fullmatch(r'(?:chapter|ch)[\s:]*(\d+)', spec, re.IGNORECASE)
+    if match:
+        return 'chapter', int(match.group(1))
+    if not spec:
+        raise ValueError("--start-at needs a segment number, chapter or text to search for")
+    return 'text', spec
+
+
+def iter_raw_paragraphs(data):
+    """Yield (byte offset, raw bytes) for each paragraph of an encoded text"""
+    position = 0
+    pattern = PARAGRAPH_BREAK if data.find(b'\r') != -1 else LF_PARAGRAPH_BREAK
+    for match in pattern.finditer(data):
+        yield position, data[position:match.start()]
+        position = match.end()
+    yield position, data[position:]
+
+
+# Paragraphs appended one at a time are joined into blocks of this many, so
+# the store holds a few large strings rather than one per paragraph
+SEGMENT_BLOCK_PARAGRAPHS = 256
+
+SEGMENT_TYPES = ('narrative', 'dialogue')
+
+# Streaming parses start a fresh store this often, so segments the caller
+# has finished with can be freed
+STREAM_STORE_SEGMENTS = 1024
+
+
+class SegmentStore(Sequence):
+    """Compact, append-only sequence of segments: offsets into the source text and interned speakers"""
+
+    def __init__(self):
+        # Source text, as a few large blocks addressed by a global offset
+        self.blocks = []
+        self.block_starts = []
+        self.size = 0
+        self.unmerged = 0  # Blocks added since the last merge
+        
+        # One entry per segment: the paragraph, the spoken part of it,
+        # the segment type and the speaker
+        self.starts = array.array('q')
+        self.ends = array.array('q')
+        self.text_starts = array.array('q')
+        self.text_ends = array.array('q')
+        self.kinds = array.array('b')
+        self.speaker_ids = array.array('l')
+        self.speakers = []
+        self.speaker_index = {}
+
+    def add_text(self, text):
+        """Append source text, returning the offset it starts at"""
+        start = self.size
+        self.blocks.append(text)
+        self.block_starts.append(start)
+        self.size += len(text)
+        self.unmerged += 1
+        if self.unmerged >= SEGMENT_BLOCK_PARAGRAPHS:
+            self.merge_blocks()
+        return start
+
+    def merge_blocks(self):
+        """Join the blocks added since the last merge into one string"""
+        count = self.unmerged
+        if count > 1:
+            self.blocks[-count:] = [''.join(self.blocks[-count:])]
+            del self.block_starts[-count + 1:]
+        self.unmerged = 0
+
+    def source(self, start, end):
+        """Text between two global offsets, which always lie in the same block"""
+        if len(self.blocks) == 1:
+            return self.blocks[0][start:end]
+        block = bisect.bisect_right(self.block_starts, start) - 1
+        offset = self.block_starts[block]
+        return self.blocks[block][start - offset:end - offset]
+
+    def speaker_id(self, speaker):
+        """Small integer for a speaker name, shared by all their segments"""
+        speaker_id = self.speaker_index.get(speaker)
+        if speaker_id is None:
+            speaker_id = self.speaker_index[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+        return speaker_id
+
+    def append(self, kind, speaker, start, end, text_start, text_end):
+        """Record a segment by offsets into the source text and return its view"""
+        self.starts.append(start)
+        self.ends.append(end)
+        self.text_starts.append(text_start)
+        self.text_ends.append(text_end)
+        self.kinds.append(SEGMENT_TYPES.index(kind))
+        self.speaker_ids.append(self.speaker_id(speaker))
+        return Segment(self, len(self.kinds) - 1)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Segment(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('segment index out of range')
+        return Segment(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Segment(self, index)
+
+
+class Segment(Mapping):
+    """Read-only dict-style view of one stored segment: type, speaker, text, original"""
+
+    __slots__ = ('store', 'index', 'text')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+        self.text = None  # Sliced from the store on first use
+
+    def __getitem__(self, key):
+        store, index = self.store, self.index
+        if key == 'text':
+            if self.text is None:
+                self.text = store.source(store.text_starts[index], store.text_ends[index])
+            return self.text
+        if key == 'speaker':
+            return store.speakers[store.speaker_ids[index]]
+        if key == 'type':
+            return SEGMENT_TYPES[store.kinds[index]]
+        if key == 'original':
+            return store.source(store.starts[index], store.ends[index])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('type', 'speaker', 'text', 'original'))
+
+    def __len__(self):
+        return 4
+
+    def __repr__(self):
+        return f"Segment({dict(self)!r})"
+
+
+# Verbs that attribute dialogue to a speaker ("...," John muttered)
+DEFAULT_SPEECH_VERBS = (
+    'said', 'says', 'replied', 'asked', 'whispered', 'muttered', 'shouted',
+    'called', 'called out', 'called back', 'yelled', 'cried', 'cried out',
+    'screamed', 'exclaimed', 'answered', 'added', 'continued', 'explained',
+    'insisted', 'murmured', 'mumbled', 'stammered', 'stuttered', 'snapped',
+    'growled', 'hissed', 'barked', 'roared', 'bellowed', 'sighed', 'laughed',
+    'chuckled', 'giggled', 'sobbed', 'wailed', 'whimpered', 'groaned',
+    'moaned', 'grumbled', 'grunted', 'breathed', 'gasped', 'panted',
+    'declared', 'announced', 'stated', 'remarked', 'observed', 'noted',
+    'commented', 'suggested', 'offered', 'agreed', 'argued', 'protested',
+    'objected', 'countered', 'retorted', 'responded', 'demanded', 'ordered',
+    'commanded', 'pleaded', 'begged', 'urged', 'warned', 'cautioned',
+    'admitted', 'confessed', 'conceded', 'promised', 'swore', 'teased',
+    'joked', 'quipped', 'mocked', 'sneered', 'scoffed', 'spat', 'shrieked',
+    'squealed', 'howled', 'thundered', 'boomed', 'rasped', 'croaked',
+    'drawled', 'purred', 'crooned', 'sang', 'chirped', 'piped up', 'spoke up',
+    'cut in', 'interrupted', 'interjected', 'began', 'finished', 'concluded',
+    'repeated', 'echoed', 'corrected', 'confirmed', 'inquired', 'enquired',
+    'wondered', 'queried', 'prompted', 'reminded', 'assured', 'reassured',
+    'soothed', 'consoled', 'lied', 'blurted', 'blurted out', 'shot back',
+    'fired back', 'whispered back', 'snarled', 'snorted', 'huffed', 'grated',
+    'intoned', 'recited', 'chanted', 'stormed', 'raged', 'fumed', 'gushed',
+    'babbled', 'rambled', 'jeered', 'taunted', 'scolded', 'chided',
+    'lectured', 'pressed', 'persisted', 'ventured', 'hazarded', 'guessed',
+)
+
+
+def verb_alternation(verbs):
+    """Build a prefix-factored regex alternation matching any of verbs"""
+    # A trie-shaped pattern lets the regex engine reject a word after its
+    # first few characters instead of trying every verb in turn
+    trie = {}
+    for verb in verbs:
+        node = trie
+        for char in verb.lower():
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        terminal = '' in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(atom + build(node[char]))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            body = f"(?:{body})?"
+        return body
+
+    return '(?:' + build(trie) + ')'
+
+
+def load_speech_verbs(path):
+    """Read extra speech verbs from a file, one per line (# comments allowed)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+class SpeakerAttributor:
+    """Find the speaker of a dialogue paragraph in a single regex scan"""
+
+    def __init__(self, verbs=DEFAULT_SPEECH_VERBS):
+        self.verbs = tuple(dict.fromkeys(' '.join(verb.lower().split()) for verb in verbs if verb.strip()))
+        # Compiling takes a noticeable slice of startup, so wait for the first dialogue
+        self.pattern = None
+
+    def compile(self):
+        """The speaker pattern for this attributor's verbs"""
+        verb = verb_alternation(self.verbs)
+        return re.compile(
+            rf'"[^"]*"\s*(\w+)\s+{verb}\b'    # "Hello," John said
+            rf'|\b(\w+)\s+{verb},?\s*"',      # John said, "Hello"
+            re.IGNORECASE
+        )
+
+    def extract(self, text):
+        """Return the lower-cased speaker name, or 'unknown'"""
+        if self.pattern is None:
+            self.pattern = self.compile()
+        match = self.pattern.search(text)
+        if match:
+            return (match.group(1) or match.group(2)).lower()
+        return 'unknown'
+
+
+# Built-in name hints; --names-file extends these with a full lexicon
+DEFAULT_NAME_CATEGORIES = {
+    'female': (
+        'sarah', 'anna', 'emma', 'lisa', 'maria', 'jane', 'kate', 'lucy', 'amy',
+        'mary', 'elizabeth', 'olivia', 'sophia', 'grace', 'alice', 'clara',
+        'emily', 'hannah', 'rachel', 'laura', 'helen', 'claire', 'rose', 'ellen',
+        'julia', 'susan', 'margaret', 'catherine', 'samantha', 'charlotte',
+    ),
+    'male': (
+        'john', 'david', 'mike', 'james', 'robert', 'tom', 'alex', 'sam', 'ben',
+        'william', 'henry', 'thomas', 'charles', 'george', 'edward', 'peter',
+        'paul', 'mark', 'daniel', 'michael', 'richard', 'joseph', 'jack',
+        'harry', 'oliver', 'samuel', 'arthur', 'frank', 'luke', 'adam',
+    ),
+}
+
+
+class NameLexicon:
+    """Hashed name -> voice category index, loaded on first lookup"""
+
+    # One instance per lexicon file, shared by every reader in the process
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path
+        self.index = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path=None):
+        """Return the process-wide lexicon for path (None: built-ins only)"""
+        key = os.path.abspath(path) if path else None
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(path)
+            return cls._shared[key]
+
+    def load(self):
+        """Build the index from the built-in hints plus the lexicon file"""
+        index = {
+            name: category
+            for category, names in DEFAULT_NAME_CATEGORIES.items()
+            for name in names
+        }
+        if self.path:
+            # One "name,category" or "name<TAB>category" entry per line
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    fields = re.split(r'[\t,]', line, maxsplit=1)
+                    if len(fields) == 2 and fields[0].strip() and fields[1].strip():
+                        index[fields[0].strip().lower()] = fields[1].strip().lower()
+        return index
+
+    def ensure_loaded(self):
+        if self.index is None:
+            with self.lock:
+                if self.index is None:
+                    self.index = self.load()
+        return self.index
+
+    def category(self, character):
+        """Voice category for the first known word of a character name"""
+        index = self.ensure_loaded()
+        # Whole-word lookups, so 'sam' no longer matches 'samantha'
+        for token in re.findall(r"[^\W\d_]+(?:'[^\W\d_]+)?", character.lower()):
+            category = index.get(token)
+            if category is not None:
+                return category
+        return None
+
+    def __len__(self):
+        return len(self.ensure_loaded())
+
+
+def parse_wav_pcm(data):
+    """Split WAV bytes into (pcm, frame_rate, channels, sample_width)"""
+    # ffmpeg cannot seek back to patch sizes when writing to a pipe, so
+    # take everything after the data chunk header rather than trusting it
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = int.from_bytes(data[pos + 4:pos + 8], 'little')
+        if chunk_id == b'fmt ':
+            channels = int.from_bytes(data[pos + 10:pos + 12], 'little')
+            frame_rate = int.from_bytes(data[pos + 12:pos + 16], 'little')
+            bits = int.from_bytes(data[pos + 22:pos + 24], 'little')
+            fmt = (frame_rate, channels, bits // 8)
+        elif chunk_id == b'data':
+            if fmt is None:
+                break
+            return (data[pos + 8:],) + fmt
+        pos += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("Decoder produced no WAV audio")
+
+
+class Mp3Decoder:
+    """Decode MP3 bytes to an AudioSegment entirely in memory"""
+
+    def __init__(self):
+        # miniaudio (a requirement) decodes in-process, so one decoder serves
+        # every segment without spawning anything; ffmpeg, one process per
+        # segment, is only a fallback for platforms without a miniaudio wheel
+        self.backend = 'miniaudio' if have_module('miniaudio') else 'ffmpeg'
+        self.warned = False
+
+    def decode(self, data):
+        """Return the decoded AudioSegment for an MP3 byte string"""
+        if self.backend == 'miniaudio':
+            import miniaudio
+            decoded = miniaudio.mp3_read_s16(bytes(data))
+            return _pydub().AudioSegment(
+                data=decoded.samples.tobytes(),
+                sample_width=2,
+                frame_rate=decoded.sample_rate,
+                channels=decoded.nchannels
+            )
+
+        if not self.warned:
+            self.warned = True
+            print("⚠️  miniaudio is not installed; decoding each segment with ffmpeg (pip install miniaudio)")
+        command = [
+            _pydub().AudioSegment.converter, '-loglevel', 'error',
+            '-f', 'mp3', '-i', 'pipe:0',
+            '-f', 'wav', '-acodec', 'pcm_s16le', 'pipe:1',
+        ]
+        result = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"Decoding failed: {result.stderr.decode(errors='replace').strip()}")
+        pcm, frame_rate, channels, sample_width = parse_wav_pcm(result.stdout)
+        return _pydub().AudioSegment(data=pcm, sample_width=sample_width, frame_rate=frame_rate, channels=channels)
+
+
+# Layer III bitrates (kbps) and sample rates by MPEG version
+MP3_BITRATES = {
+    'mpeg1': (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    'mpeg2': (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# Samples every Layer III decoder outputs before the encoded audio begins
+MP3_DECODER_DELAY = 529
+
+
+def mp3_frame_length(header):
+    """Byte length of the Layer III frame starting with a 4-byte header, or 0"""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return 0
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+    padding = (header[2] >> 1) & 0x01
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        return 144000 * MP3_BITRATES['mpeg1'][bitrate_index] // sample_rate + padding
+    return 72000 * MP3_BITRATES['mpeg2'][bitrate_index] // sample_rate + padding
+
+
+def is_mp3_info_frame(frame):
+    """True for the Xing/Info/VBRI header frame encoders put before the audio"""
+    version = (frame[1] >> 3) & 0x03
+    mono = (frame[3] >> 6) == 3
+    if version == 3:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    tag = frame[4 + side_info:8 + side_info]
+    return tag in (b'Xing', b'Info') or frame[36:40] == b'VBRI'
+
+
+def mp3_audio_span(f):
+    """Return (start, end) offsets of the audio frames in an MP3 file"""
+    size = os.fstat(f.fileno()).st_size
+    start = 0
+
+    # Leading ID3v2 tag: 10-byte header with a synchsafe size (+ optional footer)
+    f.seek(0)
+    header = f.read(10)
+    if header[:3] == b'ID3' and len(header) == 10:
+        tag_size = 0
+        for byte in header[6:10]:
+            tag_size = (tag_size << 7) | (byte & 0x7F)
+        start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+    # Resync to the first frame, then drop it if it only carries VBR info
+    f.seek(start)
+    probe = f.read(64 * 1024)
+    for offset in range(len(probe) - 3):
+        length = mp3_frame_length(probe[offset:offset + 4])
+        if length:
+            start += offset
+            if is_mp3_info_frame(probe[offset:offset + length]):
+                start += length
+            break
+
+    # Trailing ID3v1 tag
+    end = size
+    if end - start >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b'TAG':
+            end -= 128
+    return start, end
+
+
+def mp3_start_delay_ms(path):
+    """How far into an MP3 file its audio starts once joined with others, from its LAME tag"""
+    with open(path, 'rb') as f:
+        start, _ = mp3_audio_span(f)
+        # The info frame, if any, is the frame just before the audio
+        f.seek(0)
+        head = f.read(start)
+    tag = max(head.rfind(b'Xing'), head.rfind(b'Info'))
+    frame = head.rfind(b'\xff', 0, tag) if tag != -1 else -1
+    if frame == -1 or not mp3_frame_length(head[frame:frame + 4]):
+        return 0.0
+    flags = int.from_bytes(head[tag + 4:tag + 8], 'big')
+    # Frame count, byte count, seek table and quality come first when present;
+    # the LAME extension then holds a 12-bit delay 21 bytes in
+    position = tag + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    gap = head[position + 21:position + 23]
+    if len(gap) < 2:
+        return 0.0
+    version = (head[frame + 1] >> 3) & 0x03
+    sample_rate = MP3_SAMPLE_RATES[version][(head[frame + 2] >> 2) & 0x03]
+    # Decoders skip the encoder's delay and their own only when they see
+    # the tag, which a frame-wise join leaves out
+    return (((gap[0] << 4) | (gap[1] >> 4)) + MP3_DECODER_DELAY) * 1000 / sample_rate
+
+
+def mp3_piece_span(path):
+    """(audio start, duration) in ms, (audio size, audio start) in bytes and the frame
+    length in ms of an MP3 file about to be joined frame-wise with others"""
+    delay = mp3_start_delay_ms(path)
+    frames = list(iter_mp3_frames(path))
+    if not frames:
+        return delay, 0.0, 0, 0, 0.0
+    with open(path, 'rb') as f:
+        start, end = mp3_audio_span(f)
+    elapsed = 0.0
+    delay_byte = frames[-1][0]
+    for position, duration in frames:
+        if delay < elapsed + duration:
+            delay_byte = position
+            break
+        elapsed += duration
+    return delay, sum(duration for _, duration in frames), end - start, delay_byte - start, frames[0][1]
+
+
+def join_mp3_files(part_paths, output_path):
+    """Concatenate MP3 files frame-wise, without decoding or re-encoding"""
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as out:
+        for part_path in part_paths:
+            with open(part_path, 'rb') as part:
+                start, end = mp3_audio_span(part)
+                part.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    block = part.read(min(remaining, 4 * 1024 ** 2))
+                    if not block:
+                        break
+                    out.write(block)
+                    remaining -= len(block)
+    os.replace(temp_path, output_path)
+
+
+def iter_mp3_frames(path):
+    """Yield (byte offset, duration in ms) for each audio frame of an MP3 file"""
+    with open(path, 'rb') as f:
+        start, end = mp3_audio_span(f)
+        if start >= end:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = start
+            while position < end:
+                header = mapped[position:position + 4]
+                length = mp3_frame_length(header)
+                if not length:
+                    position += 1  # Resync past anything that is not a frame
+                    continue
+                version = (header[1] >> 3) & 0x03
+                sample_rate = MP3_SAMPLE_RATES[version][(header[2] >> 2) & 0x03]
+                # Layer III frames hold 1152 samples in MPEG-1, 576 in MPEG-2/2.5
+                yield position, (1152000 if version == 3 else 576000) / sample_rate
+                position += length
+
+
+def mp3_duration_ms(path):
+    """Playing time of an MP3 file, from its frame headers"""
+    return sum(duration for _, duration in iter_mp3_frames(path))
+
+
+def format_for_path(path):
+    """The --format an output path's extension names, or None"""
+    extension = Path(str(path or '')).suffix.lower().lstrip('.')
+    return extension if extension in OUTPUT_FORMATS else None
+
+
+def seek_offsets(path, format, times_ms, frame_rate=EXPORT_FRAME_RATE, channels=EXPORT_CHANNELS):
+    """Byte offset in an encoded file of the audio playing at each of the sorted times_ms"""
+    # Only WAV, raw PCM and MP3 have offsets that follow from the file itself
+    if format == 'pcm':
+        frame_size = channels * EXPORT_SAMPLE_WIDTH
+        return [int(ms * frame_rate / 1000) * frame_size for ms in times_ms]
+    if format == 'wav':
+        with wave.open(str(path), 'rb') as wav:
+            frame_size = wav.getsampwidth() * wav.getnchannels()
+            frame_rate = wav.getframerate()
+            data_start = os.path.getsize(path) - wav.getnframes() * frame_size
+        return [data_start + int(ms * frame_rate / 1000) * frame_size for ms in times_ms]
+    if format != 'mp3':
+        return [None] * len(times_ms)
+    
+    offsets = []
+    elapsed = 0.0
+    last = None
+    for position, duration in iter_mp3_frames(path):
+        while len(offsets) < len(times_ms) and times_ms[len(offsets)] < elapsed + duration:
+            offsets.append(position)
+        if len(offsets) == len(times_ms):
+            break
+        elapsed += duration
+        last = position
+    # Anything past the last frame seeks to the last frame
+    return offsets + [last] * (len(times_ms) - len(offsets))
+
+
+def paragraph_offsets(file_path, start=0):
+    """Byte offset of each non-blank paragraph of a text file from start, as --start-at counts them"""
+    with open(file_path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return [start + offset for offset, raw in iter_raw_paragraphs(data[start:]) if raw.strip()]
+
+
+def write_seek_index(output_path, format, segments, entries, first_segment=1, first_chapter=0,
+                     frame_rate=EXPORT_FRAME_RATE, channels=EXPORT_CHANNELS, offsets=None,
+                     source=None, voices=()):
+    """Write <output>.index.json mapping segments and chapters to time and byte offsets"""
+    # entries are (index into segments, start ms) for each segment in the output;
+    # frame_rate and channels give the layout of raw PCM output. Callers that
+    # already know the byte offsets pass them rather than have the file scanned
+    if offsets is None:
+        offsets = seek_offsets(output_path, format, [start_ms for _, start_ms in entries],
+                               frame_rate, channels)
+    # source is (text file, byte it was parsed from, its stamp then) and voices
+    # (speaker, voice name) in the order voices were assigned; with both,
+    # --start-at can seek from the index instead of scanning the text
+    sources = []
+    if source is not None and file_stamp(source[0]) == source[2]:
+        sources = paragraph_offsets(source[0], source[1])
+        if len(sources) != len(segments):
+            sources = []
+    placed = {n: (start_ms, byte) for (n, start_ms), byte in zip(entries, offsets)}
+    rows = []
+    chapters = []
+    chapter = first_chapter
+    first_lines = {}
+    # Count headings even for segments that failed, so numbers match the text
+    for n, segment in enumerate(segments):
+        heading = segment['type'] == 'narrative' and is_chapter_heading(segment['text'])
+        chapter += heading
+        number = first_segment + n
+        first_lines.setdefault(segment['speaker'], number)
+        if n not in placed:
+            continue
+        start_ms, byte = placed[n]
+        source_byte = sources[n] if sources else None
+        if heading:
+            chapters.append({'chapter': chapter, 'title': segment['text'][:80], 'segment': number,
+                             'start_ms': round(start_ms), 'byte': byte, 'source': source_byte})
+        rows.append([number, round(start_ms), byte, chapter, source_byte])
+    
+    index = {
+        'version': 2,
+        'output': os.path.basename(str(output_path)),
+        'format': format,
+        'segment_fields': ['segment', 'start_ms', 'byte', 'chapter', 'source'],
+        'segments': rows,
+        'chapters': chapters,
+    }
+    if sources:
+        index['source'] = {'file': os.path.basename(str(source[0])), 'stamp': list(source[2]),
+                           'first_segment': first_segment, 'last_segment': first_segment + len(segments) - 1}
+        # Speakers first heard before the range were met by a --start-at scan
+        index['voices'] = [[speaker, name, first_lines.get(speaker, 0)] for speaker, name in voices]
+    index_path = f"{output_path}.index.json"
+    temp_path = f"{index_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(temp_path, index_path)
+    return index_path
+
+
+def split_sentences(text, max_chars=GTTS_MAX_CHARS):
+    """Break text into pieces of at most max_chars, at sentence ends where possible"""
+    pieces = []
+    for sentence in SENTENCE_BREAK.split(text.strip()):
+        while len(sentence) > max_chars:
+            # Over-long sentences break at the last clause, or failing
+            # that the last space, that fits
+            clauses = [m.end() for m in CLAUSE_BREAK.finditer(sentence, 0, max_chars + 1)]
+            cut = clauses[-1] if clauses else sentence.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+@functools.lru_cache(maxsize=None)
+def _gtts_splitter():
+    """A gTTS instance to split text with, exactly as a request for it would be, or None"""
+    if not have_module('gtts'):
+        return None
+    from gtts import gTTS
+    from gtts.tokenizer import symbols
+    
+    # gTTS's default pre-processors run a regex per symbol, recompiled on
+    # every call; these are the same substitutions in one regex apiece:
+    # a space after tone marks, end-of-line hyphens joined, the period
+    # after abbreviations dropped and word substitutions
+    widths = defaultdict(list)
+    for abbreviation in symbols.ABBREVIATIONS:
+        widths[len(abbreviation)].append(re.escape(abbreviation))
+    # Matching the period first spares trying the lookbehinds everywhere
+    abbreviated = re.compile(r'\.(?:' + '|'.join(f"(?<=(?:{'|'.join(words)})\\.)" for words in widths.values()) + ')',
+                             re.IGNORECASE)
+    tone_marks = re.compile(f"([{re.escape(symbols.TONE_MARKS)}])")
+    substitutions = {pattern.lower(): replacement for pattern, replacement in symbols.SUB_PAIRS}
+    substituted = re.compile('|'.join(re.escape(pattern) for pattern, _ in symbols.SUB_PAIRS), re.IGNORECASE)
+    
+    def pre_process(text):
+        text = tone_marks.sub(r'\1 ', text).replace('-\n', '')
+        text = abbreviated.sub('', text)
+        return substituted.sub(lambda match: substitutions[match.group().lower()], text)
+    
+    return gTTS('-', lang_check=False, pre_processor_funcs=[pre_process])
+
+
+def gtts_request_count(text):
+    """How many HTTP requests gTTS sends for text: one per piece it splits it into"""
+    if len(text.strip()) <= GTTS_MAX_CHARS:
+        return 1
+    # Over the limit gTTS cuts at every comma and sentence end, not only
+    # where it must; without it, sentence ends are a lower bound
+    splitter = _gtts_splitter()
+    pieces = splitter._tokenize(text) if splitter else split_sentences(text)
+    return max(1, len(pieces))
+
+
+def find_pauses(audio):
+    """(start, end) in ms of each quiet stretch between sounds, in order"""
+    threshold = audio.rms / 8  # About 18 dB below the average level
+    pauses = []
+    run_start = None
+    heard = False
+    # Silence before the first sound or after the last is not a pause
+    for position in range(0, len(audio), PAUSE_FRAME_MS):
+        if audio[position:position + PAUSE_FRAME_MS].rms <= threshold:
+            if run_start is None and heard:
+                run_start = position
+            continue
+        if run_start is not None and position - run_start >= PAUSE_MIN_MS:
+            pauses.append((run_start, position))
+        run_start = None
+        heard = True
+    return pauses
+
+
+def is_chapter_heading(text):
+    """Whether a stripped narrative paragraph is a chapter heading"""
+    return len(text) <= CHAPTER_HEADING_MAX_CHARS and CHAPTER_HEADING.match(text) is not None
+
+
+def split_chapters(segments):
+    """Group segments into chapters, each starting at a chapter heading"""
+    chapters = []
+    for segment in segments:
+        heading = segment['type'] == 'narrative' and is_chapter_heading(segment['text'])
+        if heading or not chapters:
+            chapters.append([])
+        chapters[-1].append(segment)
+    return chapters
+
+
+# Character effects per voice profile; --voice-effects adds to or overrides these
+DEFAULT_VOICE_EFFECTS = {
+    'narrator': {'speed': 0.95},  # Slightly lower pitch, slower
+    'elderly': {'gain_db': -2},   # Slightly quieter
+    'child': {'gain_db': 1},      # Slightly louder
+}
+
+# speed: resample, so pitch and pace change together (0.95 = 5% lower and slower)
+# pitch: semitones up or down at the same pace
+# tempo: pace multiplier at the same pitch
+# gain_db, bass_db, treble_db: overall level and low/high shelf EQ
+EFFECT_NAMES = ('speed', 'pitch', 'tempo', 'gain_db', 'bass_db', 'treble_db')
+
+# Corner frequencies of the bass and treble shelves
+BASS_SHELF_HZ = 250
+TREBLE_SHELF_HZ = 4000
+
+# Window length for tempo changes that keep the pitch, how far each window
+# may move from its nominal position to line up with the audio before it,
+# and the sample stride that alignment search runs at
+STRETCH_FRAME_MS = 40
+STRETCH_TOLERANCE_MS = 10
+STRETCH_SEARCH_STEP = 2
+
+
+def load_voice_effects(path):
+    """Read per-voice effects from a JSON file of {voice: {effect: value}}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("expected an object mapping voice names to effects")
+    
+    profiles = {}
+    for voice, effects in data.items():
+        if not isinstance(effects, dict):
+            raise ValueError(f"effects for '{voice}' must be an object")
+        unknown = sorted(set(effects) - set(EFFECT_NAMES))
+        if unknown:
+            raise ValueError(f"unknown effect(s) for '{voice}': {', '.join(unknown)}")
+        profiles[voice] = {name: float(value) for name, value in effects.items()}
+        for name in ('speed', 'tempo'):
+            if profiles[voice].get(name, 1.0) <= 0:
+                raise ValueError(f"{name} for '{voice}' must be positive")
+    return profiles
+
+
+class EffectsProcessor:
+    """Apply character effects to segment audio, on NumPy arrays when available"""
+
+    def __init__(self):
+        # Without numpy only speed and gain are available, through pydub
+        self.backend = 'numpy' if have_module('numpy') else 'pydub'
+        self.kernels = {}
+        self.warned = False
+
+    def apply(self, audio, effects):
+        """Return audio with the effects described by an effects dict"""
+        if not effects:
+            return audio
+        if self.backend == 'numpy':
+            return self.apply_numpy(audio, effects)
+        return self.apply_pydub(audio, effects)
+
+    def apply_pydub(self, audio, effects):
+        unsupported = [name for name in ('pitch', 'tempo', 'bass_db', 'treble_db') if effects.get(name)]
+        if unsupported and not self.warned:
+            self.warned = True
+            print(f"⚠️  Skipping {', '.join(unsupported)} effects: they need numpy (pip install numpy)")
+        
+        if effects.get('speed', 1.0) != 1.0:
+            # Relabel the sample rate: slower and lower at once
+            audio = audio._spawn(audio.raw_data, overrides={"frame_rate": int(audio.frame_rate * effects['speed'])})
+        
+        if effects.get('gain_db'):
+            audio = audio + effects['gain_db']
+        
+        return audio
+
+    def apply_numpy(self, audio, effects):
+        np = _numpy()
+        
+        if audio.sample_width != 2:
+            audio = audio.set_sample_width(2)
+        samples = np.frombuffer(audio.raw_data, dtype=np.int16).reshape(-1, audio.channels)
+        
+        gain = 10 ** (effects.get('gain_db', 0) / 20.0)
+        pitch = 2 ** (effects.get('pitch', 0) / 12.0)
+        # Resampling shifts pitch and pace together; the stretch afterwards
+        # undoes the pace change for the pitch part and applies the tempo
+        step = effects.get('speed', 1.0) * pitch
+        stretch = effects.get('tempo', 1.0) / pitch
+        
+        if step != 1.0:
+            out = self.resample(samples, step, gain)
+        else:
+            out = samples.astype(np.float32)
+            if gain != 1.0:
+                out *= gain
+        
+        if stretch != 1.0:
+            out = self.stretch(out, stretch, audio.frame_rate)
+        
+        if effects.get('bass_db') or effects.get('treble_db'):
+            out = self.equalize(out, audio.frame_rate, effects.get('bass_db', 0), effects.get('treble_db', 0))
+        
+        np.clip(out, -32768, 32767, out=out)
+        return audio._spawn(out.astype(np.int16).tobytes())
+
+    def resample_kernel(self, step, gain, frames):
+        """Gather indices and gain-scaled interpolation weights, reused across segments"""
+        kernel = self.kernels.get((step, gain))
+        if kernel is None or len(kernel[0]) < frames:
+            np = _numpy()
+            size = max(frames, 2 * len(kernel[0]) if kernel else 0)
+            positions = np.arange(size, dtype=np.float64) * step
+            index = positions.astype(np.intp)
+            fraction = (positions - index).astype(np.float32)
+            kernel = (index, (1 - fraction) * np.float32(gain), fraction * np.float32(gain))
+            self.kernels[(step, gain)] = kernel
+        return kernel
+
+    def resample(self, samples, step, gain):
+        """Linear interpolation reading step input frames per output frame"""
+        np = _numpy()
+        
+        # Stop one frame early so every read of index + 1 stays in range
+        frames = int((len(samples) - 1) / step)
+        if frames <= 0:
+            return samples.astype(np.float32) * np.float32(gain)
+        index, before, after = self.resample_kernel(step, gain, frames)
+        index = index[:frames]
+        out = samples[index] * before[:frames, None]
+        out += samples[1:][index] * after[:frames, None]
+        return out
+
+    def stretch(self, samples, tempo, frame_rate):
+        """WSOLA time stretch: tempo > 1 shortens without changing pitch"""
+        np = _numpy()
+        
+        hop = max(1, int(frame_rate * STRETCH_FRAME_MS / 2000))
+        frame = 2 * hop
+        tolerance = max(1, int(frame_rate * STRETCH_TOLERANCE_MS / 1000))
+        # Leave room to search past the last nominal frame and its continuation
+        count = int((len(samples) - frame - hop - tolerance) / (hop * tempo)) + 1
+        if count < 2:
+            return samples
+        
+        # Frames are aligned on a decimated mono signal, which is plenty to
+        # line up the pitch periods of speech
+        step = STRETCH_SEARCH_STEP
+        guide = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+        guide = np.ascontiguousarray(guide[::step])
+        reach = tolerance // step
+        span = frame // step
+        
+        # A periodic Hann window at 50% overlap sums to one
+        window = np.hanning(frame + 1)[:frame].astype(np.float32)[:, None]
+        out = np.zeros(((count + 1) * hop, samples.shape[1]), dtype=np.float32)
+        start = 0
+        for k in range(count):
+            if k:
+                # Choose the frame near its nominal position that best continues
+                # the audio already laid down: where the previous frame would
+                # have carried on, had the tempo not changed
+                follow = (start + hop) // step
+                nominal = int(k * hop * tempo) // step
+                low = max(0, nominal - reach)
+                high = min(len(guide) - span, nominal + reach)
+                score = np.correlate(guide[low:high + span], guide[follow:follow + span], mode='valid')
+                start = (low + int(np.argmax(score))) * step
+            out[k * hop:k * hop + frame] += samples[start:start + frame] * window
+        return out
+
+    def equalize(self, samples, frame_rate, bass_db, treble_db):
+        """Bass and treble shelves applied in the frequency domain"""
+        np = _numpy()
+        
+        spectrum = np.fft.rfft(samples, axis=0)
+        freqs = np.fft.rfftfreq(len(samples), 1.0 / frame_rate)
+        low = 1 / (1 + (freqs / BASS_SHELF_HZ) ** 2)
+        high = 1 - 1 / (1 + (freqs / TREBLE_SHELF_HZ) ** 2)
+        spectrum *= (10 ** ((bass_db * low + treble_db * high) / 20))[:, None]
+        return np.fft.irfft(spectrum, n=len(samples), axis=0).astype(np.float32)
+
+
+# Google Translate host that serves gTTS requests; {tld} selects the accent
+DEFAULT_TTS_ENDPOINT = 'https://translate.google.{tld}'
+TTS_RPC_PATH = '/_/TranslateWebserverUi/data/batchexecute'
+
+# Audio payload inside a batchexecute response line, as gTTS's own stream()
+# parses it; fetch() also relies on gTTS's private _prepare_requests, so
+# requirements.txt pins gTTS to the versions tested against
+TTS_AUDIO_PATTERN = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+# Connect and read timeouts for TTS requests, in seconds
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 30
+
+# Responses worth retrying: timeouts, throttling and server-side failures.
+# Anything else (a bad language, a 403 from an API change) fails the same way again
+TRANSIENT_HTTP_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def is_transient_error(error):
+    """Whether a failed TTS request may succeed if sent again"""
+    # GoogleTTSBackend marks the errors it raises
+    transient = getattr(error, 'transient', None)
+    if transient is not None:
+        return transient
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # Dropped connections and timeouts surfacing from requests, e.g. mid-body
+    requests = sys.modules.get('requests')
+    return requests is not None and isinstance(
+        error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError))
+
+
+class GoogleTTSBackend:
+    """Synthesize speech with gTTS and decode the MP3 in memory"""
+
+    name = 'google'
+
+    def __init__(self, decoder=None, profiler=None, endpoint=DEFAULT_TTS_ENDPOINT, max_connections=8,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), before_request=None):
+        self.decoder = decoder or Mp3Decoder()
+        self.profiler = profiler or Profiler()
+        # Called before every HTTP request, e.g. to wait for --rate-limit
+        self.before_request = before_request or (lambda: None)
+        self.endpoint = endpoint.rstrip('/')
+        # Audio from another endpoint, e.g. a mock, is cached apart from Google's
+        self.cache_source = None if self.endpoint == DEFAULT_TTS_ENDPOINT else self.endpoint
+        self.timeout = timeout
+        self.max_connections = max_connections
+        # One keep-alive connection pool shared by every worker thread, capped
+        # at max_connections per host; sessions themselves are per thread.
+        # Both are made on first use so requests is only imported to synthesize
+        self.adapter = None
+        self.adapter_lock = threading.Lock()
+        self.local = threading.local()
+
+    def session(self):
+        """This thread's session, sending through the shared connection pool"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            import requests
+            with self.adapter_lock:
+                if self.adapter is None:
+                    self.adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=4, pool_maxsize=self.max_connections, pool_block=True
+                    )
+            session = requests.Session()
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+            self.local.session = session
+        return session
+
+    def fetch(self, text, voice_config):
+        """Yield the MP3 bytes for text, one part per gTTS request"""
+        import requests
+        from gtts import gTTS, gTTSError
+        
+        tts = gTTS(
+            text=text,
+            lang=voice_config['lang'],
+            tld=voice_config['tld'],
+            slow=voice_config['slow']
+        )
+        url = self.endpoint.format(tld=voice_config['tld']) + TTS_RPC_PATH
+        session = self.session()
+        
+        # gTTS prepares one request per text chunk; send them over pooled
+        # connections rather than a fresh session (and handshake) each
+        for prepared in tts._prepare_requests():
+            prepared.prepare_url(url, None)
+            settings = session.merge_environment_settings(prepared.url, {}, None, None, None)
+            self.before_request()
+            try:
+                response = session.send(prepared, timeout=self.timeout, **settings)
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                error = gTTSError(tts=tts, response=response)
+                error.transient = response.status_code in TRANSIENT_HTTP_STATUSES
+                raise error
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                error = gTTSError(tts=tts)
+                error.transient = True
+                raise error
+            except requests.exceptions.RequestException:
+                # e.g. an invalid --tts-endpoint, which no retry will fix
+                error = gTTSError(tts=tts)
+                error.transient = False
+                raise error
+            
+            for line in response.iter_lines(chunk_size=1024):
+                line = line.decode('utf-8')
+                if 'jQ1olc' in line:
+                    match = TTS_AUDIO_PATTERN.search(line)
+                    if not match:
+                        error = gTTSError(tts=tts, response=response)
+                        error.transient = False
+                        raise error
+                    yield base64.b64decode(match.group(1).encode('ascii'))
+
+    def synthesize(self, text, voice_config):
+        """Return the decoded AudioSegment for text in the given voice"""
+        # Keep the MP3 in memory and decode it without touching disk
+        mp3_data = io.BytesIO()
+        parts = self.fetch(text, voice_config)
+        while True:
+            with self.profiler.stage('http'):
+                part = next(parts, None)
+            if part is None:
+                break
+            mp3_data.write(part)
+        
+        with self.profiler.stage('decode'):
+            return self.decoder.decode(mp3_data.getvalue())
+
+
+class FakeTTSBackend:
+    """Deterministic offline stand-in for Google TTS: tones sized to the text"""
+
+    name = 'fake'
+
+    def __init__(self, ms_per_char=60, latency=0.0, silent=False, frame_rate=EXPORT_FRAME_RATE,
+                 profiler=None, before_request=None):
+        self.profiler = profiler or Profiler()
+        self.before_request = before_request or (lambda: None)
+        self.cache_source = self.name
+        self.ms_per_char = ms_per_char
+        self.latency = latency
+        self.silent = silent
+        self.frame_rate = frame_rate
+        self.periods = {}
+
+    def period(self, voice_config):
+        """One cycle of 16-bit sine at a pitch derived from the voice"""
+        key = (voice_config['lang'], voice_config['tld'])
+        if key not in self.periods:
+            frequency = 140 + zlib.crc32(f"{key[0]}/{key[1]}".encode('utf-8')) % 160
+            samples = max(2, self.frame_rate // frequency)
+            self.periods[key] = array.array('h', (
+                int(6000 * math.sin(2 * math.pi * k / samples)) for k in range(samples)
+            )).tobytes()
+        return self.periods[key]
+
+    def synthesize(self, text, voice_config):
+        """Return len(text) * ms_per_char of tone (longer for slow voices), silent at punctuation"""
+        # Make the requests gTTS would, each a stand-in for a network round trip
+        with self.profiler.stage('http'):
+            for _ in range(gtts_request_count(text)):
+                self.before_request()
+                if self.latency:
+                    time.sleep(self.latency)
+        char_ms = self.ms_per_char * (1.25 if voice_config['slow'] else 1.0)
+        size = int(self.frame_rate * len(text) * char_ms / 1000) * 2
+        if self.silent:
+            data = b'\x00' * size
+        else:
+            period = self.period(voice_config)
+            data = bytearray((period * (size // len(period) + 1))[:size])
+            # Punctuation is silent, and a sentence end with the space after it,
+            # so sentences end in a longer pause than clauses like real speech
+            for match in re.finditer(r'[.!?…]+["\')\]]?\s*|[,;:]+', text):
+                start = int(self.frame_rate * match.start() * char_ms / 1000) * 2
+                end = int(self.frame_rate * match.end() * char_ms / 1000) * 2
+                data[start:end] = bytes(end - start)
+            data = bytes(data)
+        return _pydub().AudioSegment(data=data, sample_width=2, frame_rate=self.frame_rate, channels=1)
+
+
+TTS_BACKENDS = {
+    'google': GoogleTTSBackend,
+    'fake': FakeTTSBackend,
+}
+
+
+class SystemTTSRenderer:
+    """Render speech offline to audio with a pyttsx3 engine instead of speaking it"""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            import pyttsx3
+            engine = pyttsx3.init()
+        self.engine = engine
+        voices = self.engine.getProperty('voices') or []
+        # Same voice choices as live fallback playback
+        self.narrator_voice = voices[0].id if voices else None
+        self.character_voice = voices[1].id if len(voices) > 1 else self.narrator_voice
+
+    def configure(self, character):
+        """Set voice, rate and volume for a character"""
+        voice = self.narrator_voice if character == 'narrator' else self.character_voice
+        if voice:
+            self.engine.setProperty('voice', voice)
+        self.engine.setProperty('rate', 170 if character == 'narrator' else 180)
+        self.engine.setProperty('volume', 0.9)
+
+    def render(self, text, character):
+        """Return the AudioSegment for text spoken by character"""
+        self.configure(character)
+        # pyttsx3 can only render to a file, so go through a temporary WAV
+        fd, path = tempfile.mkstemp(prefix='novelreader-', suffix='.wav')
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            if not os.path.getsize(path):
+                raise RuntimeError("system TTS produced no audio")
+            return _pydub().AudioSegment.from_file(path)
+        finally:
+            os.remove(path)
+
+
+# Per-process renderer for offline render workers, built once by the pool initializer
+_system_renderer = None
+
+
+def _init_system_tts_worker():
+    global _system_renderer
+    _system_renderer = SystemTTSRenderer()
+
+
+def _render_system_segment(text, character):
+    return _system_renderer.render(text, character)
+
+
+def submit_ordered(executor, fn, items, job, max_in_flight):
+    """Run fn(*job(item)) on executor, yielding (index, item, future) in input order"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # Keep a bounded number of items in flight so finished results
+    # never pile up far ahead of the one being consumed
+    upcoming = enumerate(items)
+    pending = deque()
+    while True:
+        while len(pending) < max_in_flight:
+            entry = next(upcoming, None)
+            if entry is None:
+                break
+            i, item = entry
+            # Thread workers run in a copy of the caller's context, so a daemon
+            # job's output still reaches its client
+            if isinstance(executor, ThreadPoolExecutor):
+                future = executor.submit(contextvars.copy_context().run, fn, *job(item))
+            else:
+                future = executor.submit(fn, *job(item))
+            pending.append((i, item, future))
+        if not pending:
+            break
+        yield pending.popleft()
+
+
+def convert_layout(audio, frame_rate=EXPORT_FRAME_RATE, channels=EXPORT_CHANNELS,
+                   sample_width=EXPORT_SAMPLE_WIDTH):
+    """Return audio resampled and remixed to the given PCM layout"""
+    if audio.frame_rate != frame_rate:
+        audio = audio.set_frame_rate(frame_rate)
+    if audio.channels != channels:
+        audio = audio.set_channels(channels)
+    if audio.sample_width != sample_width:
+        audio = audio.set_sample_width(sample_width)
+    return audio
+
+
+class StreamingEncoder:
+    """Feed segment PCM into a single long-running encoder as it is produced"""
+
+    def __init__(self, output_path, format="mp3", frame_rate=EXPORT_FRAME_RATE,
+                 channels=EXPORT_CHANNELS, sample_width=EXPORT_SAMPLE_WIDTH,
+                 bitrate=None, output_rate=None, output_channels=None):
+        self.output_path = output_path
+        self.format = format
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frames_written = 0
+        self.wav = None
+        self.stream = None
+        self.process = None
+        
+        to_stdout = str(output_path) == STDOUT_PATH
+        # Resampling and remixing are left to ffmpeg, which does both in one pass
+        same_layout = output_rate in (None, frame_rate) and output_channels in (None, channels)
+        if format == "pcm" and same_layout:
+            # Raw samples in the stream's own layout need no encoder at all
+            self.stream = sys.__stdout__.buffer if to_stdout else open(output_path, 'wb')
+        elif format == "wav" and same_layout and not to_stdout:
+            # The wave module patches the header sizes on close, no ffmpeg needed
+            self.wav = wave.open(str(output_path), 'wb')
+            self.wav.setnchannels(channels)
+            self.wav.setsampwidth(sample_width)
+            self.wav.setframerate(frame_rate)
+        else:
+            spec = OUTPUT_FORMATS[format]
+            command = [
+                _pydub().AudioSegment.converter, '-y', '-loglevel', 'error',
+                '-f', f"s{8 * sample_width}le", '-ar', str(frame_rate), '-ac', str(channels),
+                '-i', 'pipe:0',
+                '-c:a', spec['codec'],
+            ]
+            if bitrate and spec['lossy']:
+                command += ['-b:a', str(bitrate)]
+            if output_rate:
+                command += ['-ar', str(output_rate)]
+            if output_channels:
+                command += ['-ac', str(output_channels)]
+            if to_stdout:
+                # Hand each packet on as it is encoded rather than in pipe-sized blocks
+                command += ['-flush_packets', '1', '-f', spec['muxer'], 'pipe:1']
+            else:
+                command += ['-f', spec['muxer'], str(output_path)]
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                            stdout=sys.__stdout__ if to_stdout else None)
+
+    def write(self, audio):
+        """Convert audio to the stream's PCM layout and append it"""
+        audio = convert_layout(audio, self.frame_rate, self.channels, self.sample_width)
+        self.write_pcm(audio.raw_data)
+
+    def write_silence(self, duration_ms):
+        """Append duration_ms of digital silence"""
+        frames = int(self.frame_rate * duration_ms / 1000.0)
+        self.write_pcm(b'\x00' * (frames * self.channels * self.sample_width))
+
+    def write_pcm(self, data):
+        """Append raw PCM already in the stream's layout"""
+        if self.wav is not None:
+            self.wav.writeframesraw(data)
+        elif self.stream is not None:
+            self.stream.write(data)
+            self.stream.flush()
+        else:
+            self.process.stdin.write(data)
+        self.frames_written += len(data) // (self.channels * self.sample_width)
+
+    @property
+    def duration_ms(self):
+        return 1000.0 * self.frames_written / self.frame_rate
+
+    def close(self):
+        """Flush the encoder and wait for the output file to be complete"""
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+        elif self.stream is not None:
+            self.close_stream()
+        elif self.process is not None:
+            self.process.stdin.close()
+            returncode = self.process.wait()
+            self.process = None
+            if returncode != 0:
+                raise RuntimeError(f"Encoder exited with status {returncode}")
+
+    def abort(self):
+        """Stop encoding without waiting for a complete file"""
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+        elif self.stream is not None:
+            self.close_stream()
+        elif self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def close_stream(self):
+        # Standard output belongs to the process, so it is only flushed
+        if self.stream is sys.__stdout__.buffer:
+            self.stream.flush()
+        else:
+            self.stream.close()
+        self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+class RenderJournal:
+    """Append-only log of rendered segment audio, so interrupted exports can resume"""
+
+    def __init__(self, work_dir, frame_rate=EXPORT_FRAME_RATE, channels=EXPORT_CHANNELS,
+                 sample_width=EXPORT_SAMPLE_WIDTH):
+        self.work_dir = Path(work_dir)
+        self.journal_path = self.work_dir / 'journal.jsonl'
+        self.audio_path = self.work_dir / 'audio.pcm'
+        self.header = {'version': 1, 'frame_rate': frame_rate, 'channels': channels,
+                       'sample_width': sample_width}
+        self.records = {}
+        self.audio_size = 0
+        self.journal = None
+        self.audio = None
+
+    def exists(self):
+        return self.journal_path.exists()
+
+    def open(self, resume=False):
+        """Open the work directory, keeping earlier segments only when resuming"""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        journal_size = self.load() if resume else 0
+        
+        if not journal_size:
+            # Start a fresh journal
+            self.records = {}
+            self.audio_size = 0
+            with open(self.journal_path, 'wb') as f:
+                f.write((json.dumps(self.header) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            journal_size = self.journal_path.stat().st_size
+        
+        # Cut off anything a crash left behind after the last complete record
+        self.journal = open(self.journal_path, 'r+b')
+        self.journal.truncate(journal_size)
+        self.journal.seek(journal_size)
+        self.audio = open(self.audio_path, 'a+b')
+        self.audio.truncate(self.audio_size)
+        return len(self.records)
+
+    def load(self):
+        """Read complete records from an earlier run; returns the valid journal size"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                lines = f.read().split(b'\n')
+            audio_size = self.audio_path.stat().st_size
+        except OSError:
+            return 0
+        
+        try:
+            if json.loads(lines[0]) != self.header:
+                return 0  # Different export layout: nothing reusable
+        except ValueError:
+            return 0
+        
+        valid = len(lines[0]) + 1
+        end = 0
+        # The last element is whatever followed the final newline
+        for line in lines[1:-1]:
+            try:
+                record = json.loads(line)
+                offset, length = record['offset'], record['length']
+            except (ValueError, KeyError, TypeError):
+                break
+            if offset + length > audio_size:
+                break  # Audio never reached the disk
+            self.records[record['key']] = (offset, length)
+            end = max(end, offset + length)
+            valid += len(line) + 1
+        
+        self.audio_size = end
+        return valid
+
+    def get(self, key):
+        """Return the journaled AudioSegment for key, or None"""
+        if key not in self.records:
+            return None
+        offset, length = self.records[key]
+        self.audio.seek(offset)
+        data = self.audio.read(length)
+        return _pydub().AudioSegment(data=data, sample_width=self.header['sample_width'],
+                            frame_rate=self.header['frame_rate'], channels=self.header['channels'])
+
+    def append(self, key, audio):
+        """Persist a segment's audio, then record it as complete"""
+        pcm = convert_layout(audio, self.header['frame_rate'], self.header['channels'],
+                             self.header['sample_width']).raw_data
+        offset = self.audio_size
+        # Audio first: a record is only written once its audio is on disk
+        self.audio.seek(offset)
+        self.audio.write(pcm)
+        self.audio.flush()
+        os.fsync(self.audio.fileno())
+        
+        record = {'key': key, 'offset': offset, 'length': len(pcm)}
+        self.journal.write((json.dumps(record) + '\n').encode('utf-8'))
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        
+        self.audio_size = offset + len(pcm)
+        self.records[key] = (offset, len(pcm))
+
+    def close(self):
+        for f in (self.journal, self.audio):
+            if f is not None:
+                f.close()
+        self.journal = self.audio = None
+
+    def remove(self):
+        """Delete the work directory once the output is complete"""
+        self.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def default_calibration():
+    """--estimate figures for a backend with no recorded runs"""
+    return {'runs': 0, 'ms_per_char': ESTIMATE_MS_PER_CHAR,
+            'request_seconds': ESTIMATE_REQUEST_SECONDS, 'render_ratio': ESTIMATE_RENDER_RATIO}
+
+
+class RunHistory:
+    """Timings of recent renders, one JSON line per run, kept to calibrate --estimate"""
+
+    def __init__(self, path, keep=HISTORY_RUNS):
+        self.path = Path(path)
+        self.keep = keep
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Recorded runs, oldest first"""
+        runs = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        run = json.loads(line)
+                    except ValueError:
+                        continue  # Torn by a process that died mid-write
+                    if isinstance(run, dict):
+                        runs.append(run)
+        except OSError:
+            return []
+        return runs
+
+    def append(self, run):
+        """Record one run, cutting the file back to the latest keep once it holds twice that"""
+        # Appending never rewrites what other processes recorded; the lock
+        # keeps their appends out of the file while it is being trimmed
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.lock, file_lock(self.path.with_name(f"{self.path.name}.lock")):
+                with open(self.path, 'a+b') as f:
+                    f.seek(0, os.SEEK_END)
+                    if f.tell():
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            f.write(b'\n')  # Keep a torn line from swallowing this run
+                    f.write(json.dumps(run).encode('utf-8') + b'\n')
+                
+                runs = self.load()
+                if len(runs) > 2 * self.keep:
+                    temp_path = self.path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.writelines(json.dumps(run) + '\n' for run in runs[-self.keep:])
+                    os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not record run timings: {e}")
+
+    def calibration(self, backend):
+        """Speech rate and render cost measured over the latest runs on backend"""
+        runs = [run for run in self.load() if run.get('backend') == backend][-ESTIMATE_RUNS:]
+        calibration = default_calibration()
+        calibration['runs'] = len(runs)
+        try:
+            weighted_chars = sum(run['weighted_chars'] for run in runs)
+            if weighted_chars:
+                calibration['ms_per_char'] = sum(run['speech_ms'] for run in runs) / weighted_chars
+            # Cost is in worker-seconds, so runs at any concurrency compare
+            per_request = [run['seconds'] * run['workers'] / run['requests'] for run in runs if run['requests']]
+            if per_request:
+                calibration['request_seconds'] = statistics.median(per_request)
+            per_speech = [run['seconds'] * run['workers'] * 1000 / run['speech_ms']
+                          for run in runs if run['speech_ms']]
+            if per_speech:
+                calibration['render_ratio'] = statistics.median(per_speech)
+        except (KeyError, TypeError, ZeroDivisionError):
+            calibration['runs'] = 0  # Written by something else; fall back to the defaults
+        return calibration
+
+
+def format_duration(seconds):
+    """Seconds as '2h 05m', '4m 10s' or '3.2s'"""
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(round(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
 
 class NovelReader:
-    def __init__(self, use_google_tts=True):
+    def __init__(self, use_google_tts=True, cache=None, workers=4, rate_limit=None, max_retries=3,
+                 export_mode='stream', prefetch=3, split_chapters=False, tts_backend=None, profiler=None, speech_verbs=DEFAULT_SPEECH_VERBS, name_lexicon=None,
+                 voice_effects=None, coalesce=False, resume=False, encoding=None, history=None):
         self.use_google_tts = use_google_tts
+        self.name_lexicon = name_lexicon or NameLexicon.shared()
+        self.speaker_attributor = SpeakerAttributor(speech_verbs)
+        self.export_mode = export_mode
+        self.split_chapters = split_chapters
+        self.prefetch = max(0, prefetch)
         self.character_voices = {}
+        self.voice_effects = dict(DEFAULT_VOICE_EFFECTS)
+        self.voice_effects.update(voice_effects or {})
+        self.effects_processor = EffectsProcessor()
+        self.cache = cache
+        self.profiler = profiler or Profiler()
+        self.tts_backend = tts_backend or GoogleTTSBackend()
+        self.tts_backend.profiler = self.profiler
+        self.tts_backend.before_request = self.before_request
+        self.workers = max(1, workers)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.coalesce = coalesce
+        self.resume = resume
+        self.encoding = dict(DEFAULT_ENCODING)
+        self.encoding.update(encoding or {})
+        self.history = history
+        self.journal = None
+        self.render_failures = 0
+        self.requests_sent = 0
+        self.requests_cached = 0
+        self.split_fallbacks = 0
+        # Encoder delay and padding in --watch MP3 pieces, and each piece's
+        # (delay, duration) in ms by name
+        self.piece_gap_ms = 0.0
+        self.piece_spans = {}
+        # Speech synthesized by this run, not found in the cache or journal,
+        # and its characters weighted as in duration_weight, for --estimate
+        self.synthesized_ms = 0
+        self.synthesized_chars = 0.0
+        self.request_lock = threading.Lock()
         
         if use_google_tts:
             self.setup_google_tts()
-        else:
-            # Fallback to system TTS
-            self.engine = pyttsx3.init()
-            self.voices = self.engine.getProperty('voices')
-            self.setup_default_voices()
+        # The system TTS engine is slow to start, so it is only initialized
+        # by system_engine() once something is actually spoken or rendered
+    
+    def job_copy(self, profiler=None):
+        """A reader for one daemon job, sharing this reader's warm caches and voices"""
+        job = copy.copy(self)
+        job.profiler = profiler or Profiler()
+        job.tts_backend = copy.copy(self.tts_backend)
+        job.tts_backend.profiler = job.profiler
+        job.tts_backend.before_request = job.before_request
+        job.journal = None
+        job.render_failures = job.requests_sent = job.requests_cached = job.split_fallbacks = 0
+        job.synthesized_ms = job.synthesized_chars = 0
+        job.request_lock = threading.Lock()
+        return job
     
     def setup_google_tts(self):
         """Setup Google TTS with different voices for characters"""
@@ -41,6 +2067,9 @@ class NovelReader:
             'child': {'lang': 'en', 'tld': 'co.uk', 'slow': False},       # British - for young characters
             'elderly': {'lang': 'en', 'tld': 'com', 'slow': True},        # US English - slower pace
         }
+        # Voices can share settings, so record the profile name for voice effects
+        for name, voice_config in self.gtts_voices.items():
+            voice_config['name'] = name
         self.voice_assignments = {}
         
     def setup_default_voices(self):
@@ -61,85 +2090,319 @@ class NovelReader:
             return self.voice_assignments[character]
         
         # Smart voice assignment based on character analysis
-        char_lower = character.lower()
+        category = self.name_lexicon.category(character)
         
-        # Gender-based assignment (simple heuristics)
-        female_names = ['sarah', 'anna', 'emma', 'lisa', 'maria', 'jane', 'kate', 'lucy', 'amy']
-        male_names = ['john', 'david', 'mike', 'james', 'robert', 'tom', 'alex', 'sam', 'ben']
-        
-        if any(name in char_lower for name in female_names):
+        if category == 'female':
             voice_key = 'female_1' if len(self.voice_assignments) % 2 == 0 else 'female_2'
-        elif any(name in char_lower for name in male_names):
+        elif category == 'male':
             voice_key = 'male_1' if len(self.voice_assignments) % 2 == 0 else 'male_2'
+        elif category in self.gtts_voices and category != 'narrator':
+            # Lexicons may name a voice directly, e.g. 'child' or 'elderly'
+            voice_key = category
         else:
             # Alternate between voice types
             voice_keys = ['female_1', 'male_1', 'female_2', 'male_2']
             voice_key = voice_keys[len(self.voice_assignments) % len(voice_keys)]
         
-        self.voice_assignments[character] = self.gtts_voices[voice_key]
-        return self.voice_assignments[character]
+        # setdefault keeps the first choice if a concurrent daemon job got here too
+        return self.voice_assignments.setdefault(character, self.gtts_voices[voice_key])
     
     def text_to_speech_google(self, text, character, play_audio=True, save_path=None):
         """Convert text to speech using Google TTS"""
         voice_config = self.assign_google_voice(character)
         
         try:
-            # Create TTS object
-            tts = gTTS(
-                text=text, 
-                lang=voice_config['lang'],
-                tld=voice_config['tld'],
-                slow=voice_config['slow']
-            )
+            audio = self.get_google_audio(text, voice_config, character)
             
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_path = temp_file.name
-                tts.save(temp_path)
-                
-                # Load audio
-                audio = AudioSegment.from_mp3(temp_path)
-                
-                # Apply character-specific audio effects
-                audio = self.apply_character_effects(audio, character)
-                
-                if save_path:
-                    audio.export(save_path, format="mp3")
-                
-                if play_audio:
-                    play(audio)
-                
-                # Clean up temp file
-                os.unlink(temp_path)
-                
-                return audio
+            if save_path:
+                audio.export(save_path, format="mp3")
+            
+            if play_audio:
+                _play(audio)
+            
+            return audio
                 
         except Exception as e:
             print(f"Google TTS error: {e}")
             print("Falling back to system TTS...")
             return self.text_to_speech_fallback(text, character, play_audio)
     
-    def apply_character_effects(self, audio, character):
-        """Apply audio effects based on character type"""
-        # Narrator: Slightly lower pitch, slower
-        if character == 'narrator':
-            # Slow down slightly for narrative
-            audio = audio._spawn(audio.raw_data, overrides={"frame_rate": int(audio.frame_rate * 0.95)})
-            audio = audio.set_frame_rate(audio.frame_rate)
+    def get_google_audio(self, text, voice_config, character, use_cache=True):
+        """Return segment audio from the cache, synthesizing it on a miss"""
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = self.cache_key(text, voice_config, self.character_effects(character))
+            with self.profiler.stage('cache'):
+                audio = self.cache.get(cache_key)
+            if audio is not None:
+                with self.request_lock:
+                    self.requests_cached += 1
+                return audio
         
-        # Add subtle volume differences
+        audio = self.synthesize_google(text, voice_config, character)
+        self.count_synthesized(text, character, audio)
+        if cache_key is not None:
+            self.cache.put(cache_key, audio)
+        return audio
+    
+    def before_request(self):
+        """Wait for --rate-limit, then count one TTS HTTP request; backends call it for each"""
+        self.rate_limiter.acquire()
+        with self.request_lock:
+            self.requests_sent += 1
+    
+    def count_synthesized(self, text, character, audio):
+        """Add speech this run synthesized to what --estimate is calibrated from"""
+        weighted = len(text) * self.duration_weight(character)
+        with self.request_lock:
+            self.synthesized_ms += len(audio)
+            self.synthesized_chars += weighted
+    
+    def get_google_audio_with_retry(self, text, voice_config, character, use_cache=True):
+        """Like get_google_audio, retrying transient failures with backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.get_google_audio(text, voice_config, character, use_cache)
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient_error(e):
+                    print(f"Google TTS error: {e}")
+                    return None
+                delay = (2 ** attempt) * (0.5 + random.random() / 2)
+                print(f"Google TTS error: {e} (retrying in {delay:.1f}s)")
+                time.sleep(delay)
+    
+    def cache_key(self, text, voice_config, effects):
+        """The synthesis cache key for text from this reader's TTS backend"""
+        return SynthesisCache.make_key(text, voice_config, effects, self.tts_backend.cache_source)
+    
+    def segment_cache_key(self, segment):
+        """The cache key a segment's audio is stored under, however it was requested"""
+        return self.cache_key(segment['text'].strip(), self.assign_google_voice(segment['speaker']),
+                              self.character_effects(segment['speaker']))
+    
+    def plan_requests(self, segments, max_chars=GTTS_MAX_CHARS):
+        """Pack runs of segments sharing a voice into as few TTS requests as possible"""
+        request = None
+        for i, segment in enumerate(segments):
+            # Voice assignment depends on the order characters first appear, so
+            # resolve it here in document order rather than racing inside the workers
+            voice_config = self.assign_google_voice(segment['speaker'])
+            effects = self.character_effects(segment['speaker'])
+            key = (voice_config['lang'], voice_config['tld'], voice_config['slow'],
+                   json.dumps(effects, sort_keys=True))
+            
+            # A request holding exactly one segment is cached under that
+            # segment's key; cached segments are never packed with others
+            text = segment['text'].strip()
+            if (not self.coalesce or not text or self.cache is not None
+                    and self.cache_key(text, voice_config, effects) in self.cache):
+                if request is not None:
+                    yield dict(request, ends=True)
+                    request = None
+                yield {'text': text, 'voice': voice_config, 'speaker': segment['speaker'],
+                       'parts': [(i, segment, 0)], 'cache': True, 'ends': True}
+                continue
+            
+            for sentence in split_sentences(text, max_chars):
+                # Move on to the next segment only after a full sentence, where
+                # the speech pauses and the audio can be cut apart again
+                fits = (request is not None and request['key'] == key
+                        and (request['parts'][-1][0] == i or SENTENCE_END.search(request['text']))
+                        and len(request['text']) + 1 + len(sentence) <= max_chars)
+                if fits:
+                    if request['parts'][-1][0] != i:
+                        request['parts'].append((i, segment, len(request['text']) + 1))
+                    request['text'] += ' ' + sentence
+                else:
+                    if request is not None:
+                        # ends: whether the request's last part finishes its
+                        # segment, so the segment is done when the request is
+                        yield dict(request, ends=request['parts'][-1][0] != i)
+                    # Packed or partial requests are cached per segment once split
+                    request = {'text': sentence, 'voice': voice_config, 'speaker': segment['speaker'],
+                               'key': key, 'parts': [(i, segment, 0)], 'cache': False}
+        
+        if request is not None:
+            yield dict(request, ends=True)
+    
+    def split_request_audio(self, audio, request):
+        """Cut a coalesced request's audio at the pauses between its segments, or None if unclear"""
+        parts = request['parts']
+        if len(parts) == 1:
+            return [audio]
+        
+        # Every segment after the first starts at one of the request's sentence
+        # breaks. Take the longest pauses as those breaks only when there are
+        # enough of them and they clearly outlast the pauses left over
+        breaks = [match.end() for match in SENTENCE_BREAK.finditer(request['text'])]
+        pauses = sorted(find_pauses(audio), key=lambda pause: pause[1] - pause[0], reverse=True)
+        if len(pauses) < len(breaks):
+            return None
+        if len(pauses) > len(breaks):
+            shortest = pauses[len(breaks) - 1]
+            longest_other = pauses[len(breaks)]
+            if shortest[1] - shortest[0] < PAUSE_MARGIN * (longest_other[1] - longest_other[0]):
+                return None
+        pauses = sorted(pauses[:len(breaks)])
+        
+        pieces = []
+        cut = 0
+        for _, _, offset in parts[1:]:
+            if offset not in breaks:
+                return None
+            start, end = pauses[breaks.index(offset)]
+            position = (start + end) // 2
+            pieces.append(audio[cut:position])
+            cut = position
+        pieces.append(audio[cut:])
+        return pieces
+    
+    def synthesize_request(self, request):
+        """Audio for each part of a planned request, None for parts that failed"""
+        parts = request['parts']
+        if not request['text']:
+            return [None] * len(parts)
+        audio = self.get_google_audio_with_retry(request['text'], request['voice'], request['speaker'],
+                                                 request['cache'])
+        if audio is None or len(parts) == 1:
+            return [audio] * len(parts)
+        
+        pieces = self.split_request_audio(audio, request)
+        if pieces is None:
+            # The pauses between its segments could not be told apart from the
+            # rest, so send each segment's share of the text on its own
+            with self.request_lock:
+                self.split_fallbacks += 1
+            offsets = [offset for _, _, offset in parts] + [len(request['text'])]
+            pieces = [self.get_google_audio_with_retry(request['text'][start:end].strip(), request['voice'],
+                                                       request['speaker'], False)
+                      for start, end in zip(offsets, offsets[1:])]
+        return pieces
+    
+    def synthesize_segments(self, segments, workers=None, max_in_flight=None):
+        """Synthesize segments on a worker pool, yielding (index, segment, audio) in order"""
+        workers = workers or self.workers
+        requests = self.plan_requests(segments)
+        
+        def synthesized():
+            if workers == 1:
+                for request in requests:
+                    yield request, self.synthesize_request(request)
+                return
+            
+            from concurrent.futures import ThreadPoolExecutor
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _, request, future in submit_ordered(executor, self.synthesize_request, requests,
+                                                         lambda request: (request,), max_in_flight or workers * 2):
+                    yield request, future.result()
+        
+        def finished(i, segment, audio, store):
+            # Audio assembled from packed or partial requests is cached per
+            # segment, just as a request for the segment alone would be
+            if store and audio is not None and self.cache is not None:
+                self.cache.put(self.segment_cache_key(segment), audio)
+            return i, segment, audio
+        
+        # A segment can span several requests and a request several segments;
+        # parts arrive in document order, so a segment is complete once a
+        # later one starts, or once the request holding its last part returns
+        current = None
+        for request, pieces in synthesized():
+            for (i, segment, _), piece in zip(request['parts'], pieces):
+                if current is not None and current[0] != i:
+                    yield finished(*current)
+                    current = None
+                if current is None:
+                    current = (i, segment, piece, not request['cache'])
+                elif current[2] is not None and piece is not None:
+                    current = (i, segment, current[2] + piece, True)
+                else:
+                    current = (i, segment, None, False)  # Part of the segment failed
+            if request['ends']:
+                yield finished(*current)
+                current = None
+    
+    def render_system_segments(self, segments, workers=None, max_in_flight=None):
+        """Render segments offline with system TTS, yielding (index, segment, audio) in order"""
+        workers = workers or self.workers
+        
+        def job(segment):
+            return segment['text'], segment['speaker']
+        
+        if workers == 1:
+            renderer = SystemTTSRenderer(self.system_engine())
+            for i, segment in enumerate(segments):
+                try:
+                    audio = renderer.render(*job(segment))
+                    self.count_synthesized(*job(segment), audio)
+                except Exception as e:
+                    print(f"System TTS failed for segment {i+1}: {e}")
+                    audio = None
+                yield i, segment, audio
+            return
+        
+        # pyttsx3 engines are single-threaded, so each worker process drives its own
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_system_tts_worker) as executor:
+            for i, segment, future in submit_ordered(executor, _render_system_segment, segments,
+                                                     job, max_in_flight or workers * 2):
+                try:
+                    audio = future.result()
+                    self.count_synthesized(*job(segment), audio)
+                except Exception as e:
+                    print(f"System TTS failed for segment {i+1}: {e}")
+                    audio = None
+                yield i, segment, audio
+    
+    def synthesize_google(self, text, voice_config, character):
+        """Fetch and decode Google TTS audio, then apply character effects"""
+        audio = self.tts_backend.synthesize(text, voice_config)
+        
+        # Apply character-specific audio effects
+        with self.profiler.stage('effects'):
+            return self.apply_character_effects(audio, character)
+    
+    def character_effects(self, character):
+        """Describe the audio effects applied to a character's voice"""
+        if character == 'narrator':
+            voice = 'narrator'
         elif 'elderly' in character.lower():
-            audio = audio - 2  # Slightly quieter
+            voice = 'elderly'
         elif 'child' in character.lower():
-            audio = audio + 1  # Slightly louder
+            voice = 'child'
+        else:
+            voice = self.voice_assignments.get(character, {}).get('name')
         
-        return audio
+        return dict(self.voice_effects.get(voice, {}))
+    
+    def duration_weight(self, character):
+        """How much longer than plain speech a character's audio runs, from slow voices and effects"""
+        if not self.use_google_tts:
+            return 1.0
+        effects = self.character_effects(character)
+        weight = 1.0 / (effects.get('speed', 1.0) * effects.get('tempo', 1.0))
+        if self.assign_google_voice(character)['slow']:
+            weight *= GTTS_SLOW_FACTOR
+        return weight
+    
+    def apply_character_effects(self, audio, character):
+        """Apply audio effects based on character type"""
+        return self.effects_processor.apply(audio, self.character_effects(character))
     
-    def text_to_speech_fallback(self, text, character, play_audio=True):
-        """Fallback to system TTS if Google TTS fails"""
+    def system_engine(self):
+        """The pyttsx3 engine, initialized on first use"""
         if not hasattr(self, 'engine'):
+            import pyttsx3
             self.engine = pyttsx3.init()
-            self.voices = self.engine.getProperty('voices') if not hasattr(self, 'voices') else self.voices
+            self.voices = self.engine.getProperty('voices')
+            self.setup_default_voices()
+        return self.engine
+    
+    def text_to_speech_fallback(self, text, character, play_audio=True):
+        """Fallback to system TTS if Google TTS fails"""
+        self.system_engine()
         
         # Set voice properties
         if character == 'narrator':
@@ -158,61 +2421,160 @@ class NovelReader:
             self.engine.runAndWait()
     
     def parse_text(self, text):
-        """Parse text into dialogue and narrative segments"""
-        segments = []
-        paragraphs = text.split('\n\n')
+        """Parse text into dialogue and narrative segments, a read-only sequence of Segment views"""
+        text = normalize_newlines(text)
+        store = SegmentStore()
+        base = store.add_text(text)
+        
+        # Walk the paragraphs by offset so the store can point into text
+        position = 0
+        while position <= len(text):
+            end = text.find('\n\n', position)
+            if end == -1:
+                end = len(text)
+            para = text[position:end]
+            stripped = para.strip()
+            if stripped:
+                start = base + position + len(para) - len(para.lstrip())
+                self.add_segment(store, stripped, start)
+            position = end + 2
+        return store
+    
+    def iter_file_segments(self, file_path, store=None, start=0):
+        """Lazily parse a text file, reading only as far as the caller consumes"""
+        return self.iter_segments(iter_paragraphs(file_path, start=start), store)
+    
+    def voice_order(self):
+        """(speaker, voice name) for each assigned voice, in the order they were assigned"""
+        if not self.use_google_tts:
+            return []
+        return [(speaker, voice['name']) for speaker, voice in list(self.voice_assignments.items())]
+    
+    def find_start(self, file_path, start_at, index_path=None):
+        """Byte offset, segment number and chapters passed for a --start-at position"""
+        kind, target = parse_start_at(start_at)
+        if kind == 'text':
+            words = [re.escape(word.encode('utf-8')) for word in target.split()]
+            target = re.compile(rb'\s+'.join(words), re.IGNORECASE)
+        
+        if index_path is not None:
+            start = self.start_from_index(index_path, file_path, kind, target)
+            if start is not None:
+                print(f"Found --start-at {start_at} in the seek index {index_path}")
+                return start
+        
+        with open(file_path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                raise ValueError(f"--start-at {start_at}: {file_path} is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                found = target.search(data) if kind == 'text' else None
+                if kind == 'text' and not found:
+                    raise ValueError(f"--start-at: no paragraph contains {start_at!r}")
+                
+                # Walk the raw bytes, decoding only what decides voices, so
+                # skipping most of a book costs a scan rather than a parse
+                segment = 0
+                chapter = 0
+                for offset, raw in iter_raw_paragraphs(data):
+                    if not raw.strip():
+                        continue
+                    dialogue = DIALOGUE_QUOTE.search(raw)
+                    heading = False
+                    if not dialogue and CHAPTER_HEADING_START.match(raw.lstrip()):
+                        heading = is_chapter_heading(normalize_newlines(raw.decode('utf-8')).strip())
+                    if kind == 'segment':
+                        reached = segment + 1 >= target
+                    elif kind == 'chapter':
+                        reached = heading and chapter + 1 == target
+                    else:
+                        reached = offset + len(raw) > found.start()
+                    if reached:
+                        return offset, segment + 1, chapter
+                    
+                    segment += 1
+                    chapter += heading
+                    if dialogue and self.use_google_tts:
+                        # Meet speakers in order so they keep the voices a full run gives them
+                        text = normalize_newlines(raw.decode('utf-8')).strip()
+                        self.assign_google_voice(self.extract_speaker(text))
+        
+        if kind == 'chapter':
+            raise ValueError(f"--start-at: the book has {chapter} chapter headings, not {target}")
+        raise ValueError(f"--start-at: the book has {segment} segments, not {target}")
+    
+    def start_from_index(self, index_path, file_path, kind, target):
+        """find_start's answer from a seek index written for this very file, or None to scan"""
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            source = index['source']
+            rows = {row[0]: row for row in index['segments'] if row[4] is not None}
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return None
+        stamp = file_stamp(file_path)
+        if stamp is None or source['stamp'] != list(stamp) or source['file'] != os.path.basename(file_path):
+            return None
+        
+        if kind == 'segment':
+            row = rows.get(max(target, 1))
+        elif kind == 'chapter':
+            segment = next((chapter['segment'] for chapter in index['chapters'] if chapter['chapter'] == target), None)
+            row = rows.get(segment)
+        else:
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                found = target.search(data)
+            if not found:
+                return None
+            # The paragraph holding the match is the last to start before it,
+            # as long as the next one is in the index to show where it ends
+            numbers = sorted(rows)
+            n = bisect.bisect_right([rows[number][4] for number in numbers], found.start()) - 1
+            row = rows[numbers[n]] if n >= 0 else None
+            if row is not None and row[0] + 1 not in rows and row[0] != source['last_segment']:
+                row = None
+        if row is None:
+            return None
         
+        if self.use_google_tts:
+            # Speakers met before the start keep the voices, in the order, a full run gives them
+            for speaker, name, first in index.get('voices', []):
+                if first < row[0] and name in self.gtts_voices:
+                    self.voice_assignments.setdefault(speaker, self.gtts_voices[name])
+        heading = any(chapter['segment'] == row[0] for chapter in index['chapters'])
+        return row[4], row[0], row[3] - heading
+    
+    def iter_segments(self, paragraphs, store=None):
+        """Yield a dialogue or narrative segment for each non-blank paragraph"""
+        rolling = store is None
         for para in paragraphs:
             para = para.strip()
             if not para:
                 continue
-                
-            if self.is_dialogue(para):
-                speaker = self.extract_speaker(para)
-                dialogue_text = self.extract_dialogue_text(para)
-                segments.append({
-                    'type': 'dialogue',
-                    'speaker': speaker,
-                    'text': dialogue_text,
-                    'original': para
-                })
-            else:
-                segments.append({
-                    'type': 'narrative',
-                    'speaker': 'narrator',
-                    'text': para,
-                    'original': para
-                })
-        
-        return segments
+            if rolling and (store is None or len(store) >= STREAM_STORE_SEGMENTS):
+                store = SegmentStore()
+            yield self.add_segment(store, para, store.add_text(para))
+    
+    def add_segment(self, store, para, start):
+        """Classify a stripped paragraph stored at start and record it"""
+        dialogue_match = DIALOGUE.search(para)
+        if dialogue_match:
+            return store.append(
+                'dialogue', self.extract_speaker(para), start, start + len(para),
+                start + dialogue_match.start(1), start + dialogue_match.end(1)
+            )
+        return store.append('narrative', 'narrator', start, start + len(para), start, start + len(para))
     
     def is_dialogue(self, text):
         """Check if text contains dialogue"""
-        return bool(re.search(r'"[^"]*"', text))
+        return DIALOGUE.search(text) is not None
     
     def extract_speaker(self, text):
         """Extract speaker name from dialogue paragraph"""
-        patterns = [
-            r'"[^"]*,"\s*(\w+)\s+said',  # "Hello," John said
-            r'(\w+)\s+said,?\s*"',       # John said, "Hello"
-            r'"[^"]*"\s*(\w+)\s+replied', # "Hello" John replied
-            r'(\w+)\s+replied,?\s*"',     # John replied, "Hello"
-            r'"[^"]*,"\s*(\w+)\s+asked',  # "Hello," John asked
-            r'(\w+)\s+asked,?\s*"',       # John asked, "Hello"
-            r'"[^"]*,"\s*(\w+)\s+whispered', # "Hello," John whispered
-            r'(\w+)\s+whispered,?\s*"',   # John whispered, "Hello"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).lower()
-        
-        return 'unknown'
+        return self.speaker_attributor.extract(text)
     
     def extract_dialogue_text(self, text):
         """Extract just the spoken dialogue from the paragraph"""
-        dialogue_match = re.search(r'"([^"]*)"', text)
+        dialogue_match = DIALOGUE.search(text)
         if dialogue_match:
             return dialogue_match.group(1)
         return text
@@ -233,63 +2595,733 @@ class NovelReader:
             print("\nCharacters are automatically assigned based on names and context")
         else:
             print("🔧 Using System Text-to-Speech")
+            self.system_engine()
             if hasattr(self, 'voices'):
                 for i, voice in enumerate(self.voices):
                     gender = "Female" if "female" in voice.name.lower() else "Male"
                     print(f"{i}: {voice.name} ({gender})")
     
-    def process_file(self, file_path, output_path=None, preview=False):
-        """Process a text file and convert to speech"""
+    def prefetch_segments(self, segments):
+        """Yield (index, segment, audio) while a background thread synthesizes ahead"""
+        # The synthesis pool holds at most `prefetch` segments in flight and
+        # the hand-off queue one more, which caps look-ahead memory
+        look_ahead = queue.Queue(maxsize=1)
+        stop = threading.Event()
+        done = object()
+        
+        def put(item):
+            while not stop.is_set():
+                try:
+                    look_ahead.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            rendered = self.synthesize_segments(
+                segments,
+                workers=min(self.workers, self.prefetch),
+                max_in_flight=self.prefetch
+            )
+            try:
+                for item in rendered:
+                    if not put(item):
+                        break
+            finally:
+                rendered.close()
+                put(done)
+        
+        producer = threading.Thread(target=contextvars.copy_context().run, args=(produce,),
+                                    name='novelreader-prefetch', daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = look_ahead.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+    
+    def play_segments(self, segments):
+        """Play segments in order, reporting time-to-first-audio and gaps"""
+        if self.prefetch:
+            rendered = self.prefetch_segments(segments)
+        else:
+            # Synthesize each segment only once the previous one has played
+            rendered = self.synthesize_segments(segments, workers=1)
+        
+        start_time = time.perf_counter()
+        first_audio = None
+        longest_gap = 0.0
+        ready_at = None
+        
+        for i, segment, audio in rendered:
+            speaker_info = f"[{segment['speaker']}]" if segment['speaker'] != 'narrator' else "[Narrator]"
+            print(f"{speaker_info}: {segment['text'][:70]}...")
+            
+            # A gap is any wait beyond the deliberate pause between segments
+            now = time.perf_counter()
+            if first_audio is None:
+                first_audio = now - start_time
+            elif ready_at is not None:
+                longest_gap = max(longest_gap, now - ready_at)
+            
+            if audio is None:
+                print("Falling back to system TTS...")
+                self.text_to_speech_fallback(segment['text'], segment['speaker'])
+            else:
+                _play(audio)
+            
+            time.sleep(PLAYBACK_PAUSE)  # Brief pause between segments
+            ready_at = time.perf_counter()
+        
+        if first_audio is not None:
+            print(f"\nTime to first audio: {first_audio * 1000:.0f} ms")
+            print(f"Longest gap between segments: {longest_gap * 1000:.0f} ms "
+                  f"(plus {PLAYBACK_PAUSE * 1000:.0f} ms pause)")
+    
+    def segment_key(self, segment):
+        """Hash of everything that determines a segment's rendered audio"""
+        if self.use_google_tts:
+            voice = [self.tts_backend.name, self.assign_google_voice(segment['speaker'])]
+            if self.tts_backend.cache_source is not None:
+                voice.append(self.tts_backend.cache_source)
+            effects = self.character_effects(segment['speaker'])
+        else:
+            voice = ['system', segment['speaker'] == 'narrator']
+            effects = {}
+        payload = json.dumps([segment['text'], voice, effects], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def synthesize_any(self, segments):
+        """Yield (index, segment, audio) in order from Google or system TTS"""
+        if self.use_google_tts:
+            return self.synthesize_segments(segments)
+        return self.render_system_segments(segments)
+    
+    def render_segments(self, segments, rendered_indexes=None):
+        """Yield the audio for each segment that synthesized successfully"""
+        # rendered_indexes, if given, collects the index of each yielded segment
+        journal = self.journal
+        keys = [self.segment_key(segment) for segment in segments] if journal else None
+        # Segments already in the journal are never synthesized again
+        done = [journal is not None and keys[n] in journal.records for n in range(len(segments))]
+        pending = [segment for n, segment in enumerate(segments) if not done[n]]
+        rendered = self.synthesize_any(pending)
+        
+        for i, segment in enumerate(segments):
+            print(f"  Processing segment {i+1}/{len(segments)}...")
+            if done[i]:
+                audio = journal.get(keys[i])
+            else:
+                _, _, audio = next(rendered)
+                if audio is None:
+                    self.render_failures += 1
+                elif journal is not None:
+                    journal.append(keys[i], audio)
+            if audio:
+                if rendered_indexes is not None:
+                    rendered_indexes.append(i)
+                yield audio
+    
+    def open_encoder(self, output_path, format=None):
+        """A StreamingEncoder for output_path with this reader's codec settings"""
+        return StreamingEncoder(
+            output_path, format=format or self.encoding['format'],
+            bitrate=self.encoding['bitrate'],
+            output_rate=self.encoding['sample_rate'],
+            output_channels=self.encoding['channels']
+        )
+    
+    def export_buffered(self, rendered, output_path, format=None, starts=None):
+        """Concatenate every segment in memory, then encode once"""
+        audio_segments = []
+        elapsed_ms = 0
+        for audio in rendered:
+            if starts is not None:
+                starts.append(elapsed_ms)
+            elapsed_ms += len(audio) + SEGMENT_PAUSE_MS
+            audio_segments.append(audio)
+            # Add pause between segments
+            audio_segments.append(_pydub().AudioSegment.silent(duration=SEGMENT_PAUSE_MS))
+        
+        if not audio_segments:
+            return False
+        
+        # Combine all segments
+        with self.profiler.stage('concat'):
+            final_audio = sum(audio_segments)
+        spec = OUTPUT_FORMATS[format or self.encoding['format']]
+        parameters = []
+        if self.encoding['sample_rate']:
+            parameters += ['-ar', str(self.encoding['sample_rate'])]
+        if self.encoding['channels']:
+            parameters += ['-ac', str(self.encoding['channels'])]
+        bitrate = self.encoding['bitrate'] if spec['lossy'] else None
+        with self.profiler.stage('export'):
+            final_audio.export(output_path, format=spec['muxer'], codec=spec['codec'],
+                               bitrate=bitrate, parameters=parameters)
+        return True
+    
+    def export_streaming(self, rendered, output_path, format=None, starts=None):
+        """Pipe each segment's PCM into one encoder as soon as it is ready"""
+        # starts, if given, collects each segment's start time in milliseconds
+        encoder = None
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+            for audio in rendered:
+                if encoder is None:
+                    # Open lazily so a run that produced no audio writes no file
+                    encoder = self.open_encoder(output_path, format)
+                if starts is not None:
+                    starts.append(encoder.duration_ms)
+                with self.profiler.stage('concat'):
+                    encoder.write(audio)
+                    encoder.write_silence(SEGMENT_PAUSE_MS)
+        except BaseException:
+            if encoder is not None:
+                encoder.abort()
+            raise
+        
+        if encoder is None:
+            return False
+        with self.profiler.stage('export'):
+            encoder.close()
+        return True
+    
+    def chapter_fingerprint(self, chapter):
+        """Hash of everything that determines a chapter's rendered audio"""
+        fields = {
+            'segments': [
+                [segment['text'], self.assign_google_voice(segment['speaker']),
+                 self.character_effects(segment['speaker'])]
+                for segment in chapter
+            ],
+            'pause_ms': SEGMENT_PAUSE_MS,
+            'layout': [EXPORT_FRAME_RATE, EXPORT_CHANNELS, EXPORT_SAMPLE_WIDTH],
+            'encoding': self.encoding,
+        }
+        # As in the synthesis cache, only other backends and endpoints add a source
+        if self.tts_backend.cache_source is not None:
+            fields['source'] = self.tts_backend.cache_source
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def export_chapters(self, segments, output_path, entries=None):
+        """Encode each chapter to its own MP3 part, then join the parts frame-wise"""
+        # entries, if given, collects (segment index, start ms) for the seek index
+        parts_dir = Path(f"{output_path}.parts")
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = parts_dir / 'manifest.json'
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                part_starts = json.load(f)['segment_starts']
+        except (OSError, ValueError, KeyError, TypeError):
+            part_starts = {}
+        
+        # Parts are named by fingerprint, so inserting, removing or moving a
+        # chapter leaves every other part reusable; the manifest keeps their
+        # order and the segment start times within each finished part
+        manifest = {'order': [], 'segment_starts': part_starts}
+        chapters = split_chapters(segments)
+        part_paths = []
+        part_entries = []
+        position = 0
+        
+        def save_manifest():
+            manifest['order'] = [part_path.name for part_path in part_paths]
+            temp_manifest = manifest_path.with_suffix('.tmp')
+            with open(temp_manifest, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_manifest, manifest_path)
+        
+        for number, chapter in enumerate(chapters, 1):
+            first, position = position, position + len(chapter)
+            # Fingerprinting assigns voices in document order, even for skipped chapters
+            part_path = parts_dir / f"{self.chapter_fingerprint(chapter)}.mp3"
+            
+            if part_path.name in part_starts and part_path.exists():
+                print(f"  Chapter {number}/{len(chapters)}: unchanged, reusing its part")
+                part_paths.append(part_path)
+                part_entries.append([(first + i, ms) for i, ms in part_starts[part_path.name]])
+                continue
+            
+            print(f"  Chapter {number}/{len(chapters)}: rendering {len(chapter)} segments")
+            # Encode beside the part, so an interrupted chapter never looks finished
+            temp_path = part_path.with_suffix('.tmp')
+            rendered, starts = [], []
+            if not self.export_streaming(self.render_segments(chapter, rendered), temp_path,
+                                         format="mp3", starts=starts):
+                continue
+            part_entries.append([(first + i, ms) for i, ms in zip(rendered, starts)])
+            if len(rendered) < len(chapter):
+                # Join what was rendered this time, but leave the part unfinished
+                # so the next run renders the chapter again and retries the rest
+                print(f"  Chapter {number}/{len(chapters)}: {len(chapter) - len(rendered)} segments failed, "
+                      f"so its part will be rendered again")
+                part_paths.append(temp_path)
+                continue
+            os.replace(temp_path, part_path)
+            
+            part_starts[part_path.name] = [[i, ms] for i, ms in zip(rendered, starts)]
+            part_paths.append(part_path)
+            save_manifest()
+        
+        # Drop parts left over from chapters that no longer exist or never finished
+        for stale in list(parts_dir.glob('*.mp3')) + list(parts_dir.glob('*.tmp')):
+            if stale not in part_paths:
+                stale.unlink()
+                part_starts.pop(stale.name, None)
+        save_manifest()
+        
+        if not part_paths:
+            return False
+        
+        start_time = time.perf_counter()
+        join_mp3_files(part_paths, output_path)
+        print(f"Joined {len(part_paths)} chapter parts in {time.perf_counter() - start_time:.2f}s")
+        
+        if entries is not None:
+            # Parts are joined whole, so each starts where the frames before it end
+            part_start = 0.0
+            for part_path, starts in zip(part_paths, part_entries):
+                entries.extend((n, part_start + ms) for n, ms in starts)
+                part_start += mp3_duration_ms(part_path)
+        return True
+    
+    def watch_file(self, file_path, output_path=None, replay=True, interval=WATCH_INTERVAL):
+        """Re-render only what changed each time file_path is saved, until interrupted"""
+        print(f"👀 Watching {file_path} (Ctrl-C to stop)")
+        keys = None
+        stamp = None
+        try:
+            while True:
+                current = file_stamp(file_path)
+                if current is not None and current != stamp:
+                    # Editors may write in several steps; wait for the file to settle
+                    time.sleep(WATCH_SETTLE)
+                    if file_stamp(file_path) == current:
+                        stamp = current
+                        keys = self.apply_edit(file_path, keys, output_path, replay=replay and keys is not None)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        return True
+    
+    def apply_edit(self, file_path, previous_keys, output_path=None, replay=False):
+        """Re-render the segments of file_path that differ from previous_keys; return the new keys"""
+        start_time = time.perf_counter()
+        stamp = file_stamp(file_path)
+        try:
+            segments = list(self.iter_file_segments(file_path))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading file: {e}")
+            return previous_keys
+        
+        # Keys cover text, voice and effects, so a segment matches only if
+        # its audio would be identical; voices are assigned in document order
+        keys = [self.segment_key(segment) for segment in segments]
+        changed = []
+        removed = 0
+        matcher = difflib.SequenceMatcher(None, previous_keys or [], keys, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                changed.extend(range(j1, j2))
+                removed += i2 - i1
+        
+        if previous_keys is None:
+            print(f"Loaded {len(segments)} segments")
+        elif not changed and not removed:
+            return keys
+        else:
+            print(f"\n✏️  Edit: {len(changed)} segments new or changed, {removed} replaced or removed")
+        
+        pieces_dir = Path(f"{output_path}.pieces") if output_path else None
+        # MP3 pieces join frame-wise; other codecs are re-encoded from raw PCM pieces
+        suffix = '.mp3' if self.encoding['format'] == 'mp3' else '.pcm'
+        if pieces_dir is not None:
+            pieces_dir.mkdir(parents=True, exist_ok=True)
+            # Pieces are named by key, so moved or restored paragraphs are reused
+            need = [n for n in changed if not (pieces_dir / f"{keys[n]}{suffix}").exists()]
+        elif replay and self.use_google_tts:
+            need = changed
+        else:
+            need = []
+        
+        audio_by_index = {}
+        for i, segment, audio in self.synthesize_any([segments[n] for n in need]):
+            n = need[i]
+            if audio is None:
+                print(f"Segment {n+1} failed to synthesize; it is left out until the next edit")
+                continue
+            audio_by_index[n] = audio
+            if pieces_dir is not None:
+                self.write_piece(pieces_dir / f"{keys[n]}{suffix}", audio)
+        
+        if pieces_dir is not None:
+            pieces = [pieces_dir / f"{key}{suffix}" for key in keys]
+            pieces = [piece for piece in pieces if piece.exists()]
+            for stale in pieces_dir.glob('*.*'):
+                if stale not in pieces:
+                    stale.unlink()
+            if pieces and suffix == '.mp3':
+                join_mp3_files(pieces, output_path)
+            elif pieces:
+                self.encode_pieces(pieces, output_path)
+            if pieces:
+                # Pieces are joined whole, so each segment starts where the
+                # pieces before it end, plus its own encoder delay
+                entries, offsets = [], []
+                elapsed = position = 0
+                present = set(pieces)
+                for n, key in enumerate(keys):
+                    piece = pieces_dir / f"{key}{suffix}"
+                    if piece in present:
+                        delay, duration, size, start = self.piece_span(piece)
+                        entries.append((n, elapsed + delay))
+                        offsets.append(position + start)
+                        elapsed += duration
+                        position += size
+                write_seek_index(output_path, self.encoding['format'], segments, entries,
+                                 frame_rate=self.encoding['sample_rate'] or EXPORT_FRAME_RATE,
+                                 channels=self.encoding['channels'] or EXPORT_CHANNELS,
+                                 offsets=offsets if suffix == '.mp3' else None,
+                                 source=(file_path, 0, stamp), voices=self.voice_order())
+        
+        elapsed = time.perf_counter() - start_time
+        if output_path:
+            print(f"Synthesized {len(need)} segments and updated {output_path} in {elapsed:.2f}s")
+        
+        if replay and changed:
+            self.replay_segments([
+                (segments[n], audio_by_index.get(n), pieces_dir / f"{keys[n]}{suffix}" if pieces_dir else None)
+                for n in changed
+            ])
+        return keys
+    
+    def write_piece(self, path, audio):
+        """Encode one segment and its trailing pause to its own MP3 or raw PCM piece"""
+        temp_path = path.with_suffix('.tmp')
+        if path.suffix != '.mp3':
+            with StreamingEncoder(temp_path, format="pcm") as encoder:
+                encoder.write(audio)
+                encoder.write_silence(SEGMENT_PAUSE_MS)
+            os.replace(temp_path, path)
+            return
+        
+        # Joined frame-wise, a piece also plays the silence its encoder adds
+        # before and after the audio, so that comes out of the pause. It
+        # hardly varies, so only the first piece is encoded twice to measure it
+        target = len(audio) + SEGMENT_PAUSE_MS
+        pause = SEGMENT_PAUSE_MS - self.piece_gap_ms
+        for _ in range(2):
+            with self.open_encoder(temp_path, "mp3") as encoder:
+                encoder.write(audio)
+                encoder.write_silence(max(0, pause))
+            span = mp3_piece_span(temp_path)
+            excess = span[1] - target
+            if abs(excess) < span[4] or pause <= 0:
+                break
+            pause -= excess
+        self.piece_gap_ms = SEGMENT_PAUSE_MS - pause
+        self.piece_spans[path.name] = span[:4]
+        os.replace(temp_path, path)
+    
+    def piece_span(self, path):
+        """A piece's (segment start, duration) in ms and (audio size, segment start) in joined bytes"""
+        span = self.piece_spans.get(path.name)
+        if span is None:
+            if path.suffix == '.mp3':
+                span = mp3_piece_span(path)[:4]
+            else:
+                size = path.stat().st_size
+                span = (0.0, size / (EXPORT_CHANNELS * EXPORT_SAMPLE_WIDTH) * 1000 / EXPORT_FRAME_RATE, size, 0)
+            self.piece_spans[path.name] = span
+        return span
+    
+    def encode_pieces(self, pieces, output_path):
+        """Encode raw PCM pieces, in order, into output_path"""
+        temp_path = f"{output_path}.tmp"
+        with self.open_encoder(temp_path) as encoder:
+            for piece in pieces:
+                encoder.write_pcm(piece.read_bytes())
+        os.replace(temp_path, output_path)
+    
+    def replay_segments(self, edited):
+        """Play the edited passage: (segment, audio or None, piece or None) triples"""
+        print("▶️  Replaying the edited passage")
+        decoder = None
+        for segment, audio, piece in edited:
+            speaker_info = f"[{segment['speaker']}]" if segment['speaker'] != 'narrator' else "[Narrator]"
+            print(f"{speaker_info}: {segment['text'][:70]}...")
+            if audio is None and piece is not None and piece.exists() and piece.suffix == '.pcm':
+                audio = _pydub().AudioSegment(data=piece.read_bytes(), sample_width=EXPORT_SAMPLE_WIDTH,
+                                     frame_rate=EXPORT_FRAME_RATE, channels=EXPORT_CHANNELS)
+            elif audio is None and piece is not None and piece.exists():
+                decoder = decoder or Mp3Decoder()
+                audio = decoder.decode(piece.read_bytes())
+            if audio is None:
+                self.text_to_speech_fallback(segment['text'], segment['speaker'])
+            else:
+                _play(audio)
+            time.sleep(PLAYBACK_PAUSE)
+    
+    def count_segments(self, segments, stats):
+        """Pass segments through while tallying them into stats"""
+        stats.setdefault('total', 0)
+        stats.setdefault('dialogue', 0)
+        stats.setdefault('characters', {})
+        for segment in segments:
+            stats['total'] += 1
+            if segment['type'] == 'dialogue':
+                stats['dialogue'] += 1
+            if segment['speaker'] != 'narrator':
+                stats['characters'][segment['speaker']] = True
+            yield segment
+    
+    def print_segment_summary(self, stats):
+        """Print segment counts and detected characters"""
+        print(f"Found {stats['total']} segments:")
+        print(f"  {stats['total'] - stats['dialogue']} narrative segments")
+        print(f"  {stats['dialogue']} dialogue segments")
+        
+        # Show character analysis
+        if stats['characters']:
+            print(f"  Characters detected: {', '.join(stats['characters'])}")
+    
+    def print_request_summary(self, segment_count):
+        """Print how many TTS requests the segments took"""
+        summary = f"TTS requests: {self.requests_sent} HTTP requests sent for {segment_count} segments"
+        if self.requests_cached:
+            summary += f" ({self.requests_cached} segments served from cache)"
+        if self.split_fallbacks:
+            summary += f"; {self.split_fallbacks} coalesced requests resent per segment"
+        print(summary)
+    
+    def estimate_file(self, file_path, start_at=None, index_path=None):
+        """Report the TTS requests, audio length and render time a file would take, without rendering"""
+        started = time.perf_counter()
+        start = (0, 1, 0)
+        try:
+            if start_at:
+                start = self.find_start(file_path, start_at, index_path)
+            parsed = self.iter_file_segments(file_path, start=start[0])
         except Exception as e:
             print(f"Error reading file: {e}")
             return False
         
-        print(f"Processing: {file_path}")
-        segments = self.parse_text(text)
+        stats = {}
+        self.last_stats = stats
+        segments = self.count_segments(parsed, stats)
+        # Per voice: speakers, text characters, characters weighted by how
+        # slowly the voice speaks, gTTS requests and requests already cached
+        voices = defaultdict(lambda: {'speakers': set(), 'chars': 0, 'weighted': 0.0,
+                                      'requests': 0, 'cached': 0})
+        try:
+            if self.use_google_tts:
+                # The same plan a render follows, so coalescing is counted exactly
+                counted = -1
+                for request in self.plan_requests(segments):
+                    voice = voices[request['voice']['name']]
+                    for i, segment, _ in request['parts']:
+                        if i != counted:
+                            counted = i
+                            voice['speakers'].add(segment['speaker'])
+                            voice['chars'] += len(segment['text'])
+                            voice['weighted'] += len(segment['text']) * self.duration_weight(segment['speaker'])
+                    # gTTS splits anything over its limit into one HTTP request per piece
+                    text = request['text']
+                    sent = gtts_request_count(text)
+                    voice['requests'] += sent
+                    # Only single-segment requests are looked up; the plan
+                    # already left cached segments out of packed ones
+                    if self.cache is not None and request['cache']:
+                        key = self.cache_key(text, request['voice'], self.character_effects(request['speaker']))
+                        voice['cached'] += sent if key in self.cache else 0
+            else:
+                for segment in segments:
+                    voice = voices['narrator' if segment['speaker'] == 'narrator' else 'characters']
+                    voice['speakers'].add(segment['speaker'])
+                    voice['chars'] += len(segment['text'])
+                    voice['weighted'] += len(segment['text'])
+        except UnicodeDecodeError as e:
+            print(f"Error reading file: {e}")
+            return False
+        
+        backend = self.tts_backend.name if self.use_google_tts else 'system'
+        calibration = self.history.calibration(backend) if self.history else default_calibration()
+        speech_ms = sum(voice['weighted'] for voice in voices.values()) * calibration['ms_per_char']
+        audio_seconds = (speech_ms + stats.get('total', 0) * SEGMENT_PAUSE_MS) / 1000
+        requests = sum(voice['requests'] for voice in voices.values())
+        cached = sum(voice['cached'] for voice in voices.values())
+        if self.use_google_tts:
+            wall_seconds = (requests - cached) * calibration['request_seconds'] / self.workers
+            if self.rate_limiter.interval:
+                wall_seconds = max(wall_seconds, (requests - cached) * self.rate_limiter.interval)
+        else:
+            wall_seconds = audio_seconds * calibration['render_ratio'] / self.workers
+        self.last_estimate = {'requests': requests, 'cached': cached, 'speech_ms': speech_ms,
+                              'audio_seconds': audio_seconds, 'wall_seconds': wall_seconds}
         
-        print(f"Found {len(segments)} segments:")
-        dialogue_count = sum(1 for s in segments if s['type'] == 'dialogue')
-        narrative_count = len(segments) - dialogue_count
-        print(f"  {narrative_count} narrative segments")
-        print(f"  {dialogue_count} dialogue segments")
+        print(f"Estimate for: {file_path}" + (f" from segment {start[1]}" if start_at else ""))
+        self.print_segment_summary(stats)
+        print(f"\n{'voice':<12} {'speakers':>8} {'characters':>11} {'requests':>9} {'audio':>9}")
+        for name, voice in sorted(voices.items(), key=lambda item: -item[1]['chars']):
+            voice_seconds = voice['weighted'] * calibration['ms_per_char'] / 1000
+            print(f"{name:<12} {len(voice['speakers']):>8} {voice['chars']:>11,} "
+                  f"{voice['requests'] if self.use_google_tts else '-':>9} {format_duration(voice_seconds):>9}")
+        print(f"{'total':<12} {'':>8} {sum(v['chars'] for v in voices.values()):>11,} "
+              f"{requests if self.use_google_tts else '-':>9} {format_duration(audio_seconds):>9}")
         
-        # Show character analysis
-        characters = set(s['speaker'] for s in segments if s['speaker'] != 'narrator')
-        if characters:
-            print(f"  Characters detected: {', '.join(characters)}")
+        print()
+        if self.use_google_tts:
+            summary = f"TTS requests: {requests}"
+            if self.cache is not None:
+                summary += f" ({cached} already cached)"
+            print(summary)
+        print(f"Audio: about {format_duration(audio_seconds)}, including pauses between segments")
+        print(f"Render time: about {format_duration(wall_seconds)} with {self.workers} worker(s)")
+        if calibration['runs']:
+            print(f"Calibrated from the last {calibration['runs']} {backend} renders")
+        else:
+            print(f"No past {backend} renders to calibrate from yet; using typical figures")
+        print(f"(estimated in {time.perf_counter() - started:.2f}s)")
+        return True
+    
+    def process_file(self, file_path, output_path=None, preview=False, start_at=None, index_path=None):
+        """Process a text file and convert to speech"""
+        # Exports keep every segment, so collect them in one compact store
+        store = SegmentStore() if output_path and not preview else None
+        start = (0, 1, 0)
+        stamp = file_stamp(file_path)
+        # An export's own index from an earlier run can place --start-at
+        if index_path is None and output_path and output_path != STDOUT_PATH:
+            index_path = f"{output_path}.index.json"
+        try:
+            if start_at:
+                start = self.find_start(file_path, start_at, index_path)
+            parsed = self.iter_file_segments(file_path, store, start=start[0])
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return False
+        
+        print(f"Processing: {file_path}")
+        if start_at:
+            print(f"Starting at segment {start[1]} (byte {start[0]}, after {start[2]} chapter headings)")
+        stats = {}
+        self.last_stats = stats
+        self.requests_sent = self.requests_cached = self.split_fallbacks = 0
+        parsed = self.count_segments(parsed, stats)
         
+        try:
+            return self.process_segments(parsed, stats, output_path, preview, store, start,
+                                         (file_path, start[0], stamp))
+        except UnicodeDecodeError as e:
+            # Parsing is lazy, so undecodable text surfaces mid-run
+            print(f"Error reading file: {e}")
+            return False
+    
+    def process_segments(self, parsed, stats, output_path=None, preview=False, store=None, start=(0, 1, 0),
+                         source=None):
+        """Preview, export or play a stream of parsed segments"""
+        # start is (byte, segment number, chapters passed) where parsing began,
+        # and source (text file, that byte, its stamp) for the seek index
         if preview:
-            print("\n--- PREVIEW (first 3 segments) ---")
-            for i, segment in enumerate(segments[:3]):
+            # Show the first segments as soon as they are parsed and stop
+            # reading there; --estimate is the pass that counts a whole book
+            print(f"\n--- PREVIEW (first {PREVIEW_SEGMENTS} segments) ---")
+            for i, segment in enumerate(parsed):
                 print(f"{i+1}. [{segment['type'].upper()}] {segment['speaker']}: {segment['text'][:100]}...")
+                if i + 1 == PREVIEW_SEGMENTS:
+                    break
+            parsed.close()
+            print("\nRun with --estimate for segment, character and voice counts over the whole file")
             return True
         
         # Generate speech
         if output_path:
-            print(f"\n🎵 Generating audio file: {output_path}")
-            audio_segments = []
+            # Exports report progress against the total, so parse everything first
+            if store is None:
+                segments = list(parsed)
+            else:
+                deque(parsed, maxlen=0)
+                segments = store
+            self.print_segment_summary(stats)
             
-            for i, segment in enumerate(segments):
-                print(f"  Processing segment {i+1}/{len(segments)}...")
-                if self.use_google_tts:
-                    audio = self.text_to_speech_google(
-                        segment['text'], 
-                        segment['speaker'], 
-                        play_audio=False
-                    )
-                    if audio:
-                        audio_segments.append(audio)
-                        # Add pause between segments
-                        audio_segments.append(AudioSegment.silent(duration=800))
+            to_stdout = output_path == STDOUT_PATH
+            format = self.encoding['format']
+            print(f"\n🎵 Generating {format} audio: {'standard output' if to_stdout else output_path}")
+            print(f"Synthesizing with {self.workers} worker(s)")
+            start_time = time.perf_counter()
             
-            if audio_segments:
-                # Combine all segments
-                final_audio = sum(audio_segments)
-                final_audio.export(output_path, format="mp3")
+            # Journal finished segments so an interrupted run can --resume;
+            # audio already streamed to stdout cannot be taken back, so it is not journaled
+            journal = None if to_stdout else RenderJournal(f"{output_path}.work")
+            if journal is not None:
+                if journal.exists() and not self.resume:
+                    print(f"Discarding the unfinished render in {journal.work_dir} (use --resume to continue it)")
+                resumed = journal.open(resume=self.resume)
+                if resumed:
+                    print(f"Resuming: {resumed} segments already rendered in {journal.work_dir}")
+            self.journal = journal
+            self.render_failures = 0
+            self.synthesized_ms = self.synthesized_chars = 0
+            
+            entries = []
+            try:
+                if self.split_chapters:
+                    saved = self.export_chapters(segments, output_path, entries)
+                else:
+                    # Standard output can only be written as segments finish
+                    buffered = self.export_mode == 'buffered' and not to_stdout
+                    export = self.export_buffered if buffered else self.export_streaming
+                    rendered, starts = [], []
+                    saved = export(self.render_segments(segments, rendered), output_path, starts=starts)
+                    entries = list(zip(rendered, starts))
+            except BaseException:
+                if journal is not None:
+                    print(f"\nRender interrupted; {len(journal.records)} segments saved. "
+                          f"Run again with --resume to continue.")
+                raise
+            finally:
+                self.journal = None
+                if journal is not None:
+                    journal.close()
+            
+            if self.render_failures:
+                if journal is not None:
+                    print(f"{self.render_failures} segments failed; run again with --resume to retry only those")
+                else:
+                    print(f"{self.render_failures} segments failed and were left out")
+            elif saved and journal is not None:
+                journal.remove()
+            
+            elapsed = time.perf_counter() - start_time
+            if segments and elapsed > 0:
+                print(f"Synthesized {len(segments)} segments in {elapsed:.1f}s "
+                      f"({len(segments) / elapsed:.2f} segments/s)")
+            if self.history is not None and self.synthesized_chars:
+                self.history.append({
+                    'time': round(time.time()),
+                    'backend': self.tts_backend.name if self.use_google_tts else 'system',
+                    'workers': self.workers,
+                    'requests': self.requests_sent,
+                    'seconds': round(elapsed, 3),
+                    'speech_ms': self.synthesized_ms,
+                    'weighted_chars': round(self.synthesized_chars, 1),
+                })
+            if self.use_google_tts:
+                self.print_request_summary(len(segments))
+            
+            if saved and not to_stdout:
                 print(f"Audio saved to: {output_path}")
+                index_path = write_seek_index(output_path, format, segments, entries, start[1], start[2],
+                                              self.encoding['sample_rate'] or EXPORT_FRAME_RATE,
+                                              self.encoding['channels'] or EXPORT_CHANNELS,
+                                              source=source, voices=self.voice_order())
+                print(f"Seek index saved to: {index_path}")
             
         else:
             # Live playback
@@ -297,20 +3329,447 @@ class NovelReader:
             print("Each character will have a distinct voice and accent")
             print()
             
-            for i, segment in enumerate(segments):
-                speaker_info = f"[{segment['speaker']}]" if segment['speaker'] != 'narrator' else "[Narrator]"
-                print(f"{speaker_info}: {segment['text'][:70]}...")
-                
-                if self.use_google_tts:
-                    self.text_to_speech_google(segment['text'], segment['speaker'])
-                else:
+            if self.use_google_tts:
+                self.play_segments(parsed)
+                self.print_request_summary(stats['total'])
+            else:
+                for i, segment in enumerate(parsed):
+                    speaker_info = f"[{segment['speaker']}]" if segment['speaker'] != 'narrator' else "[Narrator]"
+                    print(f"{speaker_info}: {segment['text'][:70]}...")
                     self.text_to_speech_fallback(segment['text'], segment['speaker'])
-                
-                time.sleep(0.3)  # Brief pause between segments
+                    time.sleep(PLAYBACK_PAUSE)  # Brief pause between segments
+            
+            print()
+            self.print_segment_summary(stats)
+        
+        if self.cache is not None:
+            print(self.cache.summary())
         
         return True
 
-def main():
+def build_reader(args):
+    """Create a NovelReader configured from parsed command line arguments"""
+    use_google = not args.no_google
+    cache = None
+    # Stand-in audio from the fake backend is never worth caching
+    if use_google and not args.no_cache and args.tts_backend == 'google':
+        cache = SynthesisCache(args.cache_dir, max_bytes=args.cache_size * 1024 ** 2)
+    
+    speech_verbs = DEFAULT_SPEECH_VERBS
+    if args.speech_verbs:
+        try:
+            speech_verbs = DEFAULT_SPEECH_VERBS + tuple(load_speech_verbs(args.speech_verbs))
+        except OSError as e:
+            raise ValueError(f"Error reading speech verbs: {e}")
+    
+    voice_effects = None
+    if args.voice_effects:
+        try:
+            voice_effects = load_voice_effects(args.voice_effects)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Error reading voice effects: {e}")
+    
+    if args.names_file and not os.path.exists(args.names_file):
+        raise ValueError(f"Error: Names file '{args.names_file}' not found.")
+    
+    extension = Path(str(args.output or '')).suffix
+    if args.output and args.output != STDOUT_PATH and extension and not args.format \
+            and not format_for_path(args.output):
+        raise ValueError(f"Error: no output format is named {extension}; choose one with --format "
+                         f"({', '.join(sorted(OUTPUT_FORMATS))})")
+    encoding = {
+        'format': args.format or format_for_path(args.output) or DEFAULT_ENCODING['format'],
+        'bitrate': args.bitrate,
+        'sample_rate': args.sample_rate,
+        'channels': args.channels,
+    }
+    if args.output == STDOUT_PATH and encoding['format'] == 'wav':
+        # A WAV header holds the data length, which a pipe cannot go back and fill in
+        raise ValueError("Error: --output - cannot stream wav; use --format pcm or flac")
+    if args.split_chapters and encoding['format'] != 'mp3':
+        raise ValueError("Error: --split-chapters joins MP3 frames, so it needs --format mp3")
+    if args.sample_rate is not None and args.sample_rate <= 0:
+        raise ValueError("Error: --sample-rate must be a positive number of Hz")
+    
+    # Offline rendering is CPU bound, so default to one render process per core
+    workers = args.workers or (4 if use_google else os.cpu_count() or 1)
+    
+    if args.tts_backend == 'google':
+        tts_backend = GoogleTTSBackend(
+            endpoint=args.tts_endpoint,
+            max_connections=workers,
+            timeout=(min(HTTP_CONNECT_TIMEOUT, args.http_timeout), args.http_timeout)
+        )
+    else:
+        tts_backend = TTS_BACKENDS[args.tts_backend]()
+    
+    return NovelReader(
+        use_google_tts=use_google,
+        cache=cache,
+        workers=workers,
+        rate_limit=args.rate_limit,
+        max_retries=args.retries,
+        export_mode=args.export_mode,
+        prefetch=args.prefetch,
+        split_chapters=args.split_chapters,
+        tts_backend=tts_backend,
+        profiler=Profiler(enabled=args.profile or bool(args.trace)),
+        speech_verbs=speech_verbs,
+        name_lexicon=NameLexicon.shared(args.names_file),
+        voice_effects=voice_effects,
+        coalesce=args.coalesce,
+        resume=args.resume,
+        encoding=encoding,
+        history=RunHistory(os.path.join(args.cache_dir or default_cache_dir(), 'runs.jsonl'))
+    )
+
+
+def find_batch_files(spec):
+    """Text files for --batch: every *.txt in a directory, or a glob pattern"""
+    if os.path.isdir(spec):
+        return sorted(glob.glob(os.path.join(spec, '*.txt')))
+    return sorted(path for path in glob.glob(spec) if os.path.isfile(path))
+
+
+# Per-process reader for batch workers, built once by the pool initializer
+_batch_reader = None
+
+
+def _init_batch_worker(args, voice_assignments):
+    global _batch_reader
+    _batch_reader = build_reader(args)
+    if voice_assignments:
+        _batch_reader.voice_assignments.update(voice_assignments)
+
+
+def _run_batch_file(file_path, output_path, preview):
+    """Process one batch file in a worker, returning a result summary"""
+    start_time = time.perf_counter()
+    log = io.StringIO()
+    error = ''
+    try:
+        with contextlib.redirect_stdout(log):
+            ok = _batch_reader.process_file(file_path, output_path=output_path, preview=preview)
+        if not ok:
+            # process_file reports its own errors; keep the last line
+            lines = log.getvalue().strip().splitlines()
+            error = lines[-1] if lines else 'processing failed'
+    except Exception as e:
+        ok = False
+        error = f"{type(e).__name__}: {e}"
+    return {
+        'file': file_path,
+        'ok': ok,
+        'error': error,
+        'segments': getattr(_batch_reader, 'last_stats', {}).get('total', 0),
+        'seconds': time.perf_counter() - start_time,
+    }
+
+
+def batch_output_path(file_path, common_dir, output_dir, format):
+    """Where --batch writes a file's audio: beside it, or under output_dir at its path below common_dir"""
+    # Keeping the layout below the inputs' common directory stops
+    # a/chapter1.txt and b/chapter1.txt writing the same output
+    base = os.path.splitext(os.path.abspath(file_path))[0]
+    if output_dir:
+        base = os.path.join(output_dir, os.path.relpath(base, common_dir))
+    return f"{base}.{format}"
+
+
+# Options a batch cannot honour: each applies to one --file run
+BATCH_UNSUPPORTED_OPTIONS = (('start_at', '--start-at'), ('profile', '--profile'), ('trace', '--trace'),
+                             ('estimate', '--estimate'), ('watch', '--watch'))
+
+
+def batch_worker_args(args, jobs):
+    """The options each of jobs batch processes builds its reader from"""
+    worker_args = copy.copy(args)
+    # Each process limits its own requests, so give each an equal share of
+    # --rate-limit to hold the batch as a whole to it
+    if args.rate_limit:
+        worker_args.rate_limit = args.rate_limit / jobs
+    # System TTS renders in a process pool per reader; share the cores out
+    # rather than giving every batch process one render process per core
+    if args.no_google and not args.workers:
+        worker_args.workers = max(1, (os.cpu_count() or 1) // jobs)
+    return worker_args
+
+
+def run_batch(args, reader):
+    """Fan a directory or glob of manuscripts out across a process pool"""
+    unsupported = [flag for name, flag in BATCH_UNSUPPORTED_OPTIONS if getattr(args, name, None)]
+    if unsupported:
+        print(f"Error: {', '.join(unsupported)} cannot be used with --batch; run them on a single --file")
+        return 1
+    
+    files = find_batch_files(args.batch)
+    if not files:
+        print(f"Error: No text files match '{args.batch}'")
+        return 1
+    common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    
+    # Assign voices across the whole series up front, in file order, so a
+    # character keeps the same voice in every chapter and every worker
+    voice_assignments = {}
+    if reader.use_google_tts and not args.preview:
+        for file_path in files:
+            try:
+                for segment in reader.iter_file_segments(file_path):
+                    reader.assign_google_voice(segment['speaker'])
+            except (OSError, UnicodeDecodeError):
+                continue  # The worker reports the failure for this file
+        voice_assignments = reader.voice_assignments
+    
+    jobs = min(args.jobs or os.cpu_count() or 1, len(files))
+    sizes = {path: max(1, os.path.getsize(path)) for path in files}
+    total_bytes = sum(sizes.values())
+    print(f"Batch: {len(files)} files across {jobs} processes")
+    if voice_assignments:
+        print(f"  {len(voice_assignments)} characters share voices across the series")
+    
+    worker_args = batch_worker_args(args, jobs)
+    if worker_args.rate_limit:
+        print(f"  Rate limit: {worker_args.rate_limit:g} requests/s per process")
+    if args.no_google:
+        print(f"  {worker_args.workers} render process(es) per file")
+    print()
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    start_time = time.perf_counter()
+    done_bytes = 0
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                             initargs=(worker_args, voice_assignments)) as executor:
+        futures = {}
+        for file_path in files:
+            output_path = None
+            if not args.preview:
+                output_path = batch_output_path(file_path, common_dir, args.output_dir, reader.encoding['format'])
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            futures[executor.submit(_run_batch_file, file_path, output_path, args.preview)] = file_path
+        
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died; record it and keep going
+                result = {'file': file_path, 'ok': False, 'error': f"{type(e).__name__}: {e}",
+                          'segments': 0, 'seconds': 0.0}
+            results.append(result)
+            
+            done_bytes += sizes[file_path]
+            elapsed = time.perf_counter() - start_time
+            eta = elapsed * (total_bytes - done_bytes) / done_bytes
+            status = "ok" if result['ok'] else f"FAILED: {result['error']}"
+            print(f"[{len(results)}/{len(files)}] {os.path.basename(file_path)}: {status} "
+                  f"({result['seconds']:.1f}s, ETA {eta:.0f}s)")
+    
+    elapsed = time.perf_counter() - start_time
+    failed = [r for r in results if not r['ok']]
+    segments = sum(r['segments'] for r in results)
+    print(f"\nBatch finished in {elapsed:.1f}s: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    if elapsed > 0:
+        print(f"  {len(results) / elapsed:.2f} files/s, {segments / elapsed:.1f} segments/s")
+    for result in failed:
+        print(f"  failed: {result['file']}")
+    
+    return 1 if failed else 0
+
+
+# Options that only matter to a single daemon job; all the others select
+# (and if need be build) the warm reader the job runs on
+DAEMON_JOB_OPTIONS = ('file', 'output', 'preview', 'estimate', 'start_at', 'index', 'list_voices', 'profile',
+                      'trace', 'serve', 'socket', 'no_daemon')
+
+# Path options, resolved against the client's working directory
+DAEMON_PATH_OPTIONS = ('file', 'output', 'index', 'names_file', 'speech_verbs', 'voice_effects',
+                       'cache_dir', 'trace')
+
+
+class ContextStream:
+    """sys.stdout or sys.stderr stand-in that sends each daemon job's output to its own client"""
+
+    def __init__(self, default):
+        self.default = default
+        # Threads a job starts run in a copy of its context, so they write to its client too
+        self.stream = contextvars.ContextVar('stream', default=None)
+
+    @contextlib.contextmanager
+    def redirect(self, stream):
+        """Send this context's output to stream for the duration of the block"""
+        token = self.stream.set(stream)
+        try:
+            yield
+        finally:
+            self.stream.reset(token)
+
+    def target(self):
+        return self.stream.get() or self.default
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+class ClientStream:
+    """Writable stream that forwards text to a daemon client as JSON lines"""
+
+    def __init__(self, wfile, key='out', lock=None):
+        self.wfile = wfile
+        self.key = key
+        # A job's worker threads and its two streams share one connection
+        self.lock = lock or threading.Lock()
+
+    def send(self, message):
+        data = json.dumps(message).encode('utf-8') + b'\n'
+        with self.lock:
+            self.wfile.write(data)
+
+    def write(self, text):
+        if text:
+            self.send({self.key: text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """One CLI invocation: argv and working directory in, output and exit code back"""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        stream = ClientStream(self.wfile)
+        daemon = self.server.reader_daemon
+        try:
+            with daemon.stdout.redirect(stream), daemon.stderr.redirect(ClientStream(self.wfile, 'err', stream.lock)):
+                code = daemon.run(request.get('argv', []), request.get('cwd') or os.getcwd())
+            stream.send({'exit': code})
+        except OSError:
+            pass  # The client went away; its job has been abandoned
+
+
+class ReaderDaemon:
+    """Run CLI jobs concurrently on warm NovelReaders behind a Unix socket"""
+
+    def __init__(self, parser, socket_path):
+        self.parser = parser
+        self.socket_path = socket_path
+        self.readers = {}
+        # One set of voice assignments for every job, so characters keep
+        # their voices whichever chapter or options a job uses
+        self.voice_assignments = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.stdout = None
+        self.stderr = None
+
+    def reader_for(self, args):
+        """A job reader on the warm reader for these options, built on first use"""
+        key = tuple(sorted(
+            (name, repr(value)) for name, value in vars(args).items() if name not in DAEMON_JOB_OPTIONS
+        ))
+        with self.lock:
+            reader = self.readers.get(key)
+            if reader is None:
+                reader = build_reader(args)
+                reader.voice_assignments = self.voice_assignments
+                self.warm_up(reader)
+                self.readers[key] = reader
+        return reader.job_copy(Profiler(enabled=args.profile or bool(args.trace)))
+
+    def warm_up(self, reader):
+        """Pay the one-off costs a cold CLI run would pay on its first segment"""
+        reader.name_lexicon.ensure_loaded()
+        reader.speaker_attributor.extract('"" x said')
+        if reader.use_google_tts:
+            with contextlib.suppress(ImportError):
+                _pydub()
+            # Job copies share the backend's connection pool once it exists
+            if hasattr(reader.tts_backend, 'session'):
+                reader.tts_backend.session()
+
+    def run(self, argv, cwd):
+        """Run one client's command line and return its exit code"""
+        try:
+            args = self.parser.parse_args(argv)
+            for name in DAEMON_PATH_OPTIONS:
+                value = getattr(args, name, None)
+                if value:
+                    setattr(args, name, os.path.join(cwd, os.path.expanduser(value)))
+            try:
+                reader = self.reader_for(args)
+            except ValueError as e:
+                print(e)
+                return 1
+            return run_cli(args, reader, self.parser)
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"Daemon job failed: {type(e).__name__}: {e}")
+            return 1
+
+    def listen(self):
+        """Bind the socket, replacing a stale one left by a daemon that died"""
+        if os.path.exists(self.socket_path):
+            if run_in_daemon(self.socket_path, None) is not None:
+                raise OSError(f"A daemon is already listening on {self.socket_path}")
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        # Only this user may connect: jobs read and write files as the daemon
+        umask = os.umask(0o077)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, DaemonRequestHandler)
+        finally:
+            os.umask(umask)
+        self.server.daemon_threads = True
+        self.server.reader_daemon = self
+        self.stdout = ContextStream(sys.stdout)
+        self.stderr = ContextStream(sys.stderr)
+        sys.stdout = self.stdout
+        sys.stderr = self.stderr
+
+    def close(self):
+        self.server.server_close()
+        sys.stdout = self.stdout.default
+        sys.stderr = self.stderr.default
+        with contextlib.suppress(OSError):
+            os.remove(self.socket_path)
+
+    def serve(self, args):
+        """Build the reader for the daemon's own options, then serve until interrupted"""
+        if not hasattr(socket, 'AF_UNIX'):
+            print("Error: --serve needs Unix domain sockets, which this platform lacks")
+            return 1
+        try:
+            self.reader_for(args)
+            self.listen()
+        except (OSError, ValueError) as e:
+            print(e)
+            return 1
+        
+        print(f"NovelReader daemon listening on {self.socket_path} (Ctrl-C to stop)")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nDaemon stopped")
+        finally:
+            self.close()
+        return 0
+
+
+def build_parser():
+    """The command line parser, shared by the CLI and the daemon"""
     parser = argparse.ArgumentParser(
         description="NovelReader CLI - AI-powered text-to-speech with Google TTS",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -321,27 +3780,155 @@ Examples:
   %(prog)s --file story.txt --output story.mp3 # Generate MP3 audiobook
   %(prog)s --list-voices                       # Show voice information
   %(prog)s --file novel.txt --no-google        # Use system TTS instead
+  %(prog)s --batch chapters/ --output-dir out/ # Render every chapter in parallel
+  %(prog)s --serve                             # Keep a warm reader running for later commands
         """
     )
     
     parser.add_argument('--file', '-f', 
                        help='Text file to process')
     parser.add_argument('--output', '-o', 
-                       help='Output MP3 file path')
+                       help='Output audio file path, or - to stream the encoded audio to stdout '
+                            '(progress then goes to stderr)')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS),
+                       help='Output codec (default: from the --output extension, else mp3; an '
+                            'extension that names no codec, e.g. .m4a, needs --format). wav cannot '
+                            'be streamed to --output -')
+    parser.add_argument('--bitrate',
+                       help='Bitrate for mp3, opus and ogg output, e.g. 64k (default: the encoder\'s)')
+    parser.add_argument('--sample-rate', type=int,
+                       help=f'Output sample rate in Hz (default: {EXPORT_FRAME_RATE}, as Google TTS returns)')
+    parser.add_argument('--channels', type=int, choices=[1, 2],
+                       help='1 for mono, 2 for stereo output (default: mono)')
+    parser.add_argument('--batch',
+                       help='Directory of .txt files or a glob pattern to render in parallel')
+    parser.add_argument('--output-dir',
+                       help='Where --batch writes one audio file per input, keeping the layout of '
+                            'inputs from several directories (default: next to each input)')
+    parser.add_argument('--jobs', type=int,
+                       help='Processes used by --batch (default: one per CPU core)')
     parser.add_argument('--preview', '-p', action='store_true',
-                       help='Preview text analysis without generating audio')
+                       help='Show how the first segments are parsed, without reading the rest '
+                            'of the file or generating audio')
+    parser.add_argument('--estimate', action='store_true',
+                       help='Report the TTS requests, characters per voice, audio length and render '
+                            'time --file would take, without rendering')
+    parser.add_argument('--start-at',
+                       help='Begin at a segment number, a chapter ("chapter 12") or the first '
+                            'paragraph containing some text, skipping everything before it')
+    parser.add_argument('--index',
+                       help='Seek index (an export\'s <output>.index.json) to find --start-at in instead of '
+                            'scanning --file, e.g. for playback; an export uses its own index by default. '
+                            'Ignored unless it was written for the current --file')
+    parser.add_argument('--watch', '-w', action='store_true',
+                       help='Keep running and, each time --file is saved, re-synthesize only the '
+                            'paragraphs that changed, patch --output and replay the edit. MP3 output '
+                            'is re-joined frame-wise; any other --format re-encodes the whole book '
+                            'on every save')
+    parser.add_argument('--no-replay', action='store_true',
+                       help='With --watch, update --output without playing the edited passage')
     parser.add_argument('--list-voices', '-lv', action='store_true',
                        help='Show available voice options')
     parser.add_argument('--no-google', action='store_true',
                        help='Use system TTS instead of Google TTS')
+    parser.add_argument('--names-file',
+                       help='Name lexicon for voice assignment: "name,category" per line '
+                            '(categories: female, male, child, elderly)')
+    parser.add_argument('--speech-verbs',
+                       help='File of extra dialogue verbs, one per line (e.g. "hollered", "called over")')
+    parser.add_argument('--voice-effects',
+                       help='JSON file of effects per voice, e.g. {"female_1": {"pitch": 1, "treble_db": 2}} '
+                            '(effects: speed, pitch, tempo, gain_db, bass_db, treble_db)')
+    parser.add_argument('--tts-backend', choices=sorted(TTS_BACKENDS), default='google',
+                       help='Speech source: google (default) or fake, an offline tone generator '
+                            'sized to the text for testing and benchmarking')
+    parser.add_argument('--tts-endpoint', default=DEFAULT_TTS_ENDPOINT,
+                       help='Base URL for Google TTS requests, e.g. a local mock server; '
+                            '{tld} is replaced by the voice accent (default: %(default)s)')
+    parser.add_argument('--http-timeout', type=float, default=HTTP_READ_TIMEOUT,
+                       help='Seconds to wait for a TTS response before retrying (default: %(default)s)')
+    parser.add_argument('--workers', '-j', type=int,
+                       help='Number of segments to synthesize concurrently with --output '
+                            '(default: 4, or one render process per CPU core with --no-google, '
+                            'shared among the --batch processes)')
+    parser.add_argument('--coalesce', action='store_true',
+                       help='Pack consecutive same-voice segments that end on a full sentence into '
+                            'full-size TTS requests, split back apart at the pauses (default: one '
+                            'request per segment)')
+    parser.add_argument('--rate-limit', type=float,
+                       help='Maximum TTS HTTP requests per second across all workers (and all --batch processes)')
+    parser.add_argument('--retries', type=int, default=3,
+                       help='Retries with exponential backoff for TTS requests that failed on the network, '
+                            'a timeout, throttling or a server error (default: 3)')
+    parser.add_argument('--prefetch', type=int, default=3,
+                       help='Segments to synthesize ahead during live playback; 0 disables (default: 3)')
+    parser.add_argument('--export-mode', choices=['stream', 'buffered'], default='stream',
+                       help='stream: encode segments as they finish with flat memory use (default); '
+                            'buffered: join the whole book in memory before encoding')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted --output render from its work directory '
+                            '(<output>.work) instead of starting over')
+    parser.add_argument('--split-chapters', action='store_true',
+                       help='Encode each chapter to its own MP3 part and join them without re-encoding; '
+                            'unchanged chapters are reused on the next run')
+    parser.add_argument('--cache-dir',
+                       help='Directory for the synthesized audio cache (default: ~/.cache/novelreader)')
+    parser.add_argument('--cache-size', type=int, default=2048,
+                       help='Maximum cache size in MB before least recently used audio is evicted (default: 2048)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Always resynthesize instead of reusing cached audio')
+    parser.add_argument('--profile', action='store_true',
+                       help='Time each pipeline stage per segment and print a summary table')
+    parser.add_argument('--trace',
+                       help='Also write the profile as a Chrome trace-event JSON file (implies --profile)')
+    parser.add_argument('--serve', action='store_true',
+                       help='Run as a daemon that keeps a warm reader, its caches and voice assignments '
+                            'in memory; later --preview, --output and --list-voices runs are sent to it')
+    parser.add_argument('--socket',
+                       help='Unix socket for --serve and its clients (default: <cache dir>/daemon.sock)')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Run in this process even if a daemon is listening')
     parser.add_argument('--version', action='version', version='NovelReader 2.0 with Google TTS')
+    return parser
+
+
+def main(argv=None, forward=True):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    socket_path = args.socket or default_socket_path()
     
-    args = parser.parse_args()
+    if args.serve:
+        return ReaderDaemon(parser, socket_path).serve(args)
     
-    # Initialize reader
-    use_google = not args.no_google
-    reader = NovelReader(use_google_tts=use_google)
+    # Preview, export and voice listing go to a warm daemon when one is
+    # running; live playback and batches always run here
+    forwardable = args.list_voices or (args.file and (args.preview or args.estimate or args.output))
+    # The daemon relays text, so audio for stdout is always encoded here
+    to_stdout = args.output == STDOUT_PATH
+    if forward and forwardable and not (args.no_daemon or args.batch or args.watch or to_stdout):
+        code = run_in_daemon(socket_path, sys.argv[1:] if argv is None else argv)
+        if code is not None:
+            return code
     
+    # Keep stdout clean for the audio when streaming it
+    with contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext():
+        try:
+            reader = build_reader(args)
+        except ValueError as e:
+            print(e)
+            return 1
+        try:
+            return run_cli(args, reader, parser)
+        except BrokenPipeError:
+            if not to_stdout:
+                raise
+            print("Stopped: whatever was reading the audio closed standard output")
+            return 1
+
+
+def run_cli(args, reader, parser):
+    """Carry out one command line invocation with a ready reader"""
+    use_google = not args.no_google
     print("🎭 NovelReader CLI 2.0 - Enhanced Text-to-Speech")
     print("=" * 55)
     
@@ -350,9 +3937,12 @@ Examples:
         reader.list_voice_options()
         return 0
     
+    if args.batch:
+        return run_batch(args, reader)
+    
     # Validate that we have a file for other operations
     if not args.file:
-        print("Error: --file is required unless using --list-voices")
+        print("Error: --file is required unless using --list-voices or --batch")
         parser.print_help()
         return 1
     
@@ -369,12 +3959,31 @@ Examples:
     
     print()
     
+    if args.output == STDOUT_PATH and (args.watch or args.split_chapters or args.preview):
+        print("Error: --output - streams one render; it cannot be used with --watch, "
+              "--split-chapters or --preview")
+        return 1
+    
+    if args.estimate:
+        return 0 if reader.estimate_file(args.file, start_at=args.start_at, index_path=args.index) else 1
+    
+    if args.watch:
+        return 0 if reader.watch_file(args.file, args.output, replay=not args.no_replay) else 1
+    
     success = reader.process_file(
         file_path=args.file,
         output_path=args.output,
-        preview=args.preview
+        preview=args.preview,
+        start_at=args.start_at,
+        index_path=args.index
     )
     
+    if reader.profiler.enabled:
+        reader.profiler.print_summary()
+        if args.trace:
+            reader.profiler.write_trace(args.trace)
+            print(f"Trace written to: {args.trace}")
+    
     if success:
         print("\nProcessing completed successfully!")
         if not args.preview and use_google:
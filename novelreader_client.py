@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+NovelReader CLI entry point - sends a command line to a running --serve
+daemon without loading the reader, its parser or the audio stack, and
+otherwise hands it to novelreader.main
+"""
+
+import json
+import os
+import socket
+import sys
+
+# --output - streams the encoded audio to standard output
+STDOUT_PATH = '-'
+
+# Every option novelreader's parser takes, by full name, so a command line
+# can be read without it. Anything else (an abbreviation, --help, a typo)
+# goes to the full parser
+VALUE_OPTIONS = frozenset((
+    '--file', '--output', '--format', '--bitrate', '--sample-rate', '--channels', '--batch',
+    '--output-dir', '--jobs', '--start-at', '--index', '--names-file', '--speech-verbs', '--voice-effects',
+    '--tts-backend', '--tts-endpoint', '--http-timeout', '--workers', '--rate-limit', '--retries',
+    '--prefetch', '--export-mode', '--cache-dir', '--cache-size', '--trace', '--socket',
+))
+FLAG_OPTIONS = frozenset((
+    '--preview', '--estimate', '--watch', '--no-replay', '--list-voices', '--no-google', '--coalesce',
+    '--resume', '--split-chapters', '--no-cache', '--profile', '--serve', '--no-daemon',
+))
+SHORT_OPTIONS = {'-f': '--file', '-o': '--output', '-p': '--preview', '-w': '--watch',
+                 '-lv': '--list-voices', '-j': '--workers'}
+
+
+def default_cache_dir():
+    """Return the per-user directory used for the synthesis cache"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'novelreader')
+
+
+def default_socket_path():
+    """Where --serve listens and the CLI looks for a running daemon"""
+    return os.path.join(default_cache_dir(), 'daemon.sock')
+
+
+def read_options(argv):
+    """Map each option in argv to its value (True for flags), or None if argv needs the full parser"""
+    options = {}
+    tokens = iter(argv)
+    for token in tokens:
+        name, equals, value = token.partition('=') if token.startswith('--') else (token, '', '')
+        name = SHORT_OPTIONS.get(name, name)
+        if name in VALUE_OPTIONS:
+            if not equals:
+                value = next(tokens, None)
+                if value is None:
+                    return None
+            options[name] = value
+        elif name in FLAG_OPTIONS and not equals:
+            options[name] = True
+        else:
+            return None
+    return options
+
+
+def forwardable(options):
+    """Whether a command line can run in the daemon"""
+    # Preview, export and voice listing go to a warm daemon when one is
+    # running; live playback and batches always run here, and the daemon
+    # relays text, so audio for stdout is always encoded here
+    if options is None or any(options.get(name) for name in ('--serve', '--no-daemon', '--batch', '--watch')):
+        return False
+    if options.get('--output') == STDOUT_PATH:
+        return False
+    job = options.get('--preview') or options.get('--estimate') or options.get('--output')
+    return bool(options.get('--list-voices') or (options.get('--file') and job))
+
+
+def run_in_daemon(socket_path, argv):
+    """Run argv in the daemon at socket_path; its exit code, or None if no daemon answers"""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None  # A stale socket from a daemon that is no longer running
+
+    with client, client.makefile('rb') as replies:
+        if argv is None:
+            return 0  # Only checking that a daemon is listening
+        client.sendall(json.dumps({'argv': argv, 'cwd': os.getcwd()}).encode('utf-8') + b'\n')
+        for line in replies:
+            message = json.loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'err' in message:
+                sys.stderr.write(message['err'])
+                sys.stderr.flush()
+            elif 'exit' in message:
+                return message['exit']
+    print("Error: the daemon closed the connection before finishing")
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = read_options(argv)
+    if forwardable(options):
+        code = run_in_daemon(options.get('--socket') or default_socket_path(), argv)
+        if code is not None:
+            return code
+
+    import novelreader
+    return novelreader.main(argv, forward=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/firdausaris/novelreader-cli",
     packages=find_packages(),
+    py_modules=["novelreader", "novelreader_client"],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -32,9 +33,13 @@ setup(
     ],
     python_requires=">=3.7",
     install_requires=requirements,
+    extras_require={
+        # Vectorized character effects, and the pitch, tempo and EQ effects
+        "effects": ["numpy>=1.17"],
+    },
     entry_points={
         "console_scripts": [
-            "novelreader=novelreader:main",
+            "novelreader=novelreader_client:main",
         ],
     },
     keywords="text-to-speech, novel, writing, cli, tts, audio, accessibility",
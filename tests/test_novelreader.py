@@ -0,0 +1,839 @@
+"""Offline tests for novelreader, using the fake TTS backend instead of Google"""
+
+import array
+import io
+import json
+import shutil
+import urllib.parse
+import wave
+from collections.abc import Sequence
+
+import pytest
+from pydub import AudioSegment
+
+import novelreader_client
+
+from benchmark import MockTTSServer, offline_reader
+from novelreader import (
+    ContextStream, EffectsProcessor, FakeTTSBackend, GoogleTTSBackend, Mp3Decoder, NovelReader,
+    RenderJournal, RunHistory, SpeakerAttributor, SynthesisCache,
+    DEFAULT_SPEECH_VERBS, EXPORT_FRAME_RATE, GTTS_MAX_CHARS, PARSE_CHUNK_SIZE, PREVIEW_SEGMENTS,
+    SEGMENT_PAUSE_MS, TTS_AUDIO_PATTERN,
+    batch_output_path, batch_worker_args, build_parser, build_reader, is_chapter_heading, is_transient_error,
+    iter_paragraphs, join_mp3_files, mp3_duration_ms, mp3_frame_length, run_batch, seek_offsets,
+    gtts_request_count, split_chapters, submit_ordered,
+)
+
+
+def tone(ms, frame_rate=EXPORT_FRAME_RATE):
+    """ms of a square wave loud enough never to count as a pause"""
+    period = b'\x00\x20' * 20 + b'\x00\xe0' * 20
+    size = int(frame_rate * ms / 1000) * 2
+    return AudioSegment(data=(period * (size // len(period) + 1))[:size], sample_width=2,
+                        frame_rate=frame_rate, channels=1)
+
+
+# MPEG-2 Layer III, 24 kHz mono at 32 kbps: 96-byte frames of 24 ms
+MP3_HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+MP3_FRAME_MS = 24.0
+
+
+def mp3_frame(fill=0):
+    return MP3_HEADER + bytes([fill]) * 92
+
+
+def mp3_info_frame():
+    # Mono MPEG-2 side information is 9 bytes, then the Xing/Info tag
+    return MP3_HEADER + bytes(9) + b'Info' + bytes(79)
+
+
+def id3v2_tag(size=20):
+    return b'ID3\x03\x00\x00' + bytes([0, 0, 0, size]) + bytes(size)
+
+
+BOOK = """Chapter 1
+
+The rain had not stopped for three days.
+
+Part of the roof had already given way.
+
+"Is anyone home?" Sarah called out.
+
+"Over here," John replied.
+
+Chapter 2
+
+The river was rising.
+
+"We should leave," Mary whispered.
+
+Epilogue
+
+They never went back.
+"""
+
+
+class FailingTTSBackend(FakeTTSBackend):
+    """Fails for any text containing one of failing, as a request rejected for good would"""
+
+    def __init__(self, failing=()):
+        super().__init__()
+        self.failing = failing
+        self.texts = []
+
+    def synthesize(self, text, voice_config):
+        self.texts.append(text)
+        if any(words in text for words in self.failing):
+            raise ValueError('rejected')
+        return super().synthesize(text, voice_config)
+
+
+def write_book(tmp_path, text=BOOK, newline='\n'):
+    path = tmp_path / 'book.txt'
+    path.write_bytes(text.replace('\n', newline).encode('utf-8'))
+    return path
+
+
+# Speaker attribution
+
+@pytest.mark.parametrize('text, speaker', [
+    ('"Is anyone home?" Sarah called out.', 'sarah'),
+    ('"Over here," John replied.', 'john'),
+    ('Mary whispered, "We should leave."', 'mary'),
+    ('"Wait," Tom called   back.', 'tom'),
+    ('"Nobody is named here."', 'unknown'),
+])
+def test_speaker_attribution(text, speaker):
+    assert SpeakerAttributor().extract(text) == speaker
+
+
+def test_speaker_attribution_extra_verbs():
+    text = '"Run!" Jack hollered.'
+    assert SpeakerAttributor().extract(text) == 'unknown'
+    assert SpeakerAttributor(DEFAULT_SPEECH_VERBS + ('hollered',)).extract(text) == 'jack'
+
+
+# Paragraph parsing
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+def test_iter_paragraphs_line_endings_across_chunk_edges(tmp_path, newline):
+    path = write_book(tmp_path, 'One line\nstill one.\n\nCafé two.\n\n\n\nthree', newline)
+    expected = ['One line\nstill one.', 'Café two.', '', 'three']
+    # Every chunk size puts a chunk edge inside each line ending and the é
+    for chunk_size in range(1, path.stat().st_size + 2):
+        assert list(iter_paragraphs(path, chunk_size=chunk_size)) == expected
+
+
+def test_iter_paragraphs_from_offset(tmp_path):
+    path = write_book(tmp_path, 'first\r\n\r\nsecond\r\n\r\nthird', '\n')
+    start = path.read_bytes().index(b'second')
+    assert list(iter_paragraphs(path, chunk_size=3, start=start)) == ['second', 'third']
+
+
+def test_parse_text_returns_read_only_segments():
+    reader = offline_reader()
+    segments = reader.parse_text(BOOK)
+    assert isinstance(segments, Sequence)
+    assert segments.index(segments[3]) == 3 and list(reversed(segments))[-1] == segments[0]
+    dialogue = next(segment for segment in segments if segment['type'] == 'dialogue')
+    assert dialogue['text'] == reader.extract_dialogue_text(dialogue['original'])
+    with pytest.raises(TypeError):
+        dialogue['text'] = 'changed'
+
+
+def test_preview_stops_reading_after_its_segments(tmp_path, capsys):
+    # Undecodable text past the first chunk is never reached
+    path = write_book(tmp_path)
+    with open(path, 'ab') as f:
+        f.write(b'\n\n' + b'More text. ' * (PARSE_CHUNK_SIZE // 10) + b'\xff\xfe')
+    reader = offline_reader()
+    assert reader.process_file(path, preview=True)
+    assert reader.last_stats['total'] == PREVIEW_SEGMENTS
+    assert 'narrator: Part of the roof' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('text', [
+    'Chapter 1', 'CHAPTER 12: The Storm', 'Part IV', 'Book One', 'Chapter XLII', 'part ii.',
+    'Prologue', 'Epilogue: Ten Years Later', 'Interlude', 'Chapter Twenty-One',
+])
+def test_chapter_headings(text):
+    assert is_chapter_heading(text)
+
+
+@pytest.mark.parametrize('text', [
+    'Part of me wanted to stay.', 'Book in hand, she left.', 'Chapter and verse, he knew it all.',
+    'Prologue to a disaster, that dinner was.', 'Part mild, part wild.', 'Epilogues bore me.',
+    'Part 2 of the plan was simple: ' + 'wait for the guards to change, then run. ' * 3,
+])
+def test_not_chapter_headings(text):
+    assert not is_chapter_heading(text)
+
+
+def test_split_chapters_ignores_prose_that_looks_like_a_heading():
+    reader = offline_reader()
+    segments = reader.parse_text("Chapter 1\n\nPart of me stayed.\n\nBook in hand, I left.\n\n"
+                                 "Chapter 2\n\nThe end.")
+    assert [len(chapter) for chapter in split_chapters(segments)] == [3, 2]
+
+
+# Request planning and coalescing
+
+def test_plan_requests_one_per_segment_without_coalescing():
+    reader = offline_reader(coalesce=False)
+    segments = reader.parse_text(BOOK)
+    requests = list(reader.plan_requests(segments))
+    assert [request['text'] for request in requests] == [segment['text'] for segment in segments]
+    assert [request['parts'][0][0] for request in requests] == list(range(len(segments)))
+
+
+def test_plan_requests_packs_same_voice_runs():
+    reader = offline_reader(coalesce=True)
+    segments = reader.parse_text('\n\n'.join(f"Short sentence number {n}." for n in range(12)))
+    requests = list(reader.plan_requests(segments))
+    assert len(requests) < len(segments)
+    assert all(len(request['text']) <= GTTS_MAX_CHARS for request in requests)
+    # Every segment appears once, in document order
+    indexes = [i for request in requests for i, _, _ in request['parts']]
+    assert indexes == list(range(len(segments)))
+    # The text is sent as written
+    assert ' '.join(request['text'] for request in requests) == ' '.join(segment['text'] for segment in segments)
+
+
+def test_plan_requests_packs_only_after_a_full_sentence():
+    reader = offline_reader(coalesce=True)
+    segments = reader.parse_text("Chapter 1\n\nIt was late.\n\nThe rain, at last, had stopped")
+    requests = list(reader.plan_requests(segments))
+    assert [request['text'] for request in requests] == [
+        "Chapter 1", "It was late. The rain, at last, had stopped"]
+
+
+@pytest.mark.parametrize('coalesce', [False, True])
+def test_segment_is_yielded_once_its_last_request_returns(coalesce):
+    backend = FailingTTSBackend()
+    reader = NovelReader(use_google_tts=True, cache=None, tts_backend=backend, coalesce=coalesce)
+    long = ' '.join(f"Sentence number {n} runs on for a while." for n in range(6))
+    segments = reader.parse_text(f'{long}\n\n"Not yet," Anna said.\n\nThe end.')
+    i, _, audio = next(reader.synthesize_segments(segments, workers=1))
+    # Journaling it then cannot wait on requests for the segments after it
+    assert i == 0 and audio is not None
+    assert ' '.join(backend.texts) == long
+
+
+def test_split_request_audio_matches_segments():
+    reader = offline_reader(coalesce=True)
+    segments = reader.parse_text('\n\n'.join(f"Short sentence number {n}." for n in range(6)))
+    backend = reader.tts_backend
+    for request in reader.plan_requests(segments):
+        audio = backend.synthesize(request['text'], request['voice'])
+        pieces = reader.split_request_audio(audio, request)
+        assert pieces is not None and len(pieces) == len(request['parts'])
+        assert sum(len(piece) for piece in pieces) == len(audio)
+        for (_, segment, _), piece in zip(request['parts'], pieces):
+            # The fake backend speaks 60 ms per character
+            assert abs(len(piece) - 60 * len(segment['text'])) <= 120
+
+
+def test_coalesced_render_keeps_every_segment():
+    reader = offline_reader(coalesce=True)
+    segments = reader.parse_text(BOOK)
+    rendered = list(reader.synthesize_segments(segments, workers=2))
+    assert [i for i, _, _ in rendered] == list(range(len(segments)))
+    assert all(audio is not None and len(audio) for _, _, audio in rendered)
+
+
+def test_coalesced_request_without_clear_pauses_is_resent_per_segment():
+    reader = NovelReader(use_google_tts=True, cache=None, tts_backend=FakeTTSBackend(silent=True),
+                         coalesce=True)
+    segments = reader.parse_text('\n\n'.join(f"Short sentence number {n}." for n in range(4)))
+    request = next(reader.plan_requests(segments))
+    silence = FakeTTSBackend(silent=True).synthesize(request['text'], request['voice'])
+    assert len(request['parts']) == 4 and reader.split_request_audio(silence, request) is None
+    
+    rendered = list(reader.synthesize_segments(segments, workers=1))
+    assert reader.split_fallbacks == 1
+    assert reader.requests_sent == 1 + len(segments)
+    # Each segment got its own audio, all the same length as their texts are
+    assert len({len(audio) for _, _, audio in rendered}) == 1
+
+
+def test_coalesced_audio_is_cached_per_segment(tmp_path):
+    cache = SynthesisCache(tmp_path)
+    segments_text = '\n\n'.join(f"Short sentence number {n}." for n in range(6))
+    reader = offline_reader(coalesce=True)
+    reader.cache = cache
+    list(reader.synthesize_segments(reader.parse_text(segments_text), workers=2))
+    assert 0 < reader.requests_sent < 6
+    
+    # A reader sending one request per segment finds every segment cached
+    single = offline_reader(coalesce=False)
+    single.cache = cache
+    list(single.synthesize_segments(single.parse_text(segments_text), workers=2))
+    assert single.requests_sent == 0 and single.requests_cached == 6
+
+
+# MP3 frames
+
+needs_ffmpeg = pytest.mark.skipif(not shutil.which('ffmpeg'), reason='needs ffmpeg to encode MP3')
+
+
+@pytest.mark.parametrize('header, length', [
+    (MP3_HEADER, 96),
+    (bytes([0xFF, 0xF3, 0x46, 0xC0]), 97),           # Padding bit set
+    (bytes([0xFF, 0xFB, 0x90, 0x00]), 417),          # MPEG-1, 128 kbps at 44.1 kHz
+    (bytes([0xFF, 0xF3, 0xF4, 0xC0]), 0),            # Bad bitrate index
+    (bytes([0xFF, 0xF3, 0x4C, 0xC0]), 0),            # Reserved sample rate
+    (bytes([0xFF, 0xF5, 0x44, 0xC0]), 0),            # Layer II
+    (b'ID3\x03', 0),
+    (b'\xff', 0),
+])
+def test_mp3_frame_length(header, length):
+    assert mp3_frame_length(header) == length
+
+
+def test_join_mp3_files_keeps_only_audio_frames(tmp_path):
+    first = [mp3_frame(1), mp3_frame(2)]
+    second = [mp3_frame(3), mp3_frame(4), mp3_frame(5)]
+    (tmp_path / 'a.mp3').write_bytes(id3v2_tag() + mp3_info_frame() + b''.join(first))
+    (tmp_path / 'b.mp3').write_bytes(mp3_info_frame() + b''.join(second) + b'TAG' + bytes(125))
+    output = tmp_path / 'out.mp3'
+    join_mp3_files([tmp_path / 'a.mp3', tmp_path / 'b.mp3'], output)
+    assert output.read_bytes() == b''.join(first + second)
+    assert mp3_duration_ms(output) == pytest.approx(5 * MP3_FRAME_MS)
+
+
+@needs_ffmpeg
+def test_mp3_decoder_backends_agree():
+    pytest.importorskip('miniaudio')
+    buffer = io.BytesIO()
+    tone(1000).export(buffer, format='mp3')
+    in_process = Mp3Decoder()
+    assert in_process.backend == 'miniaudio'
+    piped = Mp3Decoder()
+    piped.backend = 'ffmpeg'
+    decoded = in_process.decode(buffer.getvalue())
+    assert (decoded.frame_rate, decoded.channels) == (EXPORT_FRAME_RATE, 1)
+    assert abs(len(decoded) - len(piped.decode(buffer.getvalue()))) <= 60
+
+
+@needs_ffmpeg
+def test_split_chapters_reuses_parts_after_an_inserted_chapter(tmp_path, capsys):
+    chapters = [f"Chapter {n}\n\nThe story goes on, part {n}." for n in (1, 2, 3)]
+    path = write_book(tmp_path, '\n\n'.join(chapters))
+    output = tmp_path / 'book.mp3'
+    reader = offline_reader(split_chapters=True)
+    assert reader.process_file(path, str(output))
+    first_parts = set((tmp_path / 'book.mp3.parts').glob('*.mp3'))
+    capsys.readouterr()
+
+    inserted = chapters[:1] + ["Chapter 2\n\nA new chapter."] + [
+        text.replace(f"Chapter {n}", f"Chapter {n + 1}") for n, text in ((2, chapters[1]), (3, chapters[2]))]
+    path.write_text('\n\n'.join(inserted), encoding='utf-8')
+    reader = offline_reader(split_chapters=True)
+    assert reader.process_file(path, str(output))
+    log = capsys.readouterr().out
+    # Renumbered headings change those chapters' text, so only chapter 1 is reused as is
+    assert log.count('reusing') == 1 and log.count('rendering') == 3
+
+    parts_dir = tmp_path / 'book.mp3.parts'
+    manifest = json.loads((parts_dir / 'manifest.json').read_text())
+    assert len(manifest['order']) == 4
+    assert set(parts_dir.glob('*.mp3')) == {parts_dir / name for name in manifest['order']}
+    assert first_parts & set(parts_dir.glob('*.mp3'))
+
+    # Unchanged headings: inserting a chapter renders only that chapter
+    path.write_text('\n\n'.join(inserted[:2] + ["Interlude\n\nA pause."] + inserted[2:]), encoding='utf-8')
+    reader = offline_reader(split_chapters=True)
+    assert reader.process_file(path, str(output))
+    log = capsys.readouterr().out
+    assert log.count('reusing') == 4 and log.count('rendering') == 1
+
+
+@needs_ffmpeg
+def test_split_chapters_renders_a_chapter_with_failures_again(tmp_path, capsys):
+    chapters = [f"Chapter {n}\n\nThe story goes on, part {n}.\n\nAnd on." for n in (1, 2, 3)]
+    path = write_book(tmp_path, '\n\n'.join(chapters))
+    output = tmp_path / 'book.mp3'
+    backend = FailingTTSBackend(failing=['part 2'])
+    reader = NovelReader(use_google_tts=True, cache=None, tts_backend=backend, split_chapters=True)
+    reader.process_file(path, str(output))
+    assert reader.render_failures == 1
+    capsys.readouterr()
+    
+    # Only the segment that failed is synthesized again; the rest of its
+    # chapter comes from the journal and the other chapters are reused
+    backend = FailingTTSBackend()
+    reader = NovelReader(use_google_tts=True, cache=None, tts_backend=backend, split_chapters=True,
+                         resume=True)
+    assert reader.process_file(path, str(output))
+    log = capsys.readouterr().out
+    assert log.count('reusing') == 2 and log.count('rendering') == 1
+    assert backend.texts == ["The story goes on, part 2."] and reader.render_failures == 0
+    assert not (tmp_path / 'book.mp3.work').exists()
+
+
+def sound_onsets(audio, quiet_ms=300):
+    """ms at which sound resumes after at least quiet_ms of silence"""
+    samples = array.array('h', audio.raw_data)
+    per_ms = audio.frame_rate // 1000
+    onsets, quiet = [], quiet_ms * per_ms
+    for i, sample in enumerate(samples):
+        if abs(sample) > 500:
+            if quiet >= quiet_ms * per_ms:
+                onsets.append(i / per_ms)
+            quiet = 0
+        else:
+            quiet += 1
+    return onsets
+
+
+@needs_ffmpeg
+def test_watch_pieces_join_gaplessly_and_keep_the_index(tmp_path):
+    path = write_book(tmp_path, "It was late.\n\n\"Hello there,\" said Anna.\n\nChapter 2\n\nMorning came.")
+    output = tmp_path / 'book.mp3'
+    reader = offline_reader()
+    keys = reader.apply_edit(str(path), None, str(output))
+    
+    def check():
+        index = json.loads((tmp_path / 'book.mp3.index.json').read_text())
+        starts = [row[1] for row in index['segments']]
+        onsets = sound_onsets(Mp3Decoder().decode(output.read_bytes()))
+        assert len(starts) == len(onsets)
+        assert all(abs(start - onset) <= 2 for start, onset in zip(starts, onsets))
+        assert [row[2] for row in index['segments']] == seek_offsets(output, 'mp3', starts)
+        return index
+    
+    check()
+    # Each piece plays its segment and the pause, give or take a frame of padding
+    segments = list(reader.iter_file_segments(str(path)))
+    pieces = [tmp_path / 'book.mp3.pieces' / f"{key}.mp3" for key in keys]
+    for segment, piece in zip(segments, pieces):
+        expected = len(reader.synthesize_google(segment['text'], reader.assign_google_voice(segment['speaker']),
+                                                segment['speaker'])) + SEGMENT_PAUSE_MS
+        assert abs(mp3_duration_ms(piece) - expected) <= MP3_FRAME_MS
+    
+    path.write_text("It was late.\n\nChapter 2\n\nMorning came, and with it the rain.", encoding='utf-8')
+    reader.apply_edit(str(path), keys, str(output))
+    assert [row[3] for row in check()['segments']] == [0, 1, 1]
+
+
+# Resumable renders
+
+def test_render_journal_recovers_from_torn_tail(tmp_path):
+    journal = RenderJournal(tmp_path / 'work')
+    journal.open()
+    journal.append('a', tone(100))
+    journal.append('b', tone(200))
+    journal.close()
+
+    # A crash mid-append: half a record, and a record whose audio never landed
+    with open(journal.journal_path, 'ab') as f:
+        f.write(json.dumps({'key': 'c', 'offset': journal.audio_size, 'length': 9600}).encode() + b'\n')
+        f.write(b'{"key": "d", "off')
+
+    resumed = RenderJournal(tmp_path / 'work')
+    assert resumed.open(resume=True) == 2
+    assert len(resumed.get('a')) == 100
+    assert len(resumed.get('b')) == 200
+    assert resumed.get('c') is None
+
+    # New records follow on cleanly from the recovered state
+    resumed.append('e', tone(50))
+    resumed.close()
+    again = RenderJournal(tmp_path / 'work')
+    assert again.open(resume=True) == 3
+    assert len(again.get('e')) == 50
+    again.close()
+
+
+def test_render_journal_fresh_start_discards_records(tmp_path):
+    journal = RenderJournal(tmp_path / 'work')
+    journal.open()
+    journal.append('a', tone(100))
+    journal.close()
+    fresh = RenderJournal(tmp_path / 'work')
+    assert fresh.open(resume=False) == 0
+    assert fresh.get('a') is None
+    fresh.close()
+
+
+# --start-at
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('start_at, segment, chapters, opening', [
+    ('1', 1, 0, b'Chapter 1'),
+    ('5', 5, 1, b'"Over here,"'),
+    ('chapter 2', 6, 1, b'Chapter 2'),
+    ('Ch 3', 9, 2, b'Epilogue'),
+    ('river was', 7, 2, b'The river'),
+])
+def test_find_start(tmp_path, newline, start_at, segment, chapters, opening):
+    path = write_book(tmp_path, newline=newline)
+    reader = offline_reader()
+    offset, number, passed = reader.find_start(path, start_at)
+    assert (number, passed) == (segment, chapters)
+    assert path.read_bytes()[offset:].startswith(opening)
+
+
+def test_find_start_assigns_voices_as_a_full_run_does(tmp_path):
+    path = write_book(tmp_path)
+    full = offline_reader()
+    for segment in full.parse_text(BOOK):
+        full.assign_google_voice(segment['speaker'])
+
+    skipped = offline_reader()
+    skipped.find_start(path, 'chapter 2')
+    assert set(skipped.voice_assignments) == {'sarah', 'john'}
+    for speaker, voice in skipped.voice_assignments.items():
+        assert voice['name'] == full.voice_assignments[speaker]['name']
+
+
+@needs_ffmpeg
+def test_find_start_uses_an_index_written_for_the_same_text(tmp_path, capsys):
+    path = write_book(tmp_path)
+    output = tmp_path / 'book.wav'
+    assert offline_reader().process_file(path, output_path=str(output))
+    index = f"{output}.index.json"
+    
+    for start_at in ['1', '5', 'chapter 2', 'Ch 3', 'river was', 'never went']:
+        scanned = offline_reader()
+        indexed = offline_reader()
+        capsys.readouterr()
+        assert indexed.find_start(path, start_at, index) == scanned.find_start(path, start_at)
+        assert 'seek index' in capsys.readouterr().out
+        assert {speaker: voice['name'] for speaker, voice in indexed.voice_assignments.items()} == \
+            {speaker: voice['name'] for speaker, voice in scanned.voice_assignments.items()}
+    
+    # Once the text changes the index no longer describes it
+    path.write_text(BOOK.replace('three days', 'a week'))
+    capsys.readouterr()
+    assert offline_reader().find_start(path, 'chapter 2', index)[1:] == (6, 1)
+    assert 'seek index' not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('start_at', ['99', 'chapter 9', 'no such words'])
+def test_find_start_out_of_range(tmp_path, start_at):
+    with pytest.raises(ValueError):
+        offline_reader().find_start(write_book(tmp_path), start_at)
+
+
+# Seek index offsets
+
+def test_seek_offsets_pcm():
+    assert seek_offsets(None, 'pcm', [0, 1000, 1500], frame_rate=8000, channels=2) == [0, 32000, 48000]
+
+
+def test_seek_offsets_wav(tmp_path):
+    path = tmp_path / 'out.wav'
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(bytes(2 * 8000 * 2))
+    header = path.stat().st_size - 2 * 8000 * 2
+    assert seek_offsets(path, 'wav', [0, 500, 1999]) == [header, header + 8000, header + 31984]
+
+
+def test_seek_offsets_mp3_land_on_frames(tmp_path):
+    path = tmp_path / 'out.mp3'
+    path.write_bytes(id3v2_tag() + mp3_info_frame() + b''.join(mp3_frame(n) for n in range(10)))
+    first = len(id3v2_tag()) + 96
+    offsets = seek_offsets(path, 'mp3', [0, 23.9, 24, 100, 10000])
+    assert offsets == [first, first, first + 96, first + 4 * 96, first + 9 * 96]
+    assert seek_offsets(path, 'opus', [0]) == [None]
+
+
+# Google TTS requests
+
+@pytest.fixture
+def mock_tts():
+    servers = []
+
+    def start(statuses=(), payload=b'mp3 bytes'):
+        servers.append(MockTTSServer(payload, statuses=statuses))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class RawMp3Decoder:
+    """Hands back the fetched bytes instead of decoding them"""
+
+    def decode(self, data):
+        return tone(len(data))
+
+
+def google_reader(server, monkeypatch, retries=3):
+    monkeypatch.setattr('novelreader.time.sleep', lambda seconds: None)
+    backend = GoogleTTSBackend(decoder=RawMp3Decoder(), endpoint=server.url)
+    return NovelReader(use_google_tts=True, cache=None, tts_backend=backend, max_retries=retries)
+
+
+@pytest.mark.parametrize('statuses, requests, ok', [
+    ([503, 429], 3, True),      # Throttling and server errors are retried
+    ([500, 502, 503, 504], 4, False),
+    ([403], 1, False),          # Client errors fail at once
+    ([400, 200], 1, False),
+])
+def test_retries_only_transient_http_errors(mock_tts, monkeypatch, statuses, requests, ok):
+    server = mock_tts(statuses)
+    reader = google_reader(server, monkeypatch)
+    voice = reader.assign_google_voice('narrator')
+    audio = reader.get_google_audio_with_retry("Hello there.", voice, 'narrator')
+    assert (audio is not None) == ok
+    assert server.requests == requests
+
+
+def test_fetch_speaks_the_pinned_gtts_protocol(mock_tts):
+    # fetch drives gTTS's private _prepare_requests and parses the response
+    # itself, so check both against the gTTS version requirements.txt pins
+    import inspect
+    from gtts import gTTS
+    
+    assert TTS_AUDIO_PATTERN.pattern in inspect.getsource(gTTS.stream)
+    
+    payload = bytes(range(256))
+    server = mock_tts(payload=payload)
+    backend = GoogleTTSBackend(endpoint=server.url)
+    text = "It was late. " * 12  # Over gTTS's 100 characters, so sent in parts
+    parts = list(backend.fetch(text, {'lang': 'en', 'tld': 'co.uk', 'slow': False}))
+    assert len(parts) == server.requests == gtts_request_count(text) > 1
+    assert all(part == payload for part in parts)
+    
+    # Each request carries gTTS's RPC envelope with its share of the text
+    sent = []
+    for body in server.bodies:
+        rpc = json.loads(urllib.parse.parse_qs(body.decode('ascii'))['f.req'][0])
+        method, parameter, _, _ = rpc[0][0]
+        assert method == 'jQ1olc'
+        spoken, lang, _, _ = json.loads(parameter)
+        assert lang == 'en'
+        sent.append(spoken)
+    # gTTS drops the punctuation it splits at
+    assert ' '.join(sent).replace('.', '').split() == text.replace('.', '').split()
+
+
+def test_rate_limit_and_request_count_cover_every_http_request(mock_tts, monkeypatch):
+    server = mock_tts()
+    reader = google_reader(server, monkeypatch)
+    waits = []
+    monkeypatch.setattr(reader.rate_limiter, 'acquire', lambda: waits.append(1))
+    text = "It was late. " * 12  # Sent by gTTS in several parts
+    assert reader.get_google_audio(text, reader.assign_google_voice('narrator'), 'narrator') is not None
+    assert len(waits) == reader.requests_sent == server.requests > 1
+
+
+def test_other_endpoints_are_cached_apart(mock_tts, monkeypatch, tmp_path):
+    mock = google_reader(mock_tts(), monkeypatch)
+    mock.cache = SynthesisCache(tmp_path)
+    voice, effects = mock.assign_google_voice('narrator'), mock.character_effects('narrator')
+    mock.get_google_audio("Hello there.", voice, 'narrator')
+    assert mock.cache_key("Hello there.", voice, effects) in mock.cache
+    
+    # A render against Google itself does not find the mock's audio
+    google = NovelReader(use_google_tts=True, cache=SynthesisCache(tmp_path))
+    assert google.cache_key("Hello there.", voice, effects) not in google.cache
+
+
+def test_retries_connection_failures(monkeypatch):
+    # Nothing listens on a port just released by a closed server
+    server = MockTTSServer()
+    server.shutdown()
+    server.server_close()
+    reader = google_reader(server, monkeypatch, retries=2)
+    attempts = []
+    fetch = reader.tts_backend.fetch
+    reader.tts_backend.fetch = lambda *args: attempts.append(1) or fetch(*args)
+    assert reader.get_google_audio_with_retry("Hello.", reader.assign_google_voice('narrator'), 'narrator') is None
+    assert len(attempts) == 3
+
+
+@pytest.mark.parametrize('error, transient', [
+    (ConnectionResetError(), True),
+    (TimeoutError(), True),
+    (ValueError('Language not supported: xx'), False),
+    (RuntimeError('Decoding failed'), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) == transient
+
+
+# Synthesis cache
+
+def test_cache_eviction_counts_other_processes_writes(tmp_path):
+    clip = tone(500)
+    size = len(clip.raw_data) + 44
+    # Two caches on one directory stand in for two batch workers
+    first = SynthesisCache(tmp_path, max_bytes=6 * size)
+    second = SynthesisCache(tmp_path, max_bytes=6 * size)
+    for n in range(5):
+        first.put(f"first-{n}", clip)
+        second.put(f"second-{n}", clip)
+    on_disk = sum(path.stat().st_size for path in tmp_path.glob('*.wav'))
+    assert on_disk <= 6 * size
+    # The most recent writes of both survive
+    assert first.get('first-4') is not None and first.get('second-4') is not None
+
+
+# Run history
+
+def test_only_synthesized_speech_calibrates_estimates(tmp_path):
+    first = offline_reader()
+    first.cache = SynthesisCache(tmp_path)
+    list(first.synthesize_segments(first.parse_text(BOOK), workers=2))
+    assert first.synthesized_ms > 0 and first.synthesized_chars > 0
+    
+    # A second render served from the cache synthesized nothing
+    second = offline_reader()
+    second.cache = SynthesisCache(tmp_path)
+    list(second.synthesize_segments(second.parse_text(BOOK), workers=2))
+    assert second.requests_cached and second.synthesized_ms == second.synthesized_chars == 0
+
+
+@pytest.mark.parametrize('coalesce', [False, True])
+def test_estimate_counts_the_requests_a_render_sends(tmp_path, coalesce):
+    text = BOOK + '\n\n' + ' '.join(f"It rained, and then, at last, it stopped {n} times." for n in range(5))
+    path = write_book(tmp_path, text)
+    reader = offline_reader(coalesce=coalesce)
+    assert reader.estimate_file(path)
+    list(reader.synthesize_segments(reader.parse_text(text), workers=2))
+    assert reader.last_estimate['requests'] == reader.requests_sent
+
+
+def test_run_history_keeps_every_writers_runs(tmp_path):
+    path = tmp_path / 'runs.jsonl'
+    # Two histories on one file stand in for two processes
+    first = RunHistory(path, keep=5)
+    second = RunHistory(path, keep=5)
+    first.append({'run': 0})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"run": ')  # A process that died mid-write
+    for n in range(1, 12):
+        (first if n % 2 else second).append({'run': n})
+    runs = [run['run'] for run in second.load()]
+    assert runs == list(range(12 - len(runs), 12)) and 5 <= len(runs) <= 10
+
+
+# Batches
+
+def test_batch_output_paths_keep_directories_apart(tmp_path):
+    common = str(tmp_path)
+    a, b = str(tmp_path / 'a' / 'chapter1.txt'), str(tmp_path / 'b' / 'chapter1.txt')
+    out = str(tmp_path / 'out')
+    assert batch_output_path(a, common, out, 'mp3') == str(tmp_path / 'out' / 'a' / 'chapter1.mp3')
+    assert batch_output_path(b, common, out, 'mp3') == str(tmp_path / 'out' / 'b' / 'chapter1.mp3')
+    assert batch_output_path(a, common, None, 'opus') == str(tmp_path / 'a' / 'chapter1.opus')
+
+
+def batch_args(tmp_path, *extra):
+    return build_parser().parse_args([
+        '--batch', str(tmp_path / '*' / '*.txt'), '--tts-backend', 'fake', '--format', 'wav',
+        '--cache-dir', str(tmp_path / 'cache'), '--jobs', '2', *extra
+    ])
+
+
+def test_batch_renders_same_named_files_from_two_directories(tmp_path, capsys):
+    for directory in ('a', 'b'):
+        (tmp_path / directory).mkdir()
+        write_book(tmp_path / directory, f"Chapter 1\n\nStory {directory}.").rename(
+            tmp_path / directory / 'chapter1.txt')
+    args = batch_args(tmp_path, '--output-dir', str(tmp_path / 'out'), '--rate-limit', '10')
+    assert run_batch(args, build_reader(args)) == 0
+    assert 'Rate limit: 5 requests/s per process' in capsys.readouterr().out
+    lengths = {directory: (tmp_path / 'out' / directory / 'chapter1.wav').stat().st_size
+               for directory in ('a', 'b')}
+    assert len(lengths) == 2 and all(lengths.values())
+
+
+def test_batch_shares_cores_and_rate_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr('novelreader.os.cpu_count', lambda: 8)
+    args = batch_args(tmp_path, '--no-google', '--rate-limit', '6')
+    worker_args = batch_worker_args(args, 4)
+    assert (worker_args.workers, worker_args.rate_limit) == (2, 1.5)
+    assert batch_worker_args(args, 16).workers == 1
+    # An explicit --workers is left alone, and so is the caller's copy
+    assert batch_worker_args(batch_args(tmp_path, '--no-google', '--workers', '3'), 4).workers == 3
+    assert (args.workers, args.rate_limit) == (None, 6)
+
+
+@pytest.mark.parametrize('option', [['--start-at', '3'], ['--profile'], ['--trace', 'trace.json']])
+def test_batch_refuses_single_file_options(tmp_path, capsys, option):
+    args = batch_args(tmp_path, *option)
+    assert run_batch(args, build_reader(args)) == 1
+    assert option[0] in capsys.readouterr().out
+
+
+# Output formats
+
+@pytest.mark.parametrize('argv, format', [
+    (['-o', 'book.opus'], 'opus'),
+    (['-o', 'book.m4a', '--format', 'ogg'], 'ogg'),
+    (['-o', 'book'], 'mp3'),
+    (['-o', '-', '--format', 'flac'], 'flac'),
+    (['-o', 'book.m4a'], None),
+    (['-o', '-', '--format', 'wav'], None),
+])
+def test_output_format(argv, format):
+    args = build_parser().parse_args(['--no-cache', *argv])
+    if format is None:
+        with pytest.raises(ValueError):
+            build_reader(args)
+    else:
+        assert build_reader(args).encoding['format'] == format
+
+
+# Daemon
+
+def test_client_reads_every_parser_option():
+    names = {option for action in build_parser()._actions for option in action.option_strings}
+    known = novelreader_client.VALUE_OPTIONS | novelreader_client.FLAG_OPTIONS
+    assert {name for name in names if name.startswith('--')} == known | {'--help', '--version'}
+    assert {name for name in names if not name.startswith('--')} == set(novelreader_client.SHORT_OPTIONS) | {'-h'}
+
+
+@pytest.mark.parametrize('argv, forward', [
+    (['-f', 'book.txt', '-p'], True),
+    (['--file=book.txt', '--output', 'book.mp3', '--workers', '8'], True),
+    (['-lv'], True),
+    (['--file', 'book.txt'], False),                        # Live playback
+    (['--file', 'book.txt', '--output', '-'], False),
+    (['--file', 'book.txt', '--preview', '--no-daemon'], False),
+    (['--file', 'book.txt', '--out', 'book.mp3'], False),   # Abbreviations need the full parser
+    (['--file', 'book.txt', '--preview', '--help'], False),
+])
+def test_client_forwards_only_daemon_jobs(argv, forward):
+    assert novelreader_client.forwardable(novelreader_client.read_options(argv)) == forward
+
+
+def test_worker_thread_output_reaches_the_job_stream():
+    from concurrent.futures import ThreadPoolExecutor
+    
+    stdout = ContextStream(io.StringIO())
+    job = io.StringIO()
+    with ThreadPoolExecutor(max_workers=2) as executor, stdout.redirect(job):
+        for _, _, future in submit_ordered(executor, lambda n: stdout.write(f"{n}\n"), range(4),
+                                           lambda n: (n,), 2):
+            future.result()
+    assert sorted(job.getvalue().split()) == ['0', '1', '2', '3']
+    assert stdout.default.getvalue() == ''
+
+
+# Character effects
+
+@pytest.mark.parametrize('tempo', [0.8, 1.25])
+@pytest.mark.parametrize('frequency', [140, 333])
+def test_stretch_keeps_pitch(tempo, frequency):
+    np = pytest.importorskip('numpy')
+    times = np.arange(2 * EXPORT_FRAME_RATE) / EXPORT_FRAME_RATE
+    samples = (8000 * np.sin(2 * np.pi * frequency * times)).astype(np.float32)[:, None]
+    out = EffectsProcessor().stretch(samples, tempo, EXPORT_FRAME_RATE)[:, 0]
+    assert len(out) == pytest.approx(len(samples) / tempo, rel=0.05)
+
+    # Aligned windows add up to the same clean tone, with no phase cancellation
+    middle = out[2000:-2000]
+    power = np.abs(np.fft.rfft(middle * np.hanning(len(middle)))) ** 2
+    freqs = np.fft.rfftfreq(len(middle), 1 / EXPORT_FRAME_RATE)
+    assert power[abs(freqs - frequency) < 8].sum() / power.sum() > 0.99
+    assert np.abs(middle).max() == pytest.approx(8000, rel=0.05)